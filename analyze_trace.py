@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Trace Analyzer
+Per-action durations, waits and idle (time.sleep) time from Playwright trace zips,
+without opening the trace viewer
+
+Usage:
+    python3 analyze_trace.py                                  # traces/analytics_session.zip
+    python3 analyze_trace.py traces/my_recording.zip
+    python3 analyze_trace.py traces/*.zip                     # one summary line per trace
+    python3 analyze_trace.py old.zip --compare new.zip        # side by side
+    python3 analyze_trace.py traces/my_recording.zip --json actions.json
+"""
+
+from pathlib import Path
+import argparse
+import json
+import sys
+import zipfile
+
+from automation.trace_analysis import Trace, compare_traces
+
+
+DEFAULT_TRACE = Path("traces/analytics_session.zip")
+
+
+def print_actions(trace):
+    print(f"\n{'#':>3} {'start':>8} {'took':>8} {'idle before':>12}  action")
+    print("-" * 78)
+    for i, action in enumerate(trace.actions, 1):
+        flag = " ⏳" if action['is_wait'] else ""
+        if action['error']:
+            flag += f"  ❌ {action['error'][:60]}"
+        target = f" {action['target']}" if action['target'] else ""
+        print(f"{i:>3} {action['start']:>7.2f}s {action['duration']:>7.2f}s {action['idle_before']:>11.2f}s  "
+              f"{action['api']}{target[:50]}{flag}")
+
+
+def print_totals(trace):
+    totals = trace.totals()
+    print("\n" + "=" * 60)
+    print("📈 SUMMARY")
+    print("=" * 60)
+    print(f"   Total time:        {totals['wall']:>8.2f}s ({totals['actions']} actions)")
+    print(f"   Actions:           {totals['action_time']:>8.2f}s")
+    print(f"   Explicit waits:    {totals['wait_time']:>8.2f}s")
+    print(f"   Idle (time.sleep): {totals['idle_time']:>8.2f}s")
+    print(f"   Network:           {totals['requests']} requests, {totals['bytes'] / (1024 * 1024):.1f} MB")
+    if totals['errors']:
+        print(f"   ❌ Failed actions:  {totals['errors']}")
+
+    slowest = trace.slowest_requests(5)
+    if slowest:
+        print("\n   Slowest requests:")
+        for request in slowest:
+            print(f"     {request['duration']:>6.2f}s  {request['status'] or '---'}  "
+                  f"{request['method']} {request['url'][:70]}")
+
+
+def print_summary_table(traces):
+    print(f"\n{'trace':<36} {'total':>8} {'actions':>8} {'waits':>8} {'idle':>8} {'requests':>9}")
+    print("-" * 81)
+    for trace in traces:
+        t = trace.totals()
+        print(f"{trace.path.name[:36]:<36} {t['wall']:>7.1f}s {t['action_time']:>7.1f}s "
+              f"{t['wait_time']:>7.1f}s {t['idle_time']:>7.1f}s {t['requests']:>9}")
+
+
+def print_comparison(old, new):
+    print(f"\n   A = {old.path}")
+    print(f"   B = {new.path}\n")
+    print(f"{'A took':>8} {'B took':>8} {'delta':>8} {'A idle':>8} {'B idle':>8}  action")
+    print("-" * 78)
+    for a, b in compare_traces(old, new):
+        action = a or b
+        a_took = f"{a['duration']:.2f}s" if a else "-"
+        b_took = f"{b['duration']:.2f}s" if b else "-"
+        delta = f"{b['duration'] - a['duration']:+.2f}s" if a and b else ("removed" if a else "added")
+        a_idle = f"{a['idle_before']:.2f}s" if a else "-"
+        b_idle = f"{b['idle_before']:.2f}s" if b else "-"
+        target = f" {action['target']}" if action['target'] else ""
+        print(f"{a_took:>8} {b_took:>8} {delta:>8} {a_idle:>8} {b_idle:>8}  {action['api']}{target[:40]}")
+
+    old_totals, new_totals = old.totals(), new.totals()
+    print("\n" + "=" * 60)
+    print("📈 A vs B")
+    print("=" * 60)
+    for label, key in [('Total time', 'wall'), ('Actions', 'action_time'),
+                       ('Explicit waits', 'wait_time'), ('Idle (time.sleep)', 'idle_time')]:
+        before, after = old_totals[key], new_totals[key]
+        change = f"({(after - before) / before * 100:+.0f}%)" if before else ""
+        print(f"   {label:<18} {before:>8.2f}s -> {after:>8.2f}s  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze Playwright trace zips without the viewer")
+    parser.add_argument('traces', nargs='*', type=Path, default=[DEFAULT_TRACE],
+                        help=f"Trace zip(s) to analyze (default: {DEFAULT_TRACE})")
+    parser.add_argument('--compare', type=Path, metavar='TRACE',
+                        help="Compare the (single) trace with this one, action by action")
+    parser.add_argument('--json', type=Path, metavar='FILE',
+                        help="Also write actions, requests and totals as JSON")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔍 Playwright Trace Analyzer")
+    print("=" * 60)
+
+    traces = []
+    for path in args.traces + ([args.compare] if args.compare else []):
+        if not path.exists():
+            print(f"❌ Trace file not found: {path}")
+            print("💡 Record one with: python3 replay_recorded_session.py")
+            sys.exit(1)
+        try:
+            traces.append(Trace(path))
+        except zipfile.BadZipFile:
+            print(f"❌ Not a trace zip: {path}")
+            sys.exit(1)
+
+    if args.compare:
+        if len(traces) != 2:
+            print("❌ --compare takes exactly one other trace")
+            sys.exit(1)
+        print_comparison(traces[0], traces[1])
+    elif len(traces) > 1:
+        print_summary_table(traces)
+    else:
+        print(f"\n📁 {traces[0].path}")
+        print_actions(traces[0])
+        print_totals(traces[0])
+
+    if args.json:
+        data = [
+            {'trace': str(t.path), 'totals': t.totals(), 'actions': t.actions, 'requests': t.requests}
+            for t in traces
+        ]
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        print(f"\n💾 Saved to: {args.json}")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import json
+from pathlib import Path
+
+from .config import Config
+
+
+def load_accounts(path: Path = None):
+    """
+    Load seller accounts from the accounts file
+
+    The file is a JSON list:
+        [
+            {"name": "main", "username": "me@example.com", "password": "..."},
+            {"name": "second-shop", "username": "...", "password": "..."}
+        ]
+
+    Returns: list of Config objects, one per account (empty if no file)
+    """
+    path = Path(path or Config.ACCOUNTS_FILE)
+    if not path.exists():
+        return []
+
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    configs = []
+    seen = set()
+    for entry in entries:
+        name = entry.get('name', '').strip()
+        if not name or '/' in name or name in seen:
+            raise ValueError(f"Invalid or duplicate account name in {path.name}: {name!r}")
+        seen.add(name)
+        configs.append(Config.for_account(name, entry['username'], entry['password']))
+
+    return configs
@@ -0,0 +1,105 @@
+"""
+Typed product analytics
+
+The analytics table shows counts and a delivery rate per product for a
+country and a date range. analytics_row_from_cells turns one table row into
+ints and floats (rates in percent, 12.5 for "12.50%"), and AnalyticsRange
+holds the rows fetched for one (country, start, end) window.
+"""
+
+from datetime import date, datetime, timedelta
+
+from .config import Config
+
+
+# Analytics table columns, in order (see benchmarks/fixtures.ANALYTICS_HEADERS)
+COUNT_COLUMNS = ['leads', 'confirmed', 'cancelled', 'no_answer', 'shipped', 'delivered', 'returned', 'pending']
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def as_date(value):
+    """date from a date, datetime or 'YYYY-MM-DD' string"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value).strip(), DATE_FORMAT).date()
+
+
+def analytics_window(today=None):
+    """(start, end) of the usual analytics window (Config.ANALYTICS_WINDOW_*_DAYS ago)"""
+    today = as_date(today or date.today())
+    return (today - timedelta(days=Config.ANALYTICS_WINDOW_START_DAYS),
+            today - timedelta(days=Config.ANALYTICS_WINDOW_END_DAYS))
+
+
+def _count(text):
+    text = (text or '').replace(',', '').strip()
+    return int(text) if text.isdigit() else 0
+
+
+def _percent(text):
+    try:
+        return float((text or '').replace('%', '').strip())
+    except ValueError:
+        return None
+
+
+def confirmation_rate(row):
+    """Confirmed share of leads, in percent (None without leads)"""
+    return round(row['confirmed'] / row['leads'] * 100, 2) if row['leads'] else None
+
+
+def analytics_row_from_cells(cells):
+    """
+    Typed analytics row from the text of one table row, or None for other rows
+
+    Columns: 0 product, 1-8 leads .. pending, 9 delivery rate
+    """
+    if len(cells) < 10:
+        return None
+    product = ' '.join(cells[0].split())
+    if len(product) < 2:
+        return None
+    row = {'product': product}
+    for column, text in zip(COUNT_COLUMNS, cells[1:9]):
+        row[column] = _count(text)
+    row['delivery_rate'] = _percent(cells[9])
+    row['confirmation_rate'] = confirmation_rate(row)
+    return row
+
+
+class AnalyticsRange:
+    """Product analytics of one country over one date range"""
+
+    def __init__(self, country, start, end, rows=None, error=None, fetched_at=None):
+        self.country = country
+        self.start = as_date(start)
+        self.end = as_date(end)
+        self.rows = rows or []
+        self.error = error
+        self.fetched_at = fetched_at or datetime.now()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def days(self):
+        return (self.end - self.start).days + 1
+
+    @property
+    def daterange(self):
+        """'2025-10-01 - 2025-10-05', as typed in the dashboard's date filter"""
+        return f'{self.start:{DATE_FORMAT}} - {self.end:{DATE_FORMAT}}'
+
+    def totals(self):
+        """Counts summed over all products"""
+        return {column: sum(row[column] for row in self.rows) for column in COUNT_COLUMNS}
+
+    def by_product(self):
+        return {row['product']: row for row in self.rows}
+
+    def __repr__(self):
+        status = f'{len(self.rows)} products' if self.ok else f'failed: {self.error}'
+        return f"<AnalyticsRange {self.country} {self.daterange} {status}>"
@@ -0,0 +1,183 @@
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import json
+
+from .analytics import COUNT_COLUMNS, AnalyticsRange, as_date, confirmation_rate
+from .config import Config
+from .database import connect
+
+
+SCHEMA = """
+-- Whole settled windows, exactly as fetched or assembled
+CREATE TABLE IF NOT EXISTS analytics_ranges (
+    country TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    rows TEXT NOT NULL,             -- JSON list of typed analytics rows
+    fetched_at TEXT NOT NULL,
+    PRIMARY KEY (country, start, end)
+);
+
+-- Settled single days, so overlapping windows share them
+CREATE TABLE IF NOT EXISTS analytics_days (
+    country TEXT NOT NULL,
+    day TEXT NOT NULL,
+    products INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL,
+    PRIMARY KEY (country, day)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_day_rows (
+    country TEXT NOT NULL,
+    day TEXT NOT NULL,
+    product TEXT NOT NULL,
+    leads INTEGER NOT NULL,
+    confirmed INTEGER NOT NULL,
+    cancelled INTEGER NOT NULL,
+    no_answer INTEGER NOT NULL,
+    shipped INTEGER NOT NULL,
+    delivered INTEGER NOT NULL,
+    returned INTEGER NOT NULL,
+    pending INTEGER NOT NULL,
+    delivery_rate REAL,
+    PRIMARY KEY (country, day, product)
+) WITHOUT ROWID;
+"""
+
+
+def _days(start, end):
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+class AnalyticsCache:
+    """
+    Analytics results for date windows that can no longer change
+
+    Leads of a day keep being confirmed, shipped and delivered for a while;
+    once a day is Config.ANALYTICS_SETTLED_DAYS old its numbers are final.
+    Settled windows are kept by (country, start, end), and settled days one
+    by one, so a window that overlaps earlier ones (the daily 20-to-10-days
+    window moves by one day) is assembled from cached days and only its new
+    days are fetched.
+
+    Window counts are the sums of their days; rates are recomputed from
+    those sums (delivery rate = delivered / confirmed).
+    """
+
+    def __init__(self, directory: Path = None, settled_days: int = None):
+        self.conn = connect(directory)
+        self.conn.executescript(SCHEMA)
+        self.settled_days = Config.ANALYTICS_SETTLED_DAYS if settled_days is None else settled_days
+        self.hits = 0
+        self.days_reused = 0
+        self.days_stored = 0
+
+    def is_settled(self, day, today=None):
+        """Whether a day's analytics are final"""
+        return (as_date(today or date.today()) - as_date(day)).days >= self.settled_days
+
+    # Whole windows
+
+    def get_range(self, country, start, end):
+        """Cached AnalyticsRange for exactly this window, or None"""
+        row = self.conn.execute(
+            'SELECT rows, fetched_at FROM analytics_ranges WHERE country = ? AND start = ? AND end = ?',
+            (country, str(as_date(start)), str(as_date(end)))
+        ).fetchone()
+        if row is None:
+            return None
+        self.hits += 1
+        return AnalyticsRange(country, start, end, rows=json.loads(row['rows']),
+                              fetched_at=datetime.fromisoformat(row['fetched_at']))
+
+    def put_range(self, result):
+        """Keep a fetched or assembled window if it has settled"""
+        if not result.ok or not self.is_settled(result.end):
+            return False
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO analytics_ranges (country, start, end, rows, fetched_at) VALUES (?, ?, ?, ?, ?)',
+                (result.country, str(result.start), str(result.end), json.dumps(result.rows),
+                 result.fetched_at.isoformat(timespec='seconds'))
+            )
+        return True
+
+    # Single days
+
+    def missing_days(self, country, start, end):
+        """Days of a window that have to be fetched (not cached, or not settled yet)"""
+        cached = {row['day'] for row in self.conn.execute(
+            'SELECT day FROM analytics_days WHERE country = ? AND day BETWEEN ? AND ?',
+            (country, str(as_date(start)), str(as_date(end)))
+        )}
+        return [day for day in _days(as_date(start), as_date(end)) if str(day) not in cached]
+
+    def put_day(self, result):
+        """Keep a single-day result if it has settled"""
+        if not result.ok or result.start != result.end or not self.is_settled(result.start):
+            return False
+        day = str(result.start)
+        with self.conn:
+            self.conn.execute('DELETE FROM analytics_day_rows WHERE country = ? AND day = ?', (result.country, day))
+            self.conn.executemany(
+                f'INSERT INTO analytics_day_rows (country, day, product, {", ".join(COUNT_COLUMNS)}, delivery_rate) '
+                f'VALUES (?, ?, ?, {", ".join("?" * len(COUNT_COLUMNS))}, ?)',
+                [(result.country, day, row['product'], *(row[c] for c in COUNT_COLUMNS), row['delivery_rate'])
+                 for row in result.rows]
+            )
+            self.conn.execute(
+                'INSERT OR REPLACE INTO analytics_days (country, day, products, fetched_at) VALUES (?, ?, ?, ?)',
+                (result.country, day, len(result.rows), result.fetched_at.isoformat(timespec='seconds'))
+            )
+        self.days_stored += 1
+        return True
+
+    def assemble(self, country, start, end, fresh=()):
+        """
+        Window result built from cached days plus freshly fetched single days
+
+        Args:
+            fresh: Single-day AnalyticsRange results covering the days not in the cache
+
+        Returns: AnalyticsRange, or None if some day is neither cached nor fresh
+        """
+        start, end = as_date(start), as_date(end)
+        fresh = {result.start: result for result in fresh if result.ok and result.start == result.end}
+        missing = self.missing_days(country, start, end)
+        if any(day not in fresh for day in missing):
+            return None
+
+        totals = {}
+        for row in self.conn.execute(
+            f'SELECT product, {", ".join(f"SUM({c}) AS {c}" for c in COUNT_COLUMNS)} FROM analytics_day_rows '
+            'WHERE country = ? AND day BETWEEN ? AND ? GROUP BY product',
+            (country, str(start), str(end))
+        ):
+            totals[row['product']] = dict(row)
+        for day in missing:
+            for row in fresh[day].rows:
+                total = totals.setdefault(row['product'], {'product': row['product'], **dict.fromkeys(COUNT_COLUMNS, 0)})
+                for column in COUNT_COLUMNS:
+                    total[column] += row[column]
+
+        rows = []
+        for total in totals.values():
+            total['delivery_rate'] = round(total['delivered'] / total['confirmed'] * 100, 2) if total['confirmed'] else 0.0
+            total['confirmation_rate'] = confirmation_rate(total)
+            rows.append(total)
+        rows.sort(key=lambda row: row['leads'], reverse=True)
+        self.days_reused += len(_days(start, end)) - len(missing)
+        return AnalyticsRange(country, start, end, rows=rows)
+
+    def print_summary(self):
+        print(f"🗃️  Analytics cache: {self.hits} window(s) and {self.days_reused} day(s) reused, "
+              f"{self.days_stored} newly settled day(s) stored")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
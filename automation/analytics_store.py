@@ -0,0 +1,233 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .analytics import COUNT_COLUMNS, as_date, confirmation_rate
+from .config import Config
+from .database import connect
+
+
+SCHEMA = """
+-- One analytics result per country and date window
+CREATE TABLE IF NOT EXISTS analytics_windows (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    country TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    source TEXT NOT NULL,               -- 'snapshot', 'cache', ...
+    snapshot_id INTEGER,                -- manifest snapshot it was parsed from
+    UNIQUE (country, start, end)
+);
+CREATE INDEX IF NOT EXISTS idx_analytics_windows_end ON analytics_windows (country, end);
+
+CREATE TABLE IF NOT EXISTS analytics_products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_name TEXT NOT NULL UNIQUE
+);
+
+-- Per-product numbers of a window; keyed by product first so a product's series is contiguous
+CREATE TABLE IF NOT EXISTS analytics_results (
+    product_id INTEGER NOT NULL,
+    window_id INTEGER NOT NULL,
+    leads INTEGER NOT NULL,
+    confirmed INTEGER NOT NULL,
+    cancelled INTEGER NOT NULL,
+    no_answer INTEGER NOT NULL,
+    shipped INTEGER NOT NULL,
+    delivered INTEGER NOT NULL,
+    returned INTEGER NOT NULL,
+    pending INTEGER NOT NULL,
+    confirmation_rate REAL,             -- percent
+    delivery_rate REAL,                 -- percent
+    PRIMARY KEY (product_id, window_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_analytics_results_window ON analytics_results (window_id);
+"""
+
+# Per product of one window: averages over the last N windows of the same
+# length and the change against the same-length window ending a week earlier
+TRENDS_QUERY = """
+WITH same_length AS (
+    SELECT id, end FROM analytics_windows
+    WHERE country = :country AND julianday(end) - julianday(start) = :span
+),
+recent AS (
+    SELECT id FROM same_length WHERE end <= :end ORDER BY end DESC LIMIT :windows
+),
+averages AS (
+    SELECT product_id, AVG(leads) AS leads_avg,
+           AVG(confirmation_rate) AS confirmation_rate_avg, AVG(delivery_rate) AS delivery_rate_avg
+    FROM analytics_results WHERE window_id IN (SELECT id FROM recent)
+    GROUP BY product_id
+)
+SELECT p.product_name AS product, :start AS start, :end AS end,
+       r.leads, r.confirmed, r.delivered, r.confirmation_rate, r.delivery_rate,
+       a.leads_avg, a.confirmation_rate_avg, a.delivery_rate_avg,
+       r.leads - prev.leads AS leads_wow,
+       r.confirmation_rate - prev.confirmation_rate AS confirmation_rate_wow,
+       r.delivery_rate - prev.delivery_rate AS delivery_rate_wow
+FROM analytics_results r
+JOIN analytics_products p ON p.id = r.product_id
+JOIN averages a ON a.product_id = r.product_id
+LEFT JOIN analytics_results prev ON prev.product_id = r.product_id
+    AND prev.window_id = (SELECT id FROM same_length WHERE end = date(:end, '-7 days'))
+WHERE r.window_id = (SELECT id FROM same_length WHERE end = :end)
+ORDER BY r.leads DESC, p.product_name
+"""
+
+
+def _timestamp(when):
+    if isinstance(when, datetime):
+        return when.isoformat(timespec='seconds')
+    return when
+
+
+class AnalyticsStore:
+    """
+    Typed history of product analytics, keyed by product, country and window
+
+    Every analytics result (a snapshot's table or a window assembled from
+    the analytics cache) is stored with its counts as integers and its
+    rates as floats. Rolling averages and week-over-week changes for all
+    products of a window come from one SQL query that reads only the
+    windows involved, not from re-reading old CSVs.
+    """
+
+    def __init__(self, directory: Path = None):
+        self.directory = Path(directory or Config.DOWNLOAD_DIR)
+        self.conn = connect(self.directory)
+        self.conn.executescript(SCHEMA)
+        self._product_ids = {
+            row['product_name']: row['id'] for row in self.conn.execute('SELECT * FROM analytics_products')
+        }
+
+    # Writing
+
+    def ingest(self, result, source, snapshot_id=None):
+        """
+        Store an AnalyticsRange (replacing an earlier result for the same window)
+
+        Returns: the window's id
+        """
+        with self.conn:
+            self.conn.execute(
+                'DELETE FROM analytics_results WHERE window_id = '
+                '(SELECT id FROM analytics_windows WHERE country = ? AND start = ? AND end = ?)',
+                (result.country, str(result.start), str(result.end))
+            )
+            self.conn.execute(
+                'INSERT INTO analytics_windows (country, start, end, fetched_at, source, snapshot_id) '
+                'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (country, start, end) DO UPDATE SET '
+                'fetched_at = excluded.fetched_at, source = excluded.source, snapshot_id = excluded.snapshot_id',
+                (result.country, str(result.start), str(result.end), _timestamp(result.fetched_at), source, snapshot_id)
+            )
+            window_id = self.conn.execute(
+                'SELECT id FROM analytics_windows WHERE country = ? AND start = ? AND end = ?',
+                (result.country, str(result.start), str(result.end))
+            ).fetchone()['id']
+            rows = {}
+            for row in result.rows:
+                # A product listed twice in one table is counted once
+                rows[self._product_id(row['product'])] = row
+            self.conn.executemany(
+                f'INSERT INTO analytics_results (product_id, window_id, {", ".join(COUNT_COLUMNS)}, '
+                f'confirmation_rate, delivery_rate) VALUES (?, ?, {", ".join("?" * len(COUNT_COLUMNS))}, ?, ?)',
+                [(product_id, window_id, *(row[c] for c in COUNT_COLUMNS), confirmation_rate(row), row['delivery_rate'])
+                 for product_id, row in rows.items()]
+            )
+        return window_id
+
+    def catch_up(self, snapshots, parse, window):
+        """
+        Store manifest snapshots not stored yet
+
+        Args:
+            snapshots: Snapshot objects (any order)
+            parse: Function turning a snapshot into an AnalyticsRange
+            window: Function giving the (country, start, end) a snapshot covers
+
+        Returns: number of snapshots stored
+        """
+        stored = {row['snapshot_id'] for row in self.conn.execute(
+            'SELECT snapshot_id FROM analytics_windows WHERE snapshot_id IS NOT NULL'
+        )}
+        ingested = 0
+        for snapshot in sorted(snapshots, key=lambda s: (s.captured_at, s.id)):
+            if snapshot.id in stored or self.has_window(*window(snapshot)):
+                continue
+            self.ingest(parse(snapshot), 'snapshot', snapshot_id=snapshot.id)
+            ingested += 1
+        return ingested
+
+    def _product_id(self, name):
+        if name not in self._product_ids:
+            cursor = self.conn.execute('INSERT INTO analytics_products (product_name) VALUES (?)', (name,))
+            self._product_ids[name] = cursor.lastrowid
+        return self._product_ids[name]
+
+    # Reading
+
+    def has_window(self, country, start, end):
+        return self.conn.execute(
+            'SELECT 1 FROM analytics_windows WHERE country = ? AND start = ? AND end = ?',
+            (country, str(as_date(start)), str(as_date(end)))
+        ).fetchone() is not None
+
+    def latest_end(self, country, days=None):
+        """End date of the newest stored window (of `days` days, if given), or None"""
+        query = 'SELECT MAX(end) FROM analytics_windows WHERE country = ?'
+        params = [country]
+        if days is not None:
+            query += ' AND julianday(end) - julianday(start) = ?'
+            params.append(days - 1)
+        return self.conn.execute(query, params).fetchone()[0]
+
+    def trends(self, country, end=None, days=None, windows=None):
+        """
+        Every product of a window, with its trends
+
+        Only windows of the same length are compared: the daily
+        20-to-10-days window with the previous daily windows, a backfilled
+        week with other weeks.
+
+        Args:
+            country: Country the windows were fetched for
+            end: Window end date (default: the newest window of that length)
+            days: Window length in days (default: the usual analytics window)
+            windows: Windows in the rolling averages (default: Config.ANALYTICS_TREND_WINDOWS)
+
+        Returns: list of dicts - counts and rates, *_avg rolling averages and
+                 *_wow changes against the window a week earlier (None without one)
+        """
+        days = days or Config.ANALYTICS_WINDOW_START_DAYS - Config.ANALYTICS_WINDOW_END_DAYS + 1
+        end = str(as_date(end)) if end else self.latest_end(country, days)
+        if end is None:
+            return []
+        windows = windows or Config.ANALYTICS_TREND_WINDOWS
+        start = str(as_date(end) - timedelta(days=days - 1))
+        return [dict(row) for row in self.conn.execute(
+            TRENDS_QUERY, {'country': country, 'start': start, 'end': end, 'span': days - 1, 'windows': windows}
+        )]
+
+    def series(self, country, product, since=None):
+        """One product's windows, oldest first"""
+        since = str(as_date(since)) if since else ''
+        return [dict(row) for row in self.conn.execute(
+            'SELECT w.start, w.end, r.* FROM analytics_results r '
+            'JOIN analytics_windows w ON w.id = r.window_id '
+            'WHERE r.product_id = (SELECT id FROM analytics_products WHERE product_name = ?) '
+            'AND w.country = ? AND w.end >= ? ORDER BY w.end',
+            (product, country, since)
+        )]
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM analytics_windows').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,155 @@
+import gzip
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .config import Config
+
+
+# DataTables id of the table that holds each dataset
+TABLE_IDS = {
+    'inventory': 'inventory',
+    'orders': 'orders',
+    'analytics': 'products',
+}
+
+# Raw capture filenames of each dataset
+RAW_PATTERNS = {
+    'inventory': 'Inventory*.html',
+    'orders': 'Orders*.html',
+    'analytics': 'Analytics_Products*.html',
+}
+
+TABLE_TAG = re.compile(r'<(/?)table\b[^>]*>', re.IGNORECASE)
+STYLE_ATTR = re.compile(r'\sstyle="[^"]*"', re.IGNORECASE)
+
+
+def extract_table(html, dataset):
+    """
+    Strip a captured page down to the table the parsers read
+
+    Looks for the dataset's DataTables table (e.g. <table id="inventory">),
+    falling back to the first table with data rows. Returns the whole page
+    if no table is found, so nothing is ever lost.
+    """
+    table_id = TABLE_IDS.get(dataset)
+    start = None
+
+    if table_id:
+        match = re.search(rf'<table\b[^>]*\bid="{table_id}"', html)
+        if match:
+            start = match.start()
+
+    if start is None:
+        row = html.find('role="row"')
+        if row == -1:
+            return html
+        start = html.rfind('<table', 0, row)
+        if start == -1:
+            return html
+
+    # Walk to the matching </table>, allowing for nested tables
+    depth = 0
+    for tag in TABLE_TAG.finditer(html, start):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return f"<html><body>{html[start:tag.end()]}</body></html>"
+
+    return html
+
+
+def normalize_table(table_html):
+    """
+    Canonical form of a table for change detection
+
+    Inline styles (column widths, DataTables state) and whitespace change
+    between captures even when the data doesn't, so they are dropped.
+    """
+    html = STYLE_ATTR.sub('', table_html)
+    html = re.sub(r'>\s+<', '><', html)
+    return re.sub(r'\s+', ' ', html).strip()
+
+
+def write_archive(directory, source_name, table_html, captured_at):
+    """
+    Write a stripped capture to archive/YYYY/MM/DD/<source>_<HHMMSS>.html.gz
+
+    Returns: path of the archived file
+    """
+    day_dir = Path(directory) / Config.ARCHIVE_DIR_NAME / captured_at.strftime('%Y/%m/%d')
+    day_dir.mkdir(parents=True, exist_ok=True)
+
+    stem = Path(source_name).stem
+    archive_path = day_dir / f"{stem}_{captured_at.strftime('%H%M%S')}.html.gz"
+    with gzip.open(archive_path, 'wt', encoding='utf-8', compresslevel=9) as f:
+        f.write(table_html)
+
+    return archive_path
+
+
+def open_snapshot(path):
+    """Open a snapshot for reading, decompressing archived captures on the fly"""
+    path = Path(path)
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def select_for_retention(snapshots, now=None, config=Config):
+    """
+    Decide which archived snapshots to keep
+
+    Tiers: every snapshot for ARCHIVE_KEEP_ALL_DAYS, then the newest one per
+    week up to ARCHIVE_KEEP_WEEKLY_DAYS, then the newest one per month.
+
+    Returns: (keep, drop) lists of snapshots
+    """
+    now = now or datetime.now()
+    keep_all_since = now - timedelta(days=config.ARCHIVE_KEEP_ALL_DAYS)
+    weekly_since = now - timedelta(days=config.ARCHIVE_KEEP_WEEKLY_DAYS)
+
+    keep, drop = [], []
+    buckets = set()
+
+    # Newest first, so the first snapshot seen in a bucket is the one kept
+    for snapshot in sorted(snapshots, key=lambda s: s.captured_at, reverse=True):
+        captured = snapshot.captured_at
+        if captured >= keep_all_since:
+            keep.append(snapshot)
+            continue
+
+        if captured >= weekly_since:
+            bucket = ('week',) + tuple(captured.isocalendar()[:2])
+        else:
+            bucket = ('month', captured.year, captured.month)
+
+        if bucket in buckets:
+            drop.append(snapshot)
+        else:
+            buckets.add(bucket)
+            keep.append(snapshot)
+
+    return keep, drop
+
+
+def prune_archive(directory: Path = None, now=None):
+    """
+    Archive any raw captures not archived yet, then apply tiered retention
+
+    Run this before clean_old_files() so no raw capture is deleted unarchived.
+    """
+    from .manifest import SnapshotManifest
+
+    removed = 0
+    with SnapshotManifest(directory) as manifest:
+        for dataset, pattern in RAW_PATTERNS.items():
+            manifest.sync(dataset, pattern)
+            archived = [s for s in manifest.all(dataset) if s.is_archived]
+            keep, drop = select_for_retention(archived, now)
+            if drop:
+                manifest.remove(drop)
+                removed += len(drop)
+
+    if removed:
+        print(f"🗜️  Archive retention: removed {removed} old snapshot(s)")
+    return removed
@@ -0,0 +1,185 @@
+"""
+Persistent cache of the dashboard's static assets
+
+Every run opens a fresh browser context, so the dashboard's JS/CSS bundles,
+DataTables libraries, fonts and images would be downloaded on every launch.
+AssetCache routes static-asset URLs through a local content-addressed store
+(context.route): a fresh copy is served from disk with no network request,
+anything else goes to the network and is stored on the way back.
+
+    <cache dir>/index.db              URL -> content hash, headers, last use
+    <cache dir>/objects/ab/abcd...    asset bodies, named by SHA-256
+
+Versioned URLs (a ?v=/?id= query or a content hash in the file name) never
+change, so they are served for as long as they are cached; other assets are
+refetched after Config.ASSET_CACHE_MAX_AGE_HOURS. The store is trimmed back
+under Config.ASSET_CACHE_MAX_MB by evicting the least recently used URLs.
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import hashlib
+import json
+import re
+import sqlite3
+
+from .config import Config
+
+
+# URLs routed through the cache (everything else never touches Python)
+STATIC_URL = re.compile(r'\.(?:js|mjs|css|woff2?|ttf|otf|eot|svg|png|jpe?g|gif|webp|ico)(?:[?#]|$)', re.IGNORECASE)
+# Content that can't change under the same URL: a ?v= / ?ver= version, or a hex
+# digest (at least one letter, so numeric ids and dates don't count) in the
+# query string or the file name
+HEX_DIGEST = r'(?=[0-9a-f]*[a-f])[0-9a-f]{8,}'
+VERSIONED_URL = re.compile(
+    rf'[?&](?:v|ver)=[^&#]+|[?&][\w-]+={HEX_DIGEST}(?:[&#]|$)|[.-]{HEX_DIGEST}\.\w+(?:[?#]|$)',
+    re.IGNORECASE
+)
+# Response headers replayed with a cached body (the body is stored decoded)
+KEEP_HEADERS = ('content-type', 'cache-control', 'etag', 'last-modified', 'access-control-allow-origin')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    headers TEXT NOT NULL,          -- JSON of KEEP_HEADERS
+    stored_at TEXT NOT NULL,
+    last_used TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_assets_last_used ON assets (last_used);
+CREATE INDEX IF NOT EXISTS idx_assets_sha256 ON assets (sha256);
+"""
+
+
+class AssetCache:
+    """Serves static assets of a browser context from a local store"""
+
+    def __init__(self, directory: Path = None, max_mb: int = None, max_age_hours: int = None):
+        self.directory = Path(directory or Config.ASSET_CACHE_DIR)
+        self.objects = self.directory / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = (max_mb or Config.ASSET_CACHE_MAX_MB) * 1024 * 1024
+        self.max_age = timedelta(hours=max_age_hours or Config.ASSET_CACHE_MAX_AGE_HOURS)
+        self.conn = sqlite3.connect(self.directory / 'index.db', timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self._used = {}  # url -> hits this session, written back in close()
+
+    def attach(self, context):
+        """Route the context's static-asset requests through the cache"""
+        context.route(STATIC_URL, self._handle)
+        return self
+
+    def _handle(self, route, request):
+        if request.method != 'GET':
+            route.fallback()
+            return
+
+        cached = self._lookup(request.url)
+        if cached is not None:
+            headers, body = cached
+            self.hits += 1
+            self.bytes_served += len(body)
+            self._used[request.url] = self._used.get(request.url, 0) + 1
+            route.fulfill(status=200, headers=headers, body=body)
+            return
+
+        self.misses += 1
+        try:
+            response = route.fetch()
+            body = response.body()
+        except Exception:
+            # Let the browser make (and report) the request itself
+            route.fallback()
+            return
+        route.fulfill(response=response, body=body)
+        if response.status == 200 and 'no-store' not in response.headers.get('cache-control', ''):
+            self._store(request.url, response.headers, body)
+
+    def _lookup(self, url):
+        row = self.conn.execute('SELECT sha256, headers, stored_at FROM assets WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        if not VERSIONED_URL.search(url) and datetime.now() - datetime.fromisoformat(row['stored_at']) > self.max_age:
+            return None
+        try:
+            body = self._object_path(row['sha256']).read_bytes()
+        except OSError:
+            return None  # Evicted by another worker meanwhile
+        return json.loads(row['headers']), body
+
+    def _store(self, url, headers, body):
+        sha256 = hashlib.sha256(body).hexdigest()
+        path = self._object_path(sha256)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            tmp.write_bytes(body)
+            tmp.replace(path)
+        kept = {name: value for name, value in headers.items() if name.lower() in KEEP_HEADERS}
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO assets (url, sha256, size, headers, stored_at, last_used) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (url) DO UPDATE SET sha256 = excluded.sha256, size = excluded.size, '
+                'headers = excluded.headers, stored_at = excluded.stored_at, last_used = excluded.last_used',
+                (url, sha256, len(body), json.dumps(kept), now, now)
+            )
+        self._evict()
+
+    def _object_path(self, sha256):
+        return self.objects / sha256[:2] / sha256
+
+    def size(self):
+        """Bytes stored (identical bodies under several URLs count once)"""
+        row = self.conn.execute(
+            'SELECT COALESCE(SUM(size), 0) AS total FROM (SELECT DISTINCT sha256, size FROM assets)'
+        ).fetchone()
+        return row['total']
+
+    def _evict(self):
+        """Drop least recently used URLs until the store is back under 90% of its limit"""
+        total = self.size()
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for row in self.conn.execute('SELECT url, sha256 FROM assets ORDER BY last_used, stored_at').fetchall():
+            if total <= target:
+                break
+            with self.conn:
+                self.conn.execute('DELETE FROM assets WHERE url = ?', (row['url'],))
+            still_used = self.conn.execute('SELECT 1 FROM assets WHERE sha256 = ? LIMIT 1', (row['sha256'],)).fetchone()
+            if still_used is None:
+                path = self._object_path(row['sha256'])
+                if path.exists():
+                    total -= path.stat().st_size
+                    path.unlink()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def print_summary(self):
+        if self.hits or self.misses:
+            print(f"🗄️  Asset cache: {self.hits}/{self.hits + self.misses} served locally "
+                  f"({self.hit_rate():.0%}), {self.bytes_served / (1024 * 1024):.1f} MB not downloaded; "
+                  f"store {self.size() / (1024 * 1024):.1f} of {self.max_bytes / (1024 * 1024):.0f} MB")
+
+    def close(self):
+        """Record this session's hits (for LRU eviction) and close the index"""
+        if self._used:
+            now = datetime.now().isoformat(timespec='seconds')
+            with self.conn:
+                self.conn.executemany(
+                    'UPDATE assets SET hits = hits + ?, last_used = ? WHERE url = ?',
+                    [(count, now, url) for url, count in self._used.items()]
+                )
+            self._used = {}
+        self.conn.close()
@@ -1,22 +1,93 @@
 from playwright.sync_api import sync_playwright, Page
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
+import json
 import time
 
+from .analytics import AnalyticsRange, analytics_row_from_cells, analytics_window, as_date
+from .analytics_cache import AnalyticsCache
+from .asset_cache import AssetCache
 from .config import Config
+from .failure_traces import failure_trace
+from .flows import Flow, FlowRunner
+from .manifest import SnapshotManifest
+from .metrics import span, timed
+from .network import waterfall
+from .order_details import fetch_order_details
+from .orders_store import OrdersStore, is_not_available, order_columns, order_from_cells
+from .selector_cache import SelectorCache
+
+
+# Cell texts of every row of a table, read in the page (no HTML round-trip)
+TABLE_ROWS_JS = """(tableId) => Array.from(document.querySelectorAll(`#${tableId} tbody tr`)).map(
+    tr => Array.from(tr.querySelectorAll('td')).map(td => td.textContent.replace(/\\s+/g, ' ').trim()))"""
+# Header labels of a table, to map row cells to fields by label
+TABLE_HEADERS_JS = """(tableId) => Array.from(document.querySelectorAll(`#${tableId} thead th`)).map(
+    th => th.textContent.replace(/\\s+/g, ' ').trim())"""
+
+# Table reloads: current rows are marked stale, the reload is done once none are left
+MARK_STALE_JS = """(tableId) => document.querySelectorAll(`#${tableId} tbody tr`).forEach(
+    tr => tr.setAttribute('data-stale', ''))"""
+TABLE_RELOADED_JS = """(tableId) => {
+    const processing = document.getElementById(`${tableId}_processing`);
+    const busy = processing && getComputedStyle(processing).display !== 'none';
+    return !busy && document.querySelector(`#${tableId} tbody tr`) !== null
+        && document.querySelector(`#${tableId} tbody tr[data-stale]`) === null;
+}"""
+
+# Write a date range into the analytics filter and submit it (no calendar clicks)
+SET_DATERANGE_JS = """([value, start, end]) => {
+    const input = document.querySelector('#daterange');
+    if (!input) return false;
+    const picker = window.jQuery && window.jQuery(input).data('daterangepicker');
+    if (picker) {
+        picker.setStartDate(start);
+        picker.setEndDate(end);
+    }
+    input.value = value;
+    input.dispatchEvent(new Event('change', {bubbles: true}));
+    const form = input.closest('form');
+    if (!form) return false;
+    form.requestSubmit();
+    return true;
+}"""
 
 
 class CODPartnerAutomation:
     """Automate CODPARTNER website tasks"""
     
-    def __init__(self, config: Config = None):
+    HAR_MODES = ('', 'record', 'replay')
+    
+    def __init__(self, config: Config = None, har_mode: str = None, har_file: Path = None):
+        """
+        Args:
+            config: Config to use (default: Config())
+            har_mode: 'record' to save the session's network traffic to a HAR file,
+                      'replay' to serve every request from it with no network
+                      (default: Config.HAR_MODE)
+            har_file: HAR file to record to / replay from (default: Config.HAR_FILE)
+        """
         self.config = config or Config()
         self.config.validate()
+        self.har_mode = self.config.HAR_MODE if har_mode is None else har_mode
+        self.har_file = Path(har_file or self.config.HAR_FILE)
+        if self.har_mode not in self.HAR_MODES:
+            raise ValueError(f"Unknown HAR mode '{self.har_mode}' (use 'record' or 'replay')")
         self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
+        self._selectors = None
+        self.asset_cache = None
+    
+    @property
+    def selectors(self):
+        """SelectorCache for this bot (opened on first use, in the thread that uses it)"""
+        if self._selectors is None:
+            self._selectors = SelectorCache(self.config.DOWNLOAD_DIR)
+        return self._selectors
     
+    @timed('bot.browser_start')
     def start(self):
         """Initialize Playwright and browser"""
         print("🚀 Starting browser...")
@@ -25,12 +96,53 @@ class CODPartnerAutomation:
             headless=not self.config.SHOW_BROWSER,
             args=['--disable-blink-features=AutomationControlled']
         )
-        self.context = self.browser.new_context(
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
+        context_options = {
+            'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        }
+        if self.har_mode == 'record':
+            # Written when the context closes, then merged into har_file (stop())
+            self.har_file.parent.mkdir(parents=True, exist_ok=True)
+            context_options['record_har_path'] = str(self._har_recording())
+            context_options['record_har_mode'] = 'full'
+        self.context = self.browser.new_context(**context_options)
+        
+        if self.har_mode == 'record':
+            print(f"🎬 Recording network traffic to {self.har_file}")
+            print("   ⚠️  The HAR holds your login and session cookies - keep it private")
+        elif self.har_mode == 'replay':
+            if not self.har_file.exists():
+                raise FileNotFoundError(f"No HAR recording at {self.har_file} (record one with CODPARTNER_HAR_MODE=record)")
+            # Requests missing from the recording fail instead of reaching the network
+            self.context.route_from_har(self.har_file, not_found='abort')
+            print(f"📼 Replaying network traffic from {self.har_file} (offline)")
+        
+        self._attach_asset_cache()
         self.page = self.context.new_page()
         print("✅ Browser started")
     
+    def attach(self, context, page):
+        """Use an existing context/page (e.g. one leased from a PagePool) instead of start()"""
+        self.context = context
+        self.page = page
+        self._attach_asset_cache()
+        return self
+    
+    def _attach_asset_cache(self):
+        # HAR sessions must see (or replay) the real traffic
+        if self.config.ASSET_CACHE and not self.har_mode:
+            self.asset_cache = AssetCache().attach(self.context)
+    
+    def release(self):
+        """Report and close the bot's caches (attached bots: call once the context is closed)"""
+        if self._selectors:
+            self._selectors.print_summary()
+            self._selectors.close()
+            self._selectors = None
+        if self.asset_cache:
+            self.asset_cache.print_summary()
+            self.asset_cache.close()
+            self.asset_cache = None
+    
     def stop(self):
         """Close browser and cleanup"""
         try:
@@ -38,6 +150,9 @@ class CODPartnerAutomation:
                 self.page.close()
             if self.context:
                 self.context.close()
+                if self.har_mode == 'record':
+                    self._save_har_recording()
+            self.release()
             if self.browser:
                 self.browser.close()
             if self.playwright:
@@ -46,6 +161,36 @@ class CODPartnerAutomation:
         except Exception as e:
             print(f"⚠️  Error closing browser: {e}")
     
+    def _har_recording(self):
+        return self.har_file.with_suffix('.recording.har')
+    
+    def _save_har_recording(self):
+        """
+        Add this session's traffic to the HAR file
+        
+        A run opens several sessions (inventory, then orders), so recordings are
+        merged, newest first so they win when a request was recorded twice.
+        Delete the HAR file to start a fresh recording.
+        """
+        recording = self._har_recording()
+        if not recording.exists():
+            return
+        if self.har_file.exists():
+            with open(recording, 'r', encoding='utf-8') as f:
+                har = json.load(f)
+            with open(self.har_file, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            har['log']['pages'] = har['log'].get('pages', []) + previous['log'].get('pages', [])
+            har['log']['entries'] = har['log']['entries'] + previous['log']['entries']
+            with open(self.har_file, 'w', encoding='utf-8') as f:
+                json.dump(har, f)
+            recording.unlink()
+        else:
+            recording.replace(self.har_file)
+        print(f"🎬 Network traffic saved to {self.har_file}")
+    
+    @timed('bot.login')
+    @failure_trace('login')
     def login(self):
         """Login to CODPARTNER"""
         print(f"🔐 Logging in to {self.config.LOGIN_URL}")
@@ -66,7 +211,7 @@ class CODPartnerAutomation:
             # Click login button - try multiple selectors
             print("🖱️  Clicking login button...")
             
-            # Try to find and click the login button
+            # Try to find and click the login button (the one that worked last time first)
             login_clicked = False
             selectors_to_try = [
                 'button:has-text("Log In")',
@@ -75,15 +220,14 @@ class CODPartnerAutomation:
                 '//button[contains(text(), "Log In")]'
             ]
             
-            for selector in selectors_to_try:
+            selector = self.selectors.resolve(self.page, 'login', 'login_button', selectors_to_try)
+            if selector:
                 try:
-                    if self.page.locator(selector).count() > 0:
-                        self.page.click(selector)
-                        login_clicked = True
-                        print(f"✅ Clicked login button using: {selector}")
-                        break
-                except:
-                    continue
+                    self.page.click(selector)
+                    login_clicked = True
+                    print(f"✅ Clicked login button using: {selector}")
+                except Exception as e:
+                    print(f"⚠️  Could not click {selector}: {e}")
             
             if not login_clicked:
                 print("⚠️  Could not click login button, trying Enter key...")
@@ -105,6 +249,9 @@ class CODPartnerAutomation:
             print(f"❌ Login failed: {e}")
             raise
     
+    @timed('bot.download_inventory')
+    @waterfall('inventory')
+    @failure_trace('inventory')
     def download_inventory(self, filename: str = None):
         """Download inventory page with all entries visible"""
         print(f"📦 Downloading inventory from {self.config.INVENTORY_URL}")
@@ -112,35 +259,15 @@ class CODPartnerAutomation:
         try:
             # Navigate to inventory page
             self.page.goto(self.config.INVENTORY_URL, wait_until='domcontentloaded')
-            time.sleep(2)
-            self.page.wait_for_load_state('networkidle', timeout=self.config.TIMEOUT)
+            self.page.wait_for_selector('#inventory tbody tr', timeout=self.config.TIMEOUT)
             
-            # Click on "Show entries" dropdown and select 100
+            # Select "Show entries" 100 and wait for the table to reload with them
             print(f"⚙️  Setting to show {self.config.ENTRIES_TO_SHOW} entries")
             try:
-                # Wait for the dropdown
-                self.page.wait_for_selector('select[name="inventory_length"]', timeout=5000)
-                
-                # Select 100 entries
-                self.page.select_option('select[name="inventory_length"]', 
-                                       str(self.config.ENTRIES_TO_SHOW))
-                
-                print("⏳ Waiting 30 seconds for table to fully load...")
-                
-                # Wait for processing indicator to disappear
-                try:
-                    # Wait for "Processing..." to appear then disappear
-                    self.page.wait_for_selector('#inventory_processing[style*="display: block"]', timeout=3000)
-                    print("   Loading data...")
-                    self.page.wait_for_selector('#inventory_processing[style*="display: none"]', timeout=30000)
-                    print("   ✅ Data loaded")
-                except:
-                    print("   No processing indicator found, continuing...")
-                
-                # Additional wait to ensure all data is rendered
-                time.sleep(5)
-                self.page.wait_for_load_state('networkidle', timeout=self.config.TIMEOUT)
-                
+                with span('bot.table_wait', table='inventory'):
+                    print("⏳ Waiting for table to fully load...")
+                    self._reload_table('inventory', lambda: self.page.select_option(
+                        'select[name="inventory_length"]', str(self.config.ENTRIES_TO_SHOW), timeout=5000))
                 print("✅ Table fully loaded with all entries")
                 
             except Exception as e:
@@ -155,22 +282,15 @@ class CODPartnerAutomation:
                     today = 'OCT' + today[3:]
                 filename = f"Inventory - {today}.html"
             
-            # Get full page HTML
-            print("💾 Capturing page content...")
-            html_content = self.page.content()
-            
-            # Save to file
-            filepath = self.config.DOWNLOAD_DIR / filename
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            
-            print(f"💾 Saved to: {filepath}")
-            return filepath
+            return self._save_capture('inventory', filename)
             
         except Exception as e:
             print(f"❌ Download failed: {e}")
             raise
     
+    @timed('bot.download_orders')
+    @waterfall('orders')
+    @failure_trace('orders')
     def download_orders(self, filename: str = None):
         """Download orders page and return filtered orders with 'Not Available' shipping status"""
         print(f"📦 Downloading orders from {self.config.ORDERS_URL}")
@@ -178,34 +298,15 @@ class CODPartnerAutomation:
         try:
             # Navigate to orders page
             self.page.goto(self.config.ORDERS_URL, wait_until='domcontentloaded')
-            time.sleep(2)
-            self.page.wait_for_load_state('networkidle', timeout=self.config.TIMEOUT)
+            self.page.wait_for_selector('#orders tbody tr', timeout=self.config.TIMEOUT)
             
-            # Click on "Show entries" dropdown and select 100
+            # Select "Show entries" 100 and wait for the table to reload with them
             print(f"⚙️  Setting to show {self.config.ENTRIES_TO_SHOW} entries")
             try:
-                # Wait for the dropdown (assuming similar structure to inventory)
-                self.page.wait_for_selector('select[name="orders_length"]', timeout=5000)
-                
-                # Select 100 entries
-                self.page.select_option('select[name="orders_length"]', 
-                                       str(self.config.ENTRIES_TO_SHOW))
-                
-                print("⏳ Waiting 30 seconds for table to fully load...")
-                
-                # Wait for processing indicator to disappear
-                try:
-                    self.page.wait_for_selector('#orders_processing[style*="display: block"]', timeout=3000)
-                    print("   Loading data...")
-                    self.page.wait_for_selector('#orders_processing[style*="display: none"]', timeout=30000)
-                    print("   ✅ Data loaded")
-                except:
-                    print("   No processing indicator found, continuing...")
-                
-                # Additional wait to ensure all data is rendered
-                time.sleep(5)
-                self.page.wait_for_load_state('networkidle', timeout=self.config.TIMEOUT)
-                
+                with span('bot.table_wait', table='orders'):
+                    print("⏳ Waiting for table to fully load...")
+                    self._reload_table('orders', lambda: self.page.select_option(
+                        'select[name="orders_length"]', str(self.config.ENTRIES_TO_SHOW), timeout=5000))
                 print("✅ Table fully loaded with all entries")
                 
             except Exception as e:
@@ -219,22 +320,209 @@ class CODPartnerAutomation:
                     today = 'OCT' + today[3:]
                 filename = f"Orders - {today}.html"
             
-            # Get full page HTML
-            print("💾 Capturing page content...")
-            html_content = self.page.content()
-            
-            # Save to file
-            filepath = self.config.DOWNLOAD_DIR / filename
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            
-            print(f"💾 Saved to: {filepath}")
-            return filepath
+            return self._save_capture('orders', filename)
             
         except Exception as e:
             print(f"❌ Orders download failed: {e}")
             raise
     
+    @timed('bot.ingest_orders')
+    @waterfall('orders_ingest')
+    @failure_trace('orders_ingest')
+    def ingest_orders(self, max_pages: int = None):
+        """
+        Add new orders to the local orders store (incremental orders mode)
+        
+        Reads the orders table newest first, page by page, and stops at the
+        first page that reaches both the orders already ingested (the
+        watermark) and the oldest order of the last ORDERS_REFRESH_DAYS days.
+        Orders on the pages read are upserted by reference, so recent orders
+        get their shipping status refreshed every run. Older Not Available
+        orders are re-checked on their detail pages instead, so the pages read
+        never depend on how long one order has been stuck.
+        
+        The watermark only moves once the run has reached it; a run cut short
+        by max_pages leaves it, so the orders it did not get to are read next run.
+        
+        Args:
+            max_pages: Most table pages to read (default: Config.ORDERS_MAX_PAGES)
+        
+        Returns: dict with pages, rows, new and changed counts
+        """
+        max_pages = max_pages or self.config.ORDERS_MAX_PAGES
+        print(f"📦 Ingesting new orders from {self.config.ORDERS_URL}")
+        
+        with OrdersStore(self.config.DOWNLOAD_DIR) as store:
+            run_id = store.new_run('ingest')
+            watermark = store.watermark()
+            since = datetime.now() - timedelta(days=self.config.ORDERS_REFRESH_DAYS)
+            floor = store.refresh_floor(since)
+            # Read back far enough to re-read the recent orders, whose status can still change
+            stop_at = watermark if floor is None or watermark is None else min(watermark, floor)
+            if watermark is None:
+                print(f"   First run: reading up to {max_pages} pages of orders")
+            else:
+                print(f"   Already have orders up to #COD{watermark}")
+                if stop_at < watermark:
+                    print(f"   Re-reading recent orders back to #COD{stop_at}")
+            
+            self.page.goto(self.config.ORDERS_URL, wait_until='domcontentloaded')
+            self.page.wait_for_selector('#orders tbody tr', timeout=self.config.TIMEOUT)
+            try:
+                self.page.select_option('select[name="orders_length"]', str(self.config.ENTRIES_TO_SHOW),
+                                        timeout=5000)
+                self._wait_for_table('orders')
+            except Exception as e:
+                print(f"⚠️  Could not change entries display: {e}")
+            
+            columns = order_columns(self.page.evaluate(TABLE_HEADERS_JS, 'orders'))
+            totals = {'pages': 0, 'rows': 0, 'new': 0, 'changed': 0}
+            newest = None
+            reached = False
+            while totals['pages'] < max_pages:
+                with span('bot.orders_page', page=totals['pages'] + 1) as s:
+                    cells = self.page.evaluate(TABLE_ROWS_JS, 'orders')
+                    orders = [o for o in (order_from_cells(row, columns) for row in cells) if o]
+                    new, changed = store.upsert(orders, run_id=run_id)
+                    s.rows = len(orders)
+                totals['pages'] += 1
+                totals['rows'] += len(orders)
+                totals['new'] += new
+                totals['changed'] += changed
+                if orders and (newest is None or orders[0]['order_number'] > newest['order_number']):
+                    newest = orders[0]
+                print(f"   Page {totals['pages']}: {len(orders)} orders, {new} new")
+                
+                if stop_at is not None and any(o['order_number'] <= stop_at for o in orders):
+                    reached = True
+                    break
+                if not orders or not self._next_table_page('orders'):
+                    reached = True  # Read to the end of the table
+                    break
+            
+            # A first run is bounded by max_pages by design; later runs must close the gap first
+            if newest and (reached or watermark is None):
+                store.advance_watermark(newest['order_number'], newest['order_date'])
+            if not reached:
+                print(f"⚠️  Stopped after {max_pages} pages before reaching known and recent orders; "
+                      + ("older orders were not read" if watermark is None else
+                         f"the watermark stays at #COD{watermark} so the rest is read next run")
+                      + " (raise ORDERS_MAX_PAGES to read further)")
+            
+            # Not Available orders older than the pages read: check their detail pages
+            older = store.not_available_before(since, run_id)
+            if older:
+                totals['rechecked'], totals['resolved'] = self._recheck_orders(store, run_id, older)
+        
+        print(f"✅ Orders ingested: {totals['new']} new, {totals['changed']} status change(s) "
+              f"from {totals['rows']} rows on {totals['pages']} page(s)")
+        return totals
+    
+    def _recheck_orders(self, store, run_id, references):
+        """
+        Refresh the shipping status of orders from their detail pages
+        
+        Returns: (orders re-checked, orders no longer Not Available)
+        """
+        print(f"🔍 Re-checking {len(references)} older Not Available order(s) on their detail pages")
+        with span('bot.orders_recheck', orders=len(references)) as s:
+            details, errors = fetch_order_details(
+                references, self.context.cookies(), base_url=self.config.BASE_URL,
+                user_agent=self.page.evaluate('navigator.userAgent'),
+                workers=self.config.ORDER_DETAILS_WORKERS, timeout=self.config.ORDER_DETAILS_TIMEOUT
+            )
+            statuses = {r: fields['shipping_status'] for r, fields in details.items() if fields.get('shipping_status')}
+            orders = [{**order, 'shipping_status': statuses[order['reference']]}
+                      for order in store.orders(statuses)]
+            store.upsert(orders, run_id=run_id)
+            store.save_details(details)
+            s.rows = len(orders)
+        resolved = sum(1 for order in orders if not is_not_available(order['shipping_status']))
+        missed = len(references) - len(orders)
+        print(f"   {len(orders)} re-checked, {resolved} no longer Not Available"
+              + (f", {missed} could not be checked (left stale)" if missed else ""))
+        return len(orders), resolved
+    
+    @timed('bot.enrich_orders')
+    def enrich_orders(self, references=None):
+        """
+        Fetch product, customer city and notes of flagged orders from their detail pages
+        
+        Orders already enriched (in the orders store) are not fetched again;
+        the rest are fetched concurrently over this bot's logged-in session.
+        
+        Args:
+            references: Orders to enrich (default: the Not Available orders in
+                        the orders table on the page and in the orders store)
+        
+        Returns: dict with enriched, cached and failed counts
+        """
+        with OrdersStore(self.config.DOWNLOAD_DIR) as store:
+            if references is None:
+                references = [o['reference'] for o in store.not_available()]
+                if self.page.locator('#orders tbody tr').count():
+                    columns = order_columns(self.page.evaluate(TABLE_HEADERS_JS, 'orders'))
+                    cells = self.page.evaluate(TABLE_ROWS_JS, 'orders')
+                    references += [
+                        o['reference'] for o in (order_from_cells(row, columns) for row in cells)
+                        if o and is_not_available(o['shipping_status'])
+                    ]
+            references = list(dict.fromkeys(references))
+            cached = store.details(references)
+            missing = [r for r in references if r not in cached]
+            print(f"🔍 Order details: {len(cached)} cached, fetching {len(missing)}")
+            
+            details, errors = {}, {}
+            if missing:
+                with span('bot.order_details', orders=len(missing)) as s:
+                    details, errors = fetch_order_details(
+                        missing, self.context.cookies(), base_url=self.config.BASE_URL,
+                        user_agent=self.page.evaluate('navigator.userAgent'),
+                        workers=self.config.ORDER_DETAILS_WORKERS, timeout=self.config.ORDER_DETAILS_TIMEOUT
+                    )
+                    s.rows = len(details)
+                store.save_details(details)
+        
+        for reference, error in list(errors.items())[:5]:
+            print(f"   ⚠️  {reference}: {error}")
+        print(f"✅ Enriched {len(details)} order(s)" + (f", {len(errors)} failed" if errors else ""))
+        return {'enriched': len(details), 'cached': len(cached), 'failed': len(errors)}
+    
+    def _wait_for_table(self, table_id):
+        """Wait for a DataTables table's "Processing..." indicator to show and go away"""
+        try:
+            self.page.wait_for_selector(f'#{table_id}_processing[style*="display: block"]', timeout=3000)
+        except Exception:
+            return  # Already loaded (or no indicator)
+        self.page.wait_for_selector(f'#{table_id}_processing[style*="display: none"]', timeout=self.config.TIMEOUT)
+    
+    def _reload_table(self, table_id, action):
+        """Run an action that reloads a table on self.page, then wait until its new rows are in"""
+        self.page.evaluate(MARK_STALE_JS, table_id)
+        action()
+        self.page.wait_for_function(TABLE_RELOADED_JS, arg=table_id, timeout=self.config.TIMEOUT)
+    
+    def _next_table_page(self, table_id):
+        """Go to the next page of a DataTables table; False on the last page"""
+        next_button = self.page.locator(f'#{table_id}_next:not(.disabled)')
+        if next_button.count() == 0:
+            return False
+        first_row = self.page.locator(f'#{table_id} tbody tr').first.inner_text()
+        next_button.click()
+        self._wait_for_table(table_id)
+        # The page has changed once the first row has
+        self.page.wait_for_function(
+            """([tableId, previous]) => {
+                const row = document.querySelector(`#${tableId} tbody tr`);
+                return row && row.innerText !== previous;
+            }""",
+            arg=[table_id, first_row], timeout=self.config.TIMEOUT
+        )
+        return True
+    
+    @timed('bot.download_analytics')
+    @waterfall('analytics')
+    @failure_trace('analytics')
     def download_analytics(self, country="Saudi arabia", filename: str = None):
         """Download product analytics for specified country with date range filter"""
         print(f"📊 Downloading analytics from {self.config.ANALYTICS_URL}")
@@ -242,28 +530,16 @@ class CODPartnerAutomation:
         try:
             # Navigate to analytics page
             self.page.goto(self.config.ANALYTICS_URL, wait_until='domcontentloaded')
-            time.sleep(3)
-            self.page.wait_for_load_state('networkidle', timeout=self.config.TIMEOUT)
+            self.page.wait_for_selector('#products tbody tr', timeout=self.config.TIMEOUT)
             
             # Click on country button
             print(f"🇸🇦 Selecting {country}...")
             try:
-                # Click on the country button (e.g., "Saudi arabia")
-                self.page.click(f'text="{country}"')
-                print(f"✅ Clicked {country}")
-                
-                # Wait for processing to complete
-                print("⏳ Waiting for data processing...")
-                time.sleep(3)
-                
-                # Wait for processing overlay to disappear
-                try:
-                    self.page.wait_for_selector('text="Processing..."', state='hidden', timeout=10000)
-                    print("   ✅ Processing complete")
-                except:
-                    print("   No processing indicator found, continuing...")
-                
-                time.sleep(2)
+                # Click on the country button (e.g., "Saudi arabia") and wait for the table to reload
+                with span('bot.table_wait', table='products'):
+                    self._reload_table('products', lambda: self.page.click(
+                        f'text="{country}"', timeout=self.config.TIMEOUT))
+                print(f"✅ Selected {country}")
                 
             except Exception as e:
                 print(f"⚠️  Error selecting country: {e}")
@@ -272,39 +548,17 @@ class CODPartnerAutomation:
             # Change to show 100 entries
             print(f"⚙️  Setting to show {self.config.ENTRIES_TO_SHOW} entries")
             try:
-                # Wait for the dropdown - analytics page uses different name
-                # Try multiple possible selectors
-                dropdown_found = False
-                for selector in ['select[name="products_length"]', 'select']:
-                    try:
-                        self.page.wait_for_selector(selector, timeout=5000)
-                        dropdown_found = True
-                        break
-                    except:
-                        continue
+                # Analytics page uses a different dropdown name; try multiple possible selectors
+                selector = self.selectors.resolve(
+                    self.page, 'analytics', 'entries_dropdown',
+                    ['select[name="products_length"]', 'select']
+                )
                 
-                if dropdown_found:
-                    # Select 100 entries
-                    self.page.select_option(selector, str(self.config.ENTRIES_TO_SHOW))
-                    
-                    print("⏳ Waiting 30 seconds for table to fully load...")
-                    
-                    # Wait for processing indicator to disappear (similar to inventory)
-                    try:
-                        # Wait for "Processing..." to appear then disappear
-                        self.page.wait_for_selector('#products_processing[style*="display: block"]', timeout=3000)
-                        print("   Loading data...")
-                        self.page.wait_for_selector('#products_processing[style*="display: none"]', timeout=30000)
-                        print("   ✅ Data loaded")
-                    except:
-                        print("   No processing indicator found, waiting anyway...")
-                        # Even without indicator, wait for the data to load
-                        time.sleep(10)
-                    
-                    # Additional wait to ensure all data is rendered
-                    time.sleep(5)
-                    self.page.wait_for_load_state('networkidle', timeout=self.config.TIMEOUT)
-                    
+                if selector:
+                    with span('bot.table_wait', table='products'):
+                        print("⏳ Waiting for table to fully load...")
+                        self._reload_table('products', lambda: self.page.select_option(
+                            selector, str(self.config.ENTRIES_TO_SHOW)))
                     print("✅ Table fully loaded with all entries")
                 else:
                     print("⚠️  Could not find entries dropdown")
@@ -313,136 +567,18 @@ class CODPartnerAutomation:
                 print(f"⚠️  Could not change entries display: {e}")
                 print("   Continuing with default view...")
             
-            # Set date range: 20 days ago to 10 days ago
-            print("📅 Setting date range (20 days ago to 10 days ago)...")
-            try:
-                from datetime import timedelta
-                
-                # Calculate dates
-                today = datetime.now()
-                start_date = today - timedelta(days=20)
-                end_date = today - timedelta(days=10)
-                
-                print(f"   Start: {start_date.strftime('%Y-%m-%d')} | End: {end_date.strftime('%Y-%m-%d')}")
-                
-                # Step 1: Click on the Filter button to open filter dialog
-                print("   Step 1: Opening filter dialog...")
-                self.page.click('button:has-text("Filter")', timeout=5000)
-                time.sleep(2)
-                print("   ✅ Filter dialog opened")
-                
-                # Step 2: Click on the daterange input inside the filter dialog
-                print("   Step 2: Clicking daterange input...")
-                self.page.click('input#daterange', timeout=5000)
-                time.sleep(1)
-                print("   ✅ Date dropdown opened")
-                
-                # Step 3: Click "Custom Range" directly
-                print("   Step 3: Clicking 'Custom Range'...")
-                self.page.click('text="Custom Range"', timeout=5000)
-                time.sleep(2)
-                print("   ✅ Custom range calendar opened")
-                
-                # Step 4: Select start date by clicking on the calendar
-                print(f"   Step 4: Selecting start date (day {start_date.day} in {start_date.strftime('%b')})...")
-                try:
-                    # Click the specific day in the calendar
-                    # Find calendar cells that aren't disabled and match our day
-                    self.page.evaluate(f"""
-                        () => {{
-                            // Find all calendar cells
-                            const cells = document.querySelectorAll('td.available');
-                            for (let cell of cells) {{
-                                if (cell.textContent.trim() === '{start_date.day}' && 
-                                    !cell.classList.contains('off')) {{
-                                    cell.click();
-                                    return true;
-                                }}
-                            }}
-                            return false;
-                        }}
-                    """)
-                    time.sleep(0.5)
-                    print(f"   ✅ Selected start date: {start_date.strftime('%Y-%m-%d')}")
-                except Exception as e:
-                    print(f"   ⚠️  Could not click start date: {e}")
-                
-                # Step 5: Select end date by clicking on the calendar
-                print(f"   Step 5: Selecting end date (day {end_date.day} in {end_date.strftime('%b')})...")
-                try:
-                    # Click the specific day in the calendar for end date
-                    # Need to find the second occurrence if different month
-                    self.page.evaluate(f"""
-                        () => {{
-                            // Find all calendar cells
-                            const cells = document.querySelectorAll('td.available');
-                            let found = false;
-                            for (let cell of cells) {{
-                                if (cell.textContent.trim() === '{end_date.day}' && 
-                                    !cell.classList.contains('off')) {{
-                                    // If same month as start date, skip first occurrence
-                                    if ({start_date.month} !== {end_date.month} || found) {{
-                                        cell.click();
-                                        return true;
-                                    }}
-                                    found = true;
-                                }}
-                            }}
-                            return false;
-                        }}
-                    """)
-                    time.sleep(0.5)
-                    print(f"   ✅ Selected end date: {end_date.strftime('%Y-%m-%d')}")
-                except Exception as e:
-                    print(f"   ⚠️  Could not click end date: {e}")
-                
-                # Step 6: Click first "Apply" button (in date picker)
-                print("   Step 6: Clicking first 'Apply' button...")
-                try:
-                    # Find and click the Apply button in the date picker popup
-                    apply_buttons = self.page.query_selector_all('button:has-text("Apply")')
-                    if len(apply_buttons) > 0:
-                        apply_buttons[0].click()
-                        time.sleep(2)
-                        print("   ✅ Clicked Apply in date picker")
-                except Exception as e:
-                    print(f"   ⚠️  Could not click first Apply: {e}")
-                
-                # Step 7: Try to click second "Apply" button if it exists (optional)
-                print("   Step 7: Checking for second 'Apply' button...")
-                try:
-                    # Wait a moment for the filter dialog
-                    time.sleep(1)
-                    # Try to find and click the main Apply button if still visible
-                    apply_buttons = self.page.query_selector_all('button:has-text("Apply")')
-                    if len(apply_buttons) > 0:
-                        # Check if button is visible
-                        if apply_buttons[-1].is_visible():
-                            apply_buttons[-1].click()
-                            time.sleep(2)
-                            print("   ✅ Clicked Apply in filter dialog")
-                        else:
-                            print("   ℹ️  Second Apply not visible (filter already applied)")
-                    else:
-                        print("   ℹ️  No second Apply button found (filter already applied)")
-                except Exception as e:
-                    print(f"   ℹ️  Filter already applied: {e}")
-                
-                # Wait for processing after date change
-                print("   ⏳ Waiting for data to reload with new date range...")
-                time.sleep(5)
-                
-                try:
-                    self.page.wait_for_selector('text="Processing..."', state='hidden', timeout=15000)
-                    print("   ✅ Data reloaded with new date range")
-                except:
-                    print("   Continuing...")
-                
-                time.sleep(3)
-                self.page.wait_for_load_state('networkidle', timeout=self.config.TIMEOUT)
-                
-            except Exception as e:
-                print(f"⚠️  Could not set date range: {e}")
+            # Set date range: the analytics window (20 days ago to 10 days ago by default),
+            # written straight into #daterange rather than clicked in the calendar
+            start_date, end_date = analytics_window()
+            window = AnalyticsRange(country, start_date, end_date)
+            print(f"📅 Setting date range ({self.config.ANALYTICS_WINDOW_START_DAYS} days ago "
+                  f"to {self.config.ANALYTICS_WINDOW_END_DAYS} days ago): {window.daterange}")
+            with span('bot.table_wait', table='products'):
+                self._table_step({window: self.page}, 'products', self._set_daterange)
+            if window.ok:
+                print("   ✅ Data reloaded with new date range")
+            else:
+                print(f"⚠️  Could not set date range: {window.error}")
                 print("   Continuing with current date range...")
             
             # Generate filename if not provided
@@ -452,34 +588,197 @@ class CODPartnerAutomation:
                     today = 'OCT' + today[3:]
                 filename = f"Analytics_Products_Saudi_{today}.html"
             
-            # Get full page HTML
-            print("💾 Capturing page content...")
-            html_content = self.page.content()
+            return self._save_capture('analytics', filename)
             
+        except Exception as e:
+            print(f"❌ Analytics download failed: {e}")
+            raise
+    
+    def _save_capture(self, dataset, filename):
+        """Save the current page HTML, archive it and record it in the snapshot manifest"""
+        # Get full page HTML
+        print("💾 Capturing page content...")
+        captured_at = datetime.now()
+        with span('bot.page_content', dataset=dataset) as s:
+            html_content = self.page.content()
+            s.add_bytes(len(html_content))
+        
+        with span('bot.save_capture', dataset=dataset) as s:
             # Save to file
             filepath = self.config.DOWNLOAD_DIR / filename
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(html_content)
             
-            print(f"💾 Saved to: {filepath}")
-            return filepath
-            
-        except Exception as e:
-            print(f"❌ Analytics download failed: {e}")
-            raise
+            # Keep a compressed, table-only copy in the archive
+            with SnapshotManifest(self.config.DOWNLOAD_DIR) as manifest:
+                snapshot = manifest.capture(dataset, html_content, filename, captured_at=captured_at)
+            s.rows = snapshot.rows
+            s.add_file(filepath)
+        
+        print(f"💾 Saved to: {filepath}")
+        if snapshot.duplicate_of:
+            print("♻️  Unchanged since the last capture (archive entry reused)")
+        return filepath
+    
+    @timed('bot.run_flow')
+    def run_flow(self, flow, **variables):
+        """
+        Run a flow compiled from a recording (see automation/flows.py) on this page
+        
+        Args:
+            flow: Flow, or path to a flow JSON file
+            **variables: Extra {placeholder} values (username, password and
+                         base_url come from the config)
+        
+        Returns: list of (step, seconds)
+        """
+        if not isinstance(flow, Flow):
+            flow = Flow.load(flow)
+        values = {
+            'base_url': self.config.BASE_URL,
+            'username': self.config.USERNAME,
+            'password': self.config.PASSWORD,
+            **variables,
+        }
+        return FlowRunner(self.page, values, timeout=self.config.TIMEOUT).run(flow)
     
-    def download_with_date_range(self, start_date: str, end_date: str):
+    @timed('bot.download_with_date_range')
+    def download_with_date_range(self, ranges, country="Saudi arabia", pages: int = None):
         """
-        Download data with custom date range
-        Future implementation for Products/Orders pages
+        Fetch product analytics for several date ranges, a few pages at a time
+        
+        Each range gets its own page in this bot's (logged-in) context. The
+        pages of a batch go through the same steps together - open, pick the
+        country, show all entries, set the date range - so their table loads
+        overlap instead of running one after another. The date range is
+        written into #daterange and the filter form submitted, with no
+        calendar clicks.
+        
+        Args:
+            ranges: (start, end) pairs of dates or 'YYYY-MM-DD' strings
+            country: Country button to select
+            pages: Ranges fetched at the same time (default: Config.ANALYTICS_RANGE_PAGES)
+        
+        Returns: list of AnalyticsRange, in the order of ranges (failed ones have .error set)
+        """
+        pages = pages or self.config.ANALYTICS_RANGE_PAGES
+        results = [AnalyticsRange(country, start, end) for start, end in ranges]
+        print(f"📊 Fetching analytics for {len(results)} date range(s), {pages} at a time")
+        
+        for first in range(0, len(results), pages):
+            batch = results[first:first + pages]
+            with span('bot.analytics_ranges', ranges=len(batch)) as s:
+                self._fetch_analytics_batch(batch)
+                s.rows = sum(len(result.rows) for result in batch)
+            for result in batch:
+                if result.ok:
+                    print(f"   ✅ {result.daterange}: {len(result.rows)} products")
+                else:
+                    print(f"   ❌ {result.daterange}: {result.error}")
+        return results
+    
+    @timed('bot.analytics_window')
+    def analytics_window(self, country="Saudi arabia", start=None, end=None):
+        """
+        Product analytics for a date window, fetching only the days not cached yet
+        
+        Settled days (see AnalyticsCache) are fetched once, one range per day,
+        and kept; the window is summed from them. Days too recent to have
+        settled are fetched every time.
         
         Args:
-            start_date: Format 'YYYY-MM-DD'
-            end_date: Format 'YYYY-MM-DD'
+            country: Country button to select
+            start, end: Window (default: Config.ANALYTICS_WINDOW_START_DAYS to
+                        ANALYTICS_WINDOW_END_DAYS days ago)
+        
+        Returns: AnalyticsRange
         """
-        # TODO: Implement for Products/Orders Metrics pages
-        print("🚧 Custom date range feature coming soon...")
-        pass
+        default_start, default_end = analytics_window()
+        start = as_date(start) if start else default_start
+        end = as_date(end) if end else default_end
+        
+        with AnalyticsCache(self.config.DOWNLOAD_DIR) as cache:
+            result = cache.get_range(country, start, end)
+            if result:
+                print(f"♻️  Analytics {start} to {end} ({country}) already cached")
+                return result
+            
+            missing = cache.missing_days(country, start, end)
+            print(f"📊 Analytics {start} to {end} ({country}): "
+                  f"{(end - start).days + 1 - len(missing)} day(s) cached, fetching {len(missing)}")
+            fresh = self.download_with_date_range([(day, day) for day in missing], country=country) if missing else []
+            result = cache.assemble(country, start, end, fresh)
+            for day in fresh:
+                cache.put_day(day)
+            if result is None:
+                failed = [day for day in fresh if not day.ok]
+                raise RuntimeError(f"Analytics for {len(failed)} day(s) could not be fetched: {failed[0].error}")
+            cache.put_range(result)
+            cache.print_summary()
+        return result
+    
+    def _fetch_analytics_batch(self, batch):
+        """Run one batch of ranges on their own pages, step by step in lockstep"""
+        pages = {}
+        try:
+            for result in batch:
+                try:
+                    pages[result] = self.context.new_page()
+                    pages[result].goto(self.config.ANALYTICS_URL, wait_until='domcontentloaded')
+                except Exception as e:
+                    # Only this range fails; the rest of the batch goes on
+                    result.error = f"Could not open analytics page: {type(e).__name__}: {e}"
+            self._table_step(pages, 'products', None)
+            self._table_step(pages, 'products', lambda page, result: page.click(
+                f'text="{result.country}"', timeout=self.config.TIMEOUT))
+            self._table_step(pages, 'products', lambda page, result: page.select_option(
+                'select[name="products_length"]', str(self.config.ENTRIES_TO_SHOW), timeout=self.config.TIMEOUT))
+            self._table_step(pages, 'products', self._set_daterange)
+            for result, page in pages.items():
+                if not result.ok:
+                    continue
+                try:
+                    cells = page.evaluate(TABLE_ROWS_JS, 'products')
+                except Exception as e:
+                    result.error = f"Could not read table: {type(e).__name__}: {e}"
+                    continue
+                result.rows = [row for row in map(analytics_row_from_cells, cells) if row]
+                result.fetched_at = datetime.now()
+        finally:
+            for page in pages.values():
+                try:
+                    if not page.is_closed():
+                        page.close()
+                except Exception:
+                    pass
+    
+    def _table_step(self, pages, table_id, action):
+        """
+        Apply an action that reloads a table on every page, then wait for all reloads
+        
+        action(page, result) runs on each page before any wait, so the
+        dashboard works on all of them at once. A page whose action or wait
+        fails gets the error on its result and sits out the later steps.
+        """
+        for result, page in pages.items():
+            if not result.ok or action is None:
+                continue
+            try:
+                page.evaluate(MARK_STALE_JS, table_id)
+                action(page, result)
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+        for result, page in pages.items():
+            if not result.ok:
+                continue
+            try:
+                page.wait_for_function(TABLE_RELOADED_JS, arg=table_id, timeout=self.config.TIMEOUT)
+            except Exception as e:
+                result.error = f"Table did not load: {e}"
+    
+    def _set_daterange(self, page, result):
+        if not page.evaluate(SET_DATERANGE_JS, [result.daterange, str(result.start), str(result.end)]):
+            raise RuntimeError("No #daterange filter on the analytics page")
     
     def __enter__(self):
         """Context manager entry"""
@@ -9,11 +9,12 @@ class Config:
     """Configuration for CODPARTNER automation"""
     
     # Credentials
+    ACCOUNT = None  # Account name when running several seller accounts
     USERNAME = os.getenv('CODPARTNER_USERNAME', '')
     PASSWORD = os.getenv('CODPARTNER_PASSWORD', '')
     
-    # URLs
-    BASE_URL = 'https://app.codpartner.com'
+    # URLs (CODPARTNER_BASE_URL points the automation at another site, e.g. the benchmark mock)
+    BASE_URL = os.getenv('CODPARTNER_BASE_URL', 'https://app.codpartner.com').rstrip('/')
     LOGIN_URL = f'{BASE_URL}/login'
     INVENTORY_URL = f'{BASE_URL}/inventory'
     ORDERS_URL = f'{BASE_URL}/orders'
@@ -21,12 +22,84 @@ class Config:
     
     # Paths
     PROJECT_DIR = Path(__file__).parent.parent
-    DOWNLOAD_DIR = PROJECT_DIR
+    DOWNLOAD_DIR = Path(os.getenv('CODPARTNER_DATA_DIR', PROJECT_DIR))
+    ACCOUNTS_FILE = PROJECT_DIR / 'accounts.json'  # Optional list of seller accounts
+    ACCOUNTS_DIR = PROJECT_DIR / 'accounts'  # Per-account snapshots and reports
+    DATABASE_NAME = 'stock_data.db'  # SQLite file kept in DOWNLOAD_DIR (snapshot manifest, stores)
+    ARCHIVE_DIR_NAME = 'archive'  # Compressed captures, kept in DOWNLOAD_DIR
+    CUBE_DIR_NAME = 'cube'  # Memory-mapped products x days stock cube, kept in DOWNLOAD_DIR
     
     # Settings
     SHOW_BROWSER = False  # Headless mode (invisible browser)
-    ENTRIES_TO_SHOW = 100  # Number of entries per page
+    ENTRIES_TO_SHOW = int(os.getenv('CODPARTNER_ENTRIES_TO_SHOW', 100))  # Number of entries per page
     TIMEOUT = 30000  # 30 seconds
+    SELECTOR_TIMEOUT = 5000  # Wait for any candidate selector of a control (ms)
+    
+    # HAR record/replay (CODPARTNER_HAR_MODE=record on a real run, =replay to re-run it offline)
+    HAR_MODE = os.getenv('CODPARTNER_HAR_MODE', '')  # '', 'record' or 'replay'
+    HAR_FILE = Path(os.getenv('CODPARTNER_HAR_FILE', PROJECT_DIR / 'recordings' / 'codpartner.har'))
+    
+    # Static asset cache shared by all runs and accounts (off until measured; CODPARTNER_ASSET_CACHE=1 turns it on)
+    ASSET_CACHE = os.getenv('CODPARTNER_ASSET_CACHE', '') == '1'
+    ASSET_CACHE_DIR = Path(os.getenv('CODPARTNER_ASSET_CACHE_DIR', PROJECT_DIR / 'asset_cache'))
+    ASSET_CACHE_MAX_MB = 200  # Least recently used assets are evicted past this
+    ASSET_CACHE_MAX_AGE_HOURS = 24  # Unversioned assets are refetched after this
+    
+    # Orders: 'snapshot' saves the first page of the orders table, 'incremental' adds new orders to a local store
+    ORDERS_MODE = os.getenv('CODPARTNER_ORDERS_MODE', 'snapshot')
+    ORDERS_MAX_PAGES = 50  # Table pages an incremental run reads at most
+    ORDERS_REFRESH_DAYS = int(os.getenv('CODPARTNER_ORDERS_REFRESH_DAYS', 14))  # Orders this recent (and every Not Available one) are re-read each run
+    
+    # Order detail enrichment: product, city and notes of Not Available orders (CODPARTNER_ORDER_DETAILS=0 turns it off)
+    ORDER_DETAILS = os.getenv('CODPARTNER_ORDER_DETAILS', '1') != '0'
+    ORDER_DETAILS_WORKERS = 4  # Detail pages fetched at the same time
+    ORDER_DETAILS_TIMEOUT = 15  # Seconds per detail page request
+    
+    # Analytics window: from START to END days ago
+    ANALYTICS_WINDOW_START_DAYS = 20
+    ANALYTICS_WINDOW_END_DAYS = 10
+    # 'snapshot' saves the analytics page, 'cached' builds the window from cached settled days
+    ANALYTICS_MODE = os.getenv('CODPARTNER_ANALYTICS_MODE', 'snapshot')
+    ANALYTICS_SETTLED_DAYS = 10  # Days after which a day's analytics no longer change
+    ANALYTICS_RANGE_PAGES = 4  # Date ranges fetched at the same time, one page each
+    ANALYTICS_TREND_WINDOWS = 7  # Windows in the analytics store's rolling averages
+    
+    # Run metrics
+    METRICS_DIR_NAME = 'metrics'  # Per-run timing logs (JSONL), kept in DOWNLOAD_DIR
+    METRICS_KEEP_RUNS = 200  # Older run logs are deleted
+    PROMETHEUS_TEXTFILE = os.getenv('CODPARTNER_PROM_TEXTFILE')  # e.g. /var/lib/node_exporter/textfile/codpartner.prom
+    
+    # Network waterfall per download (CODPARTNER_NETWORK_WATERFALL=1)
+    NETWORK_WATERFALL = os.getenv('CODPARTNER_NETWORK_WATERFALL', '') == '1'
+    NETWORK_DIR_NAME = 'network'  # Saved waterfalls (JSON), kept in DOWNLOAD_DIR
+    NETWORK_SLOWEST = 10  # Requests listed in the slowest-request report
+    
+    # Failure-only traces (CODPARTNER_FAILURE_TRACES=1): a failed download step is re-run once
+    # with tracing on, and the trace kept if it fails again (steps that pass are never traced)
+    FAILURE_TRACES = os.getenv('CODPARTNER_FAILURE_TRACES', '') == '1'
+    FAILURE_TRACE_DIR_NAME = 'failure_traces'  # Traces of failed steps, kept in DOWNLOAD_DIR
+    FAILURE_TRACES_KEEP = 20  # Older failure traces are deleted
+    
+    # Profiling (--profile)
+    PROFILE_DIR_NAME = 'profiles'  # Per-run profiling reports, kept in DOWNLOAD_DIR
+    PROFILE_SAMPLE_INTERVAL = 0.005  # Seconds between stack samples (flamegraph data)
+    PROFILE_TRACE_FRAMES = 25  # Stack depth tracemalloc records per allocation
+    PROFILE_TOP = 40  # Entries per pstats / allocation report
+    
+    # Page pool (concurrent scrape jobs sharing one browser)
+    POOL_SIZE = 3  # Number of pages working in parallel
+    POOL_CDP_PORT = 9333  # Port the shared browser exposes to pool workers
+    POOL_RECYCLE_AFTER = 25  # Jobs a page may run before it is replaced
+    POOL_MAX_HEAP_MB = 512  # Replace a page whose JS heap grows past this
+    POOL_MIN_JOB_INTERVAL = 1.0  # Seconds between job starts (dashboard rate limit)
+    MAX_CONCURRENT_ACCOUNTS = 4  # Accounts processed at the same time
+    
+    # Archive retention
+    ARCHIVE_KEEP_ALL_DAYS = 30  # Keep every snapshot this recent
+    ARCHIVE_KEEP_WEEKLY_DAYS = 365  # Then one per week up to this age, one per month after
+    
+    # Inventory ledger
+    LEDGER_KEYFRAME_EVERY = 30  # Store a full stock table every N snapshots, changes only in between
     
     @classmethod
     def validate(cls):
@@ -37,3 +110,27 @@ class Config:
                 "CODPARTNER_USERNAME=your_username\n"
                 "CODPARTNER_PASSWORD=your_password"
             )
+    
+    @classmethod
+    def for_account(cls, name, username, password):
+        """Config for one seller account, with its own output folder"""
+        download_dir = cls.ACCOUNTS_DIR / name
+        download_dir.mkdir(parents=True, exist_ok=True)
+        return type(f'Config_{name}', (cls,), {
+            'ACCOUNT': name,
+            'USERNAME': username,
+            'PASSWORD': password,
+            'DOWNLOAD_DIR': download_dir,
+        })()
+    
+    @classmethod
+    def for_site(cls, base_url):
+        """Config pointed at another CODPARTNER site (e.g. the local benchmark mock)"""
+        base_url = base_url.rstrip('/')
+        return type(f'{cls.__name__}_site', (cls,), {
+            'BASE_URL': base_url,
+            'LOGIN_URL': f'{base_url}/login',
+            'INVENTORY_URL': f'{base_url}/inventory',
+            'ORDERS_URL': f'{base_url}/orders',
+            'ANALYTICS_URL': f'{base_url}/reports/analytics/products',
+        })()
@@ -0,0 +1,267 @@
+"""
+Memory-mapped stock cube: products x days of end-of-day quantities
+
+Derived from the inventory ledger and rebuilt incrementally as snapshots
+arrive. The data lives in three files under <data folder>/cube/:
+
+    meta.json    start date, day count, product catalog (name, warehouse)
+    stock.i32    int32 quantities, one row per day, one column per product
+    valid.bits   validity bitmap, one bit per (day, product)
+
+Days are stored as rows so a new day is appended at the end of the file.
+`cube.stock` exposes the products x days view as a zero-copy transpose, and
+opening the cube maps the files without reading them.
+
+Usage:
+    cube = StockCube.open()
+    dates, qty, valid = cube.series('Fourleaf Bracelet', 'Riyadh warehouse')
+    stocks = cube.states([date(2025, 10, 1), date(2025, 10, 2)])  # {(name, warehouse): qty} per day
+    window = cube.window(date(2025, 10, 1), date(2025, 10, 31))  # days x products view
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from .config import Config
+
+
+class StockCube:
+    """Products x days quantity cube backed by numpy.memmap"""
+
+    def __init__(self, directory: Path = None):
+        self.directory = Path(directory or Config.DOWNLOAD_DIR) / Config.CUBE_DIR_NAME
+        self.meta_file = self.directory / 'meta.json'
+        self.stock_file = self.directory / 'stock.i32'
+        self.valid_file = self.directory / 'valid.bits'
+
+        self.start = None
+        self.days = 0
+        self.capacity = 0
+        self.products = []
+        self._index = {}
+        self._stock = None
+        self._valid = None
+
+        if self.meta_file.exists():
+            self._load_meta()
+
+    @classmethod
+    def open(cls, directory: Path = None):
+        """Open an existing cube read-only"""
+        cube = cls(directory)
+        cube._map('r')
+        return cube
+
+    # Reading
+
+    @property
+    def stock(self):
+        """products x days quantities (zero-copy view)"""
+        return self._rows().T
+
+    @property
+    def end(self):
+        """Last day in the cube"""
+        if self.start is None or self.days == 0:
+            return None
+        return self.start + timedelta(days=self.days - 1)
+
+    def product_index(self, product_name, warehouse):
+        return self._index[(product_name, warehouse)]
+
+    def products_in(self, warehouse):
+        """Column indices of every product stocked in a warehouse"""
+        return [i for i, (_, wh) in enumerate(self.products) if wh == warehouse]
+
+    def day_index(self, day):
+        if isinstance(day, datetime):
+            day = day.date()
+        return (day - self.start).days
+
+    def window(self, start=None, end=None):
+        """
+        days x products quantities for a date range (inclusive), zero-copy
+
+        Returns: (dates, qty, valid) where valid is a bool array of the same shape
+        """
+        first = 0 if start is None else max(0, self.day_index(start))
+        last = self.days - 1 if end is None else min(self.days - 1, self.day_index(end))
+        qty = self._rows()[first:last + 1]
+        dates = [self.start + timedelta(days=d) for d in range(first, last + 1)]
+        return dates, qty, self._unpack_valid(first, last + 1)
+
+    def series(self, product_name, warehouse, start=None, end=None):
+        """
+        One SKU over time
+
+        Returns: (dates, qty, valid) 1-D arrays; qty is a strided view, no copy
+        """
+        column = self.product_index(product_name, warehouse)
+        dates, qty, valid = self.window(start, end)
+        return dates, qty[:, column], valid[:, column]
+
+    def has_day(self, day):
+        """Whether a day is in the cube and has at least one valid quantity"""
+        if isinstance(day, datetime):
+            day = day.date()
+        if self.end is None or not self.start <= day <= self.end:
+            return False
+        row = self.day_index(day)
+        return bool(self._unpack_valid(row, row + 1).any())
+
+    def states(self, days):
+        """
+        End-of-day stock tables for several days
+
+        Returns: list of dicts {(product_name, warehouse): qty} in the order of days
+        """
+        rows = self._rows()
+        states = []
+        for day in days:
+            row = self.day_index(day)
+            valid = self._unpack_valid(row, row + 1)[0]
+            states.append({
+                self.products[column]: int(qty)
+                for column, qty in enumerate(rows[row]) if valid[column]
+            })
+        return states
+
+    def _rows(self):
+        if self._stock is None:
+            self._map('r')
+        return self._stock[:self.days, :len(self.products)]
+
+    def _unpack_valid(self, first, last):
+        if self._valid is None:
+            self._map('r')
+        bits = np.unpackbits(self._valid[first:last], axis=1, count=self.capacity)
+        return bits[:, :len(self.products)].astype(bool)
+
+    # Writing
+
+    def update(self, ledger):
+        """
+        Append end-of-day stock for every day the ledger has beyond the cube
+
+        Days without a snapshot are left invalid (bit cleared). The last day
+        already in the cube is rewritten, in case more captures arrived since.
+        """
+        entries = ledger.entries()
+        if not entries:
+            return 0
+
+        # Last entry of each day
+        last_of_day = {}
+        for entry in entries:
+            day = datetime.fromisoformat(entry['captured_at']).date()
+            last_of_day[day] = entry['id']
+
+        first_day = min(last_of_day)
+        if self.start is None:
+            self.start = first_day
+
+        resume_from = self.end or first_day
+        days_to_write = sorted(d for d in last_of_day if d >= resume_from)
+        if not days_to_write:
+            return 0
+
+        states = ledger.states([last_of_day[d] for d in days_to_write])
+
+        # Grow the catalog first, so every column exists before writing
+        for state in states:
+            for key in state:
+                if key not in self._index:
+                    self._index[key] = len(self.products)
+                    self.products.append(key)
+
+        new_days = self.day_index(days_to_write[-1]) + 1
+        self._resize(max(new_days, self.days), len(self.products))
+
+        for day, state in zip(days_to_write, states):
+            row = self.day_index(day)
+            quantities = np.zeros(self.capacity, dtype=np.int32)
+            present = np.zeros(self.capacity, dtype=bool)
+            for key, qty in state.items():
+                column = self._index[key]
+                quantities[column] = qty
+                present[column] = True
+            self._stock[row] = quantities
+            self._valid[row] = np.packbits(present)
+
+        self._stock.flush()
+        self._valid.flush()
+        self._save_meta()
+        return len(days_to_write)
+
+    def _resize(self, days, products):
+        """Grow the files to hold `days` rows and `products` columns"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        if products > self.capacity:
+            # Rare: rewrite with room to spare so new products rarely trigger this
+            new_capacity = max(products, self.capacity * 2, 64)
+            self._rewrite(new_capacity)
+
+        self.days = days
+        self._extend(self.stock_file, days * self.capacity * 4)
+        self._extend(self.valid_file, days * self._valid_width(self.capacity))
+        self._map('r+')
+
+    def _rewrite(self, new_capacity):
+        old_stock = self._rows().copy() if self.days else None
+        old_valid = self._unpack_valid(0, self.days) if self.days else None
+        self._stock = self._valid = None
+
+        stock = np.zeros((self.days, new_capacity), dtype=np.int32)
+        valid = np.zeros((self.days, new_capacity), dtype=bool)
+        if old_stock is not None:
+            stock[:, :old_stock.shape[1]] = old_stock
+            valid[:, :old_valid.shape[1]] = old_valid
+
+        stock.tofile(self.stock_file)
+        np.packbits(valid, axis=1).tofile(self.valid_file)
+        self.capacity = new_capacity
+
+    @staticmethod
+    def _extend(path, size):
+        with open(path, 'ab') as f:
+            if f.tell() < size:
+                f.truncate(size)
+
+    @staticmethod
+    def _valid_width(capacity):
+        return (capacity + 7) // 8
+
+    def _map(self, mode):
+        if not self.days:
+            self._stock = np.zeros((0, self.capacity), dtype=np.int32)
+            self._valid = np.zeros((0, self._valid_width(self.capacity)), dtype=np.uint8)
+            return
+        self._stock = np.memmap(self.stock_file, dtype=np.int32, mode=mode,
+                                shape=(self.days, self.capacity))
+        self._valid = np.memmap(self.valid_file, dtype=np.uint8, mode=mode,
+                                shape=(self.days, self._valid_width(self.capacity)))
+
+    def _load_meta(self):
+        with open(self.meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.start = date.fromisoformat(meta['start'])
+        self.days = meta['days']
+        self.capacity = meta['capacity']
+        self.products = [tuple(key) for key in meta['products']]
+        self._index = {key: i for i, key in enumerate(self.products)}
+
+    def _save_meta(self):
+        meta = {
+            'start': self.start.isoformat(),
+            'days': self.days,
+            'capacity': self.capacity,
+            'products': [list(key) for key in self.products],
+        }
+        tmp = self.meta_file.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        tmp.replace(self.meta_file)
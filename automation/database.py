@@ -0,0 +1,30 @@
+import sqlite3
+from pathlib import Path
+
+from .config import Config
+
+
+def connect(directory: Path = None):
+    """
+    Open the SQLite database that lives next to the snapshots
+
+    Args:
+        directory: Data folder (defaults to Config.DOWNLOAD_DIR)
+
+    Returns: sqlite3 connection with rows accessible by column name
+    """
+    directory = Path(directory or Config.DOWNLOAD_DIR)
+    conn = sqlite3.connect(directory / Config.DATABASE_NAME, timeout=30)
+    conn.row_factory = sqlite3.Row
+    # WAL lets pool workers record captures while scripts read
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+
+def ensure_columns(conn, table, columns):
+    """Add columns introduced after a table was first created"""
+    existing = {row['name'] for row in conn.execute(f'PRAGMA table_info({table})')}
+    with conn:
+        for name, definition in columns.items():
+            if name not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
@@ -0,0 +1,73 @@
+"""
+Failure-only Playwright traces for download steps
+
+Tracing a whole run with screenshots, DOM snapshots and sources slows every
+action and leaves a large zip behind even when nothing went wrong. With
+CODPARTNER_FAILURE_TRACES=1 (Config.FAILURE_TRACES) steps run untraced as
+usual; only when a step raises is it re-run once with tracing on. If the
+re-run fails too, its trace is written to <data folder>/failure_traces/;
+if it passes, the trace is dropped and the step's result is used.
+
+Open a saved trace with `playwright show-trace <zip>` or analyze_trace.py.
+"""
+
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+
+def failure_trace(label):
+    """Decorator for CODPartnerAutomation steps: on failure, re-run the step traced and keep the trace"""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(bot, *args, **kwargs):
+            if not bot.config.FAILURE_TRACES:
+                return method(bot, *args, **kwargs)
+            try:
+                return method(bot, *args, **kwargs)
+            except Exception as e:
+                if not _start_tracing(bot, label):
+                    raise
+                print(f"🧾 Step {label} failed ({e}), re-running it with tracing on...")
+            try:
+                result = method(bot, *args, **kwargs)
+            except Exception:
+                _save_trace(bot, label)
+                raise
+            bot.context.tracing.stop()  # Passed on the re-run: nothing to keep
+            print(f"✅ Step {label} passed on the traced re-run")
+            return result
+        return wrapper
+    return decorator
+
+
+def _start_tracing(bot, label):
+    """Start tracing on the bot's context; False if there is none or it can't be traced"""
+    if bot.context is None:
+        return False
+    try:
+        bot.context.tracing.start(screenshots=True, snapshots=True, title=label)
+    except Exception as e:
+        print(f"⚠️  Could not start failure trace: {e}")
+        return False
+    return True
+
+
+def _save_trace(bot, label):
+    directory = Path(bot.config.DOWNLOAD_DIR) / bot.config.FAILURE_TRACE_DIR_NAME
+    path = directory / f"{label}_{datetime.now():%Y%m%d_%H%M%S}.zip"
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        bot.context.tracing.stop(path=str(path))
+        print(f"🧾 Trace of the failed step saved to: {path}")
+        print(f"   View it with: playwright show-trace \"{path}\"")
+        _prune(directory, bot.config.FAILURE_TRACES_KEEP)
+    except Exception as e:
+        # Never hide the step's own error behind a tracing problem
+        print(f"⚠️  Could not save failure trace: {e}")
+
+
+def _prune(directory, keep):
+    traces = sorted(directory.glob('*.zip'), key=lambda p: p.stat().st_mtime)
+    for old in traces[:max(0, len(traces) - keep)]:
+        old.unlink()
@@ -0,0 +1,439 @@
+"""
+Declarative browser flows compiled from Playwright codegen recordings
+
+A codegen script (or a hand-edited one like run_my_recording.py) is parsed,
+not executed: every page.goto / click / fill / wait in it becomes a step of
+a flow, and time.sleep() calls, print()s and diagnostics are dropped.
+
+    flow = compile_codegen(Path('run_my_recording.py').read_text(), name='analytics_filter')
+    flow.save('flows/analytics_filter.json')
+
+A flow step is plain JSON:
+
+    {"action": "goto", "url": "{base_url}/reports/analytics/products"}
+    {"action": "click", "locator": [["get_by_role", ["button"], {"name": "Log In"}]]}
+    {"action": "fill", "locator": [["locator", ["#daterange"], {}]], "value": "2025/10/12 - 2025/10/13"}
+    {"action": "wait_for_load_state", "state": "networkidle"}
+
+FlowRunner plays a flow back with locator auto-waiting (each action waits
+until its element is attached, visible, stable and enabled) and, after each
+action, a readiness check for the dashboard's "Processing..." indicators,
+so no step needs a fixed sleep. Credentials and the site URL are
+placeholders ({username}, {password}, {base_url}), filled in at run time.
+"""
+
+from datetime import datetime
+from pathlib import Path
+import ast
+import json
+import time
+
+from .config import Config
+
+
+# Locator-building calls a flow may use (arguments must be literals)
+LOCATOR_METHODS = {'locator', 'get_by_role', 'get_by_text', 'get_by_label', 'get_by_placeholder',
+                   'get_by_test_id', 'get_by_title', 'get_by_alt_text', 'nth', 'filter', 'frame_locator'}
+LOCATOR_PROPERTIES = {'first', 'last'}
+
+# Locator actions -> flow actions (first positional argument, if any, is stored under this key)
+LOCATOR_ACTIONS = {
+    'click': None, 'dblclick': None, 'check': None, 'uncheck': None, 'hover': None,
+    'fill': 'value', 'type': 'value', 'press_sequentially': 'value', 'press': 'key',
+    'select_option': 'value', 'set_input_files': 'value',
+}
+
+# Calls that only inspect the page; nothing to replay
+QUERY_METHODS = {'is_visible', 'is_enabled', 'is_checked', 'is_hidden', 'is_disabled', 'count', 'all',
+                 'bounding_box', 'get_attribute', 'inner_text', 'inner_html', 'text_content',
+                 'input_value', 'all_inner_texts', 'all_text_contents', 'scroll_into_view_if_needed',
+                 'screenshot', 'content', 'title'}
+
+# Browser / context setup in the recording; the runner brings its own page
+SETUP_METHODS = {'launch', 'new_context', 'new_page', 'start', 'stop', 'close', 'set_default_timeout',
+                 'set_viewport_size', 'storage_state', 'start_chunk', 'stop_chunk'}
+
+# Variables of recording scripts that map to run-time placeholders
+VARIABLES = {'USERNAME': '{username}', 'PASSWORD': '{password}', 'BASE_URL': '{base_url}'}
+PRODUCTION_URL = 'https://app.codpartner.com'
+
+# Visible while the dashboard's tables are (re)loading
+PROCESSING_INDICATORS = '[id$="_processing"], .dataTables_processing'
+READY_CHECK = """(selector) => !Array.from(document.querySelectorAll(selector)).some(
+    el => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden')"""
+
+
+class Flow:
+    """A named list of steps"""
+
+    def __init__(self, name, steps, source=None, warnings=None):
+        self.name = name
+        self.steps = steps
+        self.source = source
+        self.warnings = warnings or []
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('name', Path(path).stem), data['steps'], data.get('source'))
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'name': self.name,
+            'source': self.source,
+            'compiled_at': datetime.now().isoformat(timespec='seconds'),
+            'steps': self.steps,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return path
+
+    def __len__(self):
+        return len(self.steps)
+
+
+def compile_codegen(source, name='recording', source_path=None):
+    """
+    Turn a codegen Python script into a Flow
+
+    Statements the compiler doesn't understand are skipped and listed in
+    flow.warnings (with their line numbers) instead of failing the compile.
+    A flow has no branches, so if/while bodies are inlined and except, else
+    and finally branches dropped; each of those is listed there too.
+    """
+    compiler = _Compiler()
+    compiler.visit_body(ast.parse(source).body)
+    steps = _drop_redundant_clicks(compiler.steps)
+    return Flow(name, steps, source=str(source_path) if source_path else None, warnings=compiler.warnings)
+
+
+class _Compiler:
+    def __init__(self):
+        self.steps = []
+        self.warnings = []
+        self.pages = {'page'}
+        self.locators = {}  # Variable name -> locator chain
+        self.secrets = {
+            Config.USERNAME or None: '{username}',
+            Config.PASSWORD or None: '{password}',
+        }
+        self.secrets.pop(None, None)
+
+    def visit_body(self, body):
+        for node in body:
+            self.visit(node)
+
+    def visit(self, node):
+        if isinstance(node, (ast.FunctionDef, ast.With)) or _is_main_guard(node):
+            self.visit_body(node.body)
+        elif isinstance(node, ast.If):
+            # A flow has no branches: the if body is inlined, the else dropped
+            self.warn(node, "if: condition not compiled, its body always runs")
+            self.visit_body(node.body)
+            self.warn_skipped(node.orelse, "else branch")
+        elif isinstance(node, ast.While):
+            self.warn(node, "while loop: condition not compiled, its body runs once")
+            self.visit_body(node.body)
+            self.warn_skipped(node.orelse, "while-else branch")
+        elif isinstance(node, ast.Try):
+            # Only the happy path is compiled; fallbacks in except never run
+            self.visit_body(node.body)
+            for handler in node.handlers:
+                self.warn(handler, "except branch skipped (the flow fails instead)")
+            self.warn_skipped(node.orelse, "try-else branch")
+            self.warn_skipped(node.finalbody, "finally branch")
+        elif isinstance(node, ast.Assign):
+            self.visit_assign(node)
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            self.visit_call(node.value)
+        elif isinstance(node, ast.For):
+            self.warn(node, "loop skipped")
+
+    def visit_assign(self, node):
+        if len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+            return
+        target, value = node.targets[0].id, node.value
+        if isinstance(value, ast.Call) and isinstance(value.func, ast.Attribute) and value.func.attr == 'new_page':
+            self.pages.add(target)
+            return
+        chain = self.locator_chain(value)
+        if chain:
+            self.locators[target] = chain
+        elif isinstance(value, ast.Call):
+            # e.g. `ok = button.is_visible()`: still replay any action in it
+            self.visit_call(value)
+
+    def visit_call(self, call):
+        func = call.func
+        if isinstance(func, ast.Name):
+            return  # print(), helpers
+        if not isinstance(func, ast.Attribute):
+            return
+        method, owner = func.attr, func.value
+
+        if isinstance(owner, ast.Name) and owner.id == 'time':
+            return  # time.sleep(): the runner waits on the page instead
+
+        if isinstance(owner, ast.Call) and isinstance(owner.func, ast.Name) and owner.func.id == 'expect':
+            self.visit_expect(call, method, owner)
+            return
+
+        if isinstance(owner, ast.Name) and owner.id in self.pages:
+            self.visit_page_call(call, method)
+            return
+
+        if (isinstance(owner, ast.Attribute) and owner.attr == 'keyboard'
+                and isinstance(owner.value, ast.Name) and owner.value.id in self.pages):
+            args = self.literal_args(call)
+            if method == 'press' and args:
+                self.steps.append({'action': 'keyboard_press', 'key': args[0]})
+            else:
+                self.warn(call, f"page.keyboard.{method}() skipped")
+            return
+
+        chain = self.locator_chain(owner)
+        if chain is None:
+            if method in LOCATOR_ACTIONS or method == 'wait_for':
+                self.warn(call, f".{method}() on a locator that can't be compiled (non-literal argument?), skipped")
+            return
+        if method in LOCATOR_ACTIONS:
+            self.add_action(call, method, chain, LOCATOR_ACTIONS[method])
+        elif method == 'wait_for':
+            options = self.literal_kwargs(call)
+            if options is not None:
+                self.steps.append({'action': 'wait_for', 'locator': chain,
+                                   'state': options.pop('state', 'visible'), **_options(options)})
+        elif method not in QUERY_METHODS:
+            self.warn(call, f"locator method .{method}() skipped")
+
+    def visit_page_call(self, call, method):
+        args, kwargs = self.literal_args(call), self.literal_kwargs(call)
+        if args is None or kwargs is None:
+            self.warn(call, f"page.{method}() has non-literal arguments, skipped")
+            return
+        if method == 'goto':
+            self.steps.append({'action': 'goto', 'url': self.template(args[0]), **_options(kwargs)})
+        elif method == 'wait_for_load_state':
+            state = args[0] if args else kwargs.pop('state', 'load')
+            self.steps.append({'action': 'wait_for_load_state', 'state': state, **_options(kwargs)})
+        elif method == 'wait_for_url':
+            self.steps.append({'action': 'wait_for_url', 'url': self.template(args[0]), **_options(kwargs)})
+        elif method == 'wait_for_selector':
+            state = kwargs.pop('state', 'visible')
+            self.steps.append({'action': 'wait_for', 'locator': [['locator', [args[0]], {}]],
+                               'state': state, **_options(kwargs)})
+        elif method == 'wait_for_timeout':
+            return  # A sleep in disguise
+        elif method in LOCATOR_ACTIONS and args:
+            # Old-style page.click(selector, ...)
+            chain = [['locator', [args[0]], {}]]
+            call_args = ast.Call(func=call.func, args=call.args[1:], keywords=call.keywords)
+            ast.copy_location(call_args, call)
+            self.add_action(call_args, method, chain, LOCATOR_ACTIONS[method])
+        elif method not in QUERY_METHODS and method not in SETUP_METHODS:
+            self.warn(call, f"page.{method}() skipped")
+
+    def visit_expect(self, call, method, expect_call):
+        chain = self.locator_chain(expect_call.args[0]) if expect_call.args else None
+        args = self.literal_args(call) or []
+        if method == 'to_be_visible' and chain:
+            self.steps.append({'action': 'wait_for', 'locator': chain, 'state': 'visible'})
+        elif method == 'to_be_hidden' and chain:
+            self.steps.append({'action': 'wait_for', 'locator': chain, 'state': 'hidden'})
+        elif method == 'to_have_url' and args:
+            self.steps.append({'action': 'wait_for_url', 'url': self.template(args[0])})
+        else:
+            self.warn(call, f"expect(...).{method}() skipped")
+
+    def add_action(self, call, method, chain, value_key):
+        step = {'action': method, 'locator': chain}
+        if value_key:
+            if not call.args:
+                self.warn(call, f".{method}() without a value skipped")
+                return
+            value = self.value(call.args[0])
+            if value is None:
+                self.warn(call, f".{method}() value is not a literal or known variable, skipped")
+                return
+            step[value_key] = value
+        options = self.literal_kwargs(call)
+        if options is None:
+            self.warn(call, f".{method}() has non-literal options, skipped")
+            return
+        step.update(_options(options))
+        self.steps.append(step)
+
+    def locator_chain(self, node):
+        """Locator expression -> [[method, args, kwargs] | [property]], or None"""
+        if isinstance(node, ast.Name):
+            if node.id in self.pages:
+                return []
+            chain = self.locators.get(node.id)
+            return list(chain) if chain is not None else None
+        if isinstance(node, ast.Attribute) and node.attr in LOCATOR_PROPERTIES:
+            parent = self.locator_chain(node.value)
+            return parent + [[node.attr]] if parent is not None else None
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in LOCATOR_METHODS:
+            parent = self.locator_chain(node.func.value)
+            args, kwargs = self.literal_args(node), self.literal_kwargs(node)
+            if parent is None or args is None or kwargs is None:
+                return None
+            return parent + [[node.func.attr, args, kwargs]]
+        return None
+
+    def value(self, node):
+        if isinstance(node, ast.Name):
+            return VARIABLES.get(node.id)
+        try:
+            value = ast.literal_eval(node)
+        except (ValueError, TypeError):
+            return None
+        return self.template(value) if isinstance(value, str) else value
+
+    def template(self, text):
+        """Swap credentials and the site URL for run-time placeholders"""
+        if not isinstance(text, str):
+            return text
+        if text in self.secrets:
+            return self.secrets[text]
+        for base_url in (Config.BASE_URL, PRODUCTION_URL):
+            if text.startswith(base_url):
+                return '{base_url}' + text[len(base_url):]
+        return text
+
+    def literal_args(self, call):
+        try:
+            return [ast.literal_eval(arg) for arg in call.args]
+        except (ValueError, TypeError):
+            return None
+
+    def literal_kwargs(self, call):
+        try:
+            return {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords if kw.arg}
+        except (ValueError, TypeError):
+            return None
+
+    def warn(self, node, message):
+        self.warnings.append(f"line {getattr(node, 'lineno', '?')}: {message}")
+
+    def warn_skipped(self, body, what):
+        if body:
+            self.warn(body[0], f"{what} skipped")
+
+
+def _is_main_guard(node):
+    """`if __name__ == "__main__":` - always taken when the recording runs"""
+    return (isinstance(node, ast.If) and not node.orelse and isinstance(node.test, ast.Compare)
+            and isinstance(node.test.left, ast.Name) and node.test.left.id == '__name__')
+
+
+def _options(kwargs):
+    return {'options': kwargs} if kwargs else {}
+
+
+def _drop_redundant_clicks(steps):
+    """Codegen clicks into every field before filling it; fill() focuses the field itself"""
+    kept = []
+    for i, step in enumerate(steps):
+        following = steps[i + 1] if i + 1 < len(steps) else None
+        if (step['action'] == 'click' and 'options' not in step and following
+                and following['action'] == 'fill' and following['locator'] == step['locator']):
+            continue
+        kept.append(step)
+    return kept
+
+
+def describe(step):
+    """Short human-readable form of a step"""
+    if 'locator' in step:
+        target = '.'.join(
+            segment[0] if len(segment) == 1 else
+            f"{segment[0]}({', '.join([repr(a) for a in segment[1]] + [f'{k}={v!r}' for k, v in segment[2].items()])})"
+            for segment in step['locator']
+        )
+    else:
+        target = step.get('url') or step.get('state', '')
+    if 'value' in step:
+        target += " <- ****" if step['value'] == '{password}' else f" <- {step['value']!r}"
+    elif 'key' in step:
+        target += f" <- {step['key']}"
+    return f"{step['action']} {target}"
+
+
+class FlowRunner:
+    """Runs flows on a page with auto-waiting locators and readiness checks"""
+
+    def __init__(self, page, variables=None, timeout=30000):
+        self.page = page
+        self.variables = variables or {}
+        self.timeout = timeout
+
+    def run(self, flow):
+        """
+        Execute every step in order
+
+        Returns: list of (step description, seconds)
+        """
+        timings = []
+        print(f"▶️  Running flow '{flow.name}' ({len(flow)} steps)")
+        for number, step in enumerate(flow.steps, 1):
+            started = time.perf_counter()
+            try:
+                self.run_step(step)
+            except Exception as e:
+                print(f"   ❌ Step {number}/{len(flow)} failed: {describe(step)}")
+                raise RuntimeError(f"Flow '{flow.name}' failed at step {number} ({step['action']}): {e}") from e
+            took = time.perf_counter() - started
+            timings.append((describe(step), took))
+            print(f"   ✅ {number}/{len(flow)} {describe(step)[:80]} ({took:.2f}s)")
+        print(f"✅ Flow '{flow.name}' done in {sum(t for _, t in timings):.1f}s")
+        return timings
+
+    def run_step(self, step):
+        action = step['action']
+        options = {'timeout': self.timeout, **step.get('options', {})}
+        if action == 'goto':
+            options.setdefault('wait_until', 'domcontentloaded')
+            self.page.goto(self.fill_in(step['url']), **options)
+        elif action == 'wait_for_load_state':
+            self.page.wait_for_load_state(step['state'], **options)
+        elif action == 'wait_for_url':
+            self.page.wait_for_url(self.fill_in(step['url']), **options)
+        elif action == 'wait_for':
+            self.locate(step['locator']).wait_for(state=step['state'], **options)
+        elif action == 'keyboard_press':
+            self.page.keyboard.press(step['key'])
+            self.wait_until_ready()
+        elif action in LOCATOR_ACTIONS:
+            target = self.locate(step['locator'])
+            value_key = LOCATOR_ACTIONS[action]
+            if value_key:
+                getattr(target, action)(self.fill_in(step[value_key]), **options)
+            else:
+                getattr(target, action)(**options)
+            self.wait_until_ready()
+        else:
+            raise ValueError(f"Unknown flow action '{action}'")
+
+    def locate(self, chain):
+        target = self.page
+        for segment in chain:
+            if len(segment) == 1:
+                target = getattr(target, segment[0])
+            else:
+                method, args, kwargs = segment
+                target = getattr(target, method)(*[self.fill_in(a) for a in args], **kwargs)
+        return target
+
+    def wait_until_ready(self):
+        """Wait for any table "Processing..." indicator to go away (returns at once if none)"""
+        self.page.wait_for_function(READY_CHECK, arg=PROCESSING_INDICATORS, timeout=self.timeout)
+
+    def fill_in(self, value):
+        if isinstance(value, str):
+            for key, replacement in self.variables.items():
+                value = value.replace(f'{{{key}}}', str(replacement))
+        return value
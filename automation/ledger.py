@@ -0,0 +1,300 @@
+from datetime import datetime
+from pathlib import Path
+
+from .config import Config
+from .database import connect
+from .manifest import SnapshotManifest
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    snapshot_id INTEGER NOT NULL UNIQUE,    -- manifest snapshot
+    captured_at TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    is_keyframe INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_ledger_entries_time ON ledger_entries (captured_at);
+
+CREATE TABLE IF NOT EXISTS ledger_products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_name TEXT NOT NULL,
+    warehouse TEXT NOT NULL,
+    UNIQUE (product_name, warehouse)
+);
+
+-- Full stock table, stored every LEDGER_KEYFRAME_EVERY entries
+CREATE TABLE IF NOT EXISTS ledger_keyframes (
+    entry_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    qty INTEGER NOT NULL,
+    PRIMARY KEY (entry_id, product_id)
+) WITHOUT ROWID;
+
+-- Per-SKU changes against the previous entry (NULL = not listed)
+CREATE TABLE IF NOT EXISTS ledger_changes (
+    entry_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    old_qty INTEGER,
+    new_qty INTEGER,
+    PRIMARY KEY (entry_id, product_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_ledger_changes_product ON ledger_changes (product_id, entry_id);
+"""
+
+
+def _timestamp(when):
+    if isinstance(when, datetime):
+        return when.isoformat(timespec='seconds')
+    return when
+
+
+class InventoryLedger:
+    """
+    Event-sourced inventory history
+
+    Stores one full keyframe every few snapshots and, for every snapshot in
+    between, only the SKUs whose quantity changed. Any point in time is
+    rebuilt from the nearest keyframe, and diffs or "sold since" queries
+    read only the change records instead of whole snapshots.
+
+    Quantities are keyed by (product_name, warehouse), like the parsers.
+    """
+
+    def __init__(self, directory: Path = None, keyframe_every: int = None):
+        self.directory = Path(directory or Config.DOWNLOAD_DIR)
+        self.keyframe_every = keyframe_every or Config.LEDGER_KEYFRAME_EVERY
+        self.conn = connect(self.directory)
+        self.conn.executescript(SCHEMA)
+        self._product_ids = {
+            (row['product_name'], row['warehouse']): row['id']
+            for row in self.conn.execute('SELECT * FROM ledger_products')
+        }
+        self._product_keys = {pid: key for key, pid in self._product_ids.items()}
+        self._head_state = None
+
+    # Writing
+
+    def catch_up(self, snapshots, parse):
+        """
+        Ingest manifest snapshots the ledger doesn't have yet
+
+        Entries can only be appended after the head, so on first use (empty
+        ledger) every inventory snapshot in the manifest is ingested first,
+        in capture order, instead of only the ones passed in.
+
+        Args:
+            snapshots: Snapshot objects (any order)
+            parse: Function turning a snapshot file into {(name, warehouse): qty}
+
+        Returns: number of snapshots ingested
+        """
+        head = self.head()
+        if head is None:
+            with SnapshotManifest(self.directory) as manifest:
+                history = [s for s in manifest.all('inventory') if s.path.exists()]
+            snapshots = list({s.id: s for s in [*history, *snapshots]}.values())
+            print(f"📒 Ledger: backfilling {len(snapshots)} snapshot(s) from the manifest")
+        ingested = 0
+        for snapshot in sorted(snapshots, key=lambda s: (s.captured_at, s.id)):
+            if self.has(snapshot.id):
+                continue
+            if head and _timestamp(snapshot.captured_at) < head['captured_at']:
+                print(f"⚠️  Ledger: skipping {snapshot.path.name}, older than the latest entry")
+                continue
+            self.ingest(snapshot, parse)
+            head = self.head()
+            ingested += 1
+        return ingested
+
+    def ingest(self, snapshot, parse):
+        """Append one snapshot as change records (or a keyframe)"""
+        head = self.head()
+        state = self.state_at() if head else {}
+
+        if head and head['sha256'] == snapshot.sha256:
+            # Unchanged capture: an entry with no changes
+            inventory = state
+        else:
+            inventory = parse(snapshot.path)
+
+        entries_since_keyframe = self.conn.execute(
+            'SELECT COUNT(*) FROM ledger_entries WHERE id > '
+            '(SELECT COALESCE(MAX(id), 0) FROM ledger_entries WHERE is_keyframe = 1)'
+        ).fetchone()[0]
+        is_keyframe = head is None or entries_since_keyframe + 1 >= self.keyframe_every
+
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO ledger_entries (snapshot_id, captured_at, sha256, is_keyframe) '
+                'VALUES (?, ?, ?, ?)',
+                (snapshot.id, _timestamp(snapshot.captured_at), snapshot.sha256, int(is_keyframe))
+            )
+            entry_id = cursor.lastrowid
+
+            changes = []
+            for key in state.keys() | inventory.keys():
+                old_qty, new_qty = state.get(key), inventory.get(key)
+                if old_qty != new_qty:
+                    changes.append((entry_id, self._product_id(key), old_qty, new_qty))
+            self.conn.executemany(
+                'INSERT INTO ledger_changes (entry_id, product_id, old_qty, new_qty) VALUES (?, ?, ?, ?)',
+                changes
+            )
+
+            if is_keyframe:
+                self.conn.executemany(
+                    'INSERT INTO ledger_keyframes (entry_id, product_id, qty) VALUES (?, ?, ?)',
+                    [(entry_id, self._product_id(key), qty) for key, qty in inventory.items()]
+                )
+
+        self._head_state = dict(inventory)
+        return entry_id
+
+    def _product_id(self, key):
+        if key not in self._product_ids:
+            cursor = self.conn.execute(
+                'INSERT INTO ledger_products (product_name, warehouse) VALUES (?, ?)', key
+            )
+            self._product_ids[key] = cursor.lastrowid
+            self._product_keys[cursor.lastrowid] = key
+        return self._product_ids[key]
+
+    # Reading
+
+    def has(self, snapshot_id):
+        return self.conn.execute(
+            'SELECT 1 FROM ledger_entries WHERE snapshot_id = ?', (snapshot_id,)
+        ).fetchone() is not None
+
+    def head(self):
+        """Latest ledger entry (or None)"""
+        return self.conn.execute(
+            'SELECT * FROM ledger_entries ORDER BY captured_at DESC, id DESC LIMIT 1'
+        ).fetchone()
+
+    def entries(self, after=None):
+        """Ledger entries (oldest first), optionally only those captured after a time"""
+        if after is None:
+            return self.conn.execute('SELECT * FROM ledger_entries ORDER BY id').fetchall()
+        return self.conn.execute(
+            'SELECT * FROM ledger_entries WHERE captured_at > ? ORDER BY id', (_timestamp(after),)
+        ).fetchall()
+
+    def entry_for(self, snapshot_id):
+        return self.conn.execute(
+            'SELECT * FROM ledger_entries WHERE snapshot_id = ?', (snapshot_id,)
+        ).fetchone()
+
+    def state_at(self, when=None):
+        """
+        Stock table as of a point in time (latest entry at or before when)
+
+        Returns: dict {(product_name, warehouse): qty}
+        """
+        if when is None:
+            if self._head_state is None:
+                head = self.head()
+                self._head_state = self._rebuild(head['id']) if head else {}
+            return dict(self._head_state)
+
+        entry = self.conn.execute(
+            'SELECT id FROM ledger_entries WHERE captured_at <= ? ORDER BY captured_at DESC, id DESC LIMIT 1',
+            (_timestamp(when),)
+        ).fetchone()
+        return self._rebuild(entry['id']) if entry else {}
+
+    def states(self, entry_ids):
+        """
+        Stock tables at several entries, rebuilt in one forward pass
+
+        Returns: list of dicts in the order of entry_ids (ascending)
+        """
+        if not entry_ids:
+            return []
+        entry_ids = sorted(entry_ids)
+        state = self._rebuild(entry_ids[0])
+        states = [dict(state)]
+        for previous, current in zip(entry_ids, entry_ids[1:]):
+            self._apply(state, previous, current)
+            states.append(dict(state))
+        return states
+
+    def changes_between(self, start_entry, end_entry):
+        """
+        Net per-SKU change between two entries, read from the change records
+
+        Returns: dict {(product_name, warehouse): (old_qty, new_qty)}
+        """
+        net = {}
+        rows = self.conn.execute(
+            'SELECT product_id, old_qty, new_qty FROM ledger_changes '
+            'WHERE entry_id > ? AND entry_id <= ? ORDER BY entry_id',
+            (start_entry, end_entry)
+        )
+        for row in rows:
+            key = self._product_keys[row['product_id']]
+            old_qty = net[key][0] if key in net else row['old_qty']
+            net[key] = (old_qty, row['new_qty'])
+        return {key: pair for key, pair in net.items() if pair[0] != pair[1]}
+
+    def sold_since(self, when, until=None):
+        """
+        Sold quantity (old - new) per SKU between two points in time
+
+        Only SKUs listed at both ends are included, like the daily report.
+        """
+        start = self._entry_at(when)
+        end = self._entry_at(until) if until else self.head()
+        if start is None or end is None:
+            return {}
+        return {
+            key: old_qty - new_qty
+            for key, (old_qty, new_qty) in self.changes_between(start['id'], end['id']).items()
+            if old_qty is not None and new_qty is not None
+        }
+
+    def _entry_at(self, when):
+        return self.conn.execute(
+            'SELECT * FROM ledger_entries WHERE captured_at <= ? ORDER BY captured_at DESC, id DESC LIMIT 1',
+            (_timestamp(when),)
+        ).fetchone()
+
+    def _rebuild(self, entry_id):
+        """Nearest keyframe at or before entry_id, rolled forward to it"""
+        keyframe = self.conn.execute(
+            'SELECT MAX(id) FROM ledger_entries WHERE is_keyframe = 1 AND id <= ?', (entry_id,)
+        ).fetchone()[0]
+        if keyframe is None:
+            return {}
+
+        state = {
+            self._product_keys[row['product_id']]: row['qty']
+            for row in self.conn.execute(
+                'SELECT product_id, qty FROM ledger_keyframes WHERE entry_id = ?', (keyframe,)
+            )
+        }
+        self._apply(state, keyframe, entry_id)
+        return state
+
+    def _apply(self, state, after_entry, up_to_entry):
+        rows = self.conn.execute(
+            'SELECT product_id, new_qty FROM ledger_changes '
+            'WHERE entry_id > ? AND entry_id <= ? ORDER BY entry_id',
+            (after_entry, up_to_entry)
+        )
+        for row in rows:
+            key = self._product_keys[row['product_id']]
+            if row['new_qty'] is None:
+                state.pop(key, None)
+            else:
+                state[key] = row['new_qty']
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,282 @@
+import hashlib
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .archive import extract_table, normalize_table, open_snapshot, write_archive
+from .config import Config
+from .database import connect, ensure_columns
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dataset TEXT NOT NULL,          -- 'inventory', 'orders' or 'analytics'
+    captured_at TEXT NOT NULL,      -- ISO timestamp of the capture
+    path TEXT NOT NULL,             -- relative to the data folder
+    sha256 TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    source TEXT,                    -- original capture file, when archived
+    duplicate_of INTEGER            -- earlier snapshot with identical content
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_dataset_time ON snapshots (dataset, captured_at);
+CREATE INDEX IF NOT EXISTS idx_snapshots_path ON snapshots (path);
+CREATE INDEX IF NOT EXISTS idx_snapshots_hash ON snapshots (dataset, sha256);
+
+-- Raw captures whose snapshots retention removed, so sync() does not archive them again
+CREATE TABLE IF NOT EXISTS pruned_sources (
+    dataset TEXT NOT NULL,
+    source TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (dataset, source, sha256)
+);
+"""
+
+MONTH_DAY_PATTERN = re.compile(
+    r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[\s-]?(\d{1,2})', re.IGNORECASE
+)
+
+
+def table_sha256(table_html):
+    """Hash of a capture's table (see extract_table), as stored in the manifest"""
+    return hashlib.sha256(normalize_table(table_html).encode('utf-8')).hexdigest()
+
+
+def count_rows(html):
+    """Count data rows (<tr role="row"> inside <tbody>) without parsing the page"""
+    body_start = html.find('<tbody')
+    if body_start == -1:
+        return 0
+    return html.count('role="row"', body_start)
+
+
+class Snapshot:
+    """One manifest entry"""
+
+    def __init__(self, row, directory):
+        self.id = row['id']
+        self.dataset = row['dataset']
+        self.captured_at = datetime.fromisoformat(row['captured_at'])
+        self.path = Path(directory) / row['path']
+        self.sha256 = row['sha256']
+        self.rows = row['rows']
+        self.source = row['source']
+        self.duplicate_of = row['duplicate_of']
+        self.is_archived = row['path'].startswith(Config.ARCHIVE_DIR_NAME + '/')
+
+    @property
+    def label(self):
+        """Short date label used in report columns, e.g. 'OCT12'"""
+        return self.captured_at.strftime('%b%d').upper()
+
+    def __repr__(self):
+        return f"<Snapshot {self.dataset} {self.captured_at:%Y-%m-%d %H:%M} {self.path.name}>"
+
+
+class SnapshotManifest:
+    """
+    Append-only index of captured snapshots
+
+    Written at capture time so "latest N snapshots" is an indexed query with
+    real timestamps instead of globbing the folder and sorting by mtime.
+    """
+
+    def __init__(self, directory: Path = None):
+        self.directory = Path(directory or Config.DOWNLOAD_DIR)
+        self.conn = connect(self.directory)
+        self.conn.executescript(SCHEMA)
+        ensure_columns(self.conn, 'snapshots', {'source': 'TEXT', 'duplicate_of': 'INTEGER'})
+
+    def capture(self, dataset, html, source, captured_at=None):
+        """
+        Archive a capture (table only, gzip-compressed) and record it
+
+        If the table is identical to the previous capture of the dataset, no
+        new file is written: the entry points at the earlier archive instead.
+
+        Args:
+            dataset: 'inventory', 'orders' or 'analytics'
+            html: Full page HTML
+            source: Filename the raw page was saved under
+            captured_at: Capture time (defaults to now)
+
+        Returns: the new Snapshot (check .duplicate_of to see if it was unchanged)
+        """
+        captured_at = captured_at or datetime.now()
+        table_html = extract_table(html, dataset)
+        sha256 = table_sha256(table_html)
+
+        previous = self.conn.execute(
+            'SELECT * FROM snapshots WHERE dataset = ? AND captured_at <= ? '
+            'ORDER BY captured_at DESC, id DESC LIMIT 1',
+            (dataset, captured_at.isoformat(timespec='seconds'))
+        ).fetchone()
+        if previous and previous['sha256'] == sha256 and (self.directory / previous['path']).exists():
+            return self.record(dataset, self.directory / previous['path'], content=table_html,
+                               captured_at=captured_at, rows=previous['rows'], sha256=sha256,
+                               source=Path(source).name,
+                               duplicate_of=previous['duplicate_of'] or previous['id'])
+
+        archive_path = write_archive(self.directory, source, table_html, captured_at)
+        return self.record(dataset, archive_path, content=table_html, captured_at=captured_at,
+                           sha256=sha256, source=Path(source).name)
+
+    def record(self, dataset, path, content=None, captured_at=None, rows=None,
+               sha256=None, source=None, duplicate_of=None):
+        """
+        Add a capture to the manifest
+
+        Args:
+            dataset: 'inventory', 'orders' or 'analytics'
+            path: File the capture was saved to
+            content: Captured HTML (read from path if omitted)
+            captured_at: Capture time (defaults to now)
+            rows: Data row count (counted from content if omitted)
+            sha256: Content hash (hashed from content if omitted)
+            source: Original capture filename
+            duplicate_of: Id of the earlier snapshot this one repeats
+        """
+        path = Path(path)
+        if content is None:
+            with open_snapshot(path) as f:
+                content = f.read()
+
+        captured_at = captured_at or datetime.now()
+        rows = count_rows(content) if rows is None else rows
+        sha256 = sha256 or hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO snapshots (dataset, captured_at, path, sha256, rows, source, duplicate_of) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (dataset, captured_at.isoformat(timespec='seconds'), self._relative(path),
+                 sha256, rows, source, duplicate_of)
+            )
+        return self.get(cursor.lastrowid)
+
+    def get(self, snapshot_id):
+        row = self.conn.execute('SELECT * FROM snapshots WHERE id = ?', (snapshot_id,)).fetchone()
+        return Snapshot(row, self.directory) if row else None
+
+    def latest(self, dataset, n=1):
+        """
+        Latest N snapshots of a dataset whose files still exist
+
+        Returns: list of Snapshot, oldest first
+        """
+        found = []
+        seen = set()
+        rows = self.conn.execute(
+            'SELECT * FROM snapshots WHERE dataset = ? ORDER BY captured_at DESC, id DESC',
+            (dataset,)
+        )
+        for row in rows:
+            snapshot = Snapshot(row, self.directory)
+
+            # A same-day re-capture under the same filename replaces the older
+            # entry (filenames carry no year, so the date is part of the key)
+            key = (row['source'] or row['path'], snapshot.captured_at.date())
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if snapshot.path.exists():
+                found.append(snapshot)
+                if n and len(found) == n:
+                    break
+        found.reverse()
+        return found
+
+    def sync(self, dataset, pattern):
+        """
+        Archive and register files matching pattern that are not in the
+        manifest yet (captures made before the manifest existed or copied in
+        by hand)
+
+        The capture date comes from the filename (e.g. 'OCT12'); the year is
+        the latest one that doesn't put the date after the file's mtime.
+        Raw files still on disk whose snapshot retention already removed are
+        skipped.
+        """
+        known = set()
+        for row in self.conn.execute('SELECT path, source FROM snapshots WHERE dataset = ?', (dataset,)):
+            known.add(row['path'])
+            known.add(row['source'])
+        pruned = {(row['source'], row['sha256']) for row in self.conn.execute(
+            'SELECT source, sha256 FROM pruned_sources WHERE dataset = ?', (dataset,)
+        )}
+
+        added = 0
+        for path in sorted(self.directory.glob(pattern)):
+            if path.name in known or self._relative(path) in known:
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                html = f.read()
+            if pruned and (path.name, table_sha256(extract_table(html, dataset))) in pruned:
+                continue
+            self.capture(dataset, html, path.name, captured_at=self._infer_capture_time(path))
+            added += 1
+        return added
+
+    def all(self, dataset):
+        """Every snapshot of a dataset, oldest first"""
+        rows = self.conn.execute(
+            'SELECT * FROM snapshots WHERE dataset = ? ORDER BY captured_at, id', (dataset,)
+        )
+        return [Snapshot(row, self.directory) for row in rows]
+
+    def remove(self, snapshots):
+        """
+        Delete snapshots from the manifest along with their archived files
+
+        A file is only deleted once no remaining entry (e.g. an unchanged
+        re-capture pointing at it) still uses it.
+        """
+        with self.conn:
+            self.conn.executemany(
+                'DELETE FROM snapshots WHERE id = ?', [(s.id,) for s in snapshots]
+            )
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO pruned_sources (dataset, source, sha256) VALUES (?, ?, ?)',
+                [(s.dataset, s.source, s.sha256) for s in snapshots if s.source]
+            )
+        for snapshot in snapshots:
+            still_used = self.conn.execute(
+                'SELECT 1 FROM snapshots WHERE path = ? LIMIT 1', (self._relative(snapshot.path),)
+            ).fetchone()
+            if snapshot.is_archived and not still_used and snapshot.path.exists():
+                snapshot.path.unlink()
+
+    def _relative(self, path):
+        path = Path(path)
+        try:
+            return path.resolve().relative_to(self.directory.resolve()).as_posix()
+        except ValueError:
+            return path.resolve().as_posix()
+
+    @staticmethod
+    def _infer_capture_time(path):
+        modified = datetime.fromtimestamp(path.stat().st_mtime)
+        match = MONTH_DAY_PATTERN.search(path.name)
+        if not match:
+            return modified
+
+        month = datetime.strptime(match.group(1).title(), '%b').month
+        day = int(match.group(2))
+        for year in (modified.year, modified.year - 1):
+            try:
+                captured = modified.replace(year=year, month=month, day=day)
+            except ValueError:  # e.g. FEB29 in a non-leap year
+                continue
+            if captured <= modified + timedelta(days=1):
+                return captured
+        return modified
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
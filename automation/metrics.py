@@ -0,0 +1,230 @@
+"""
+Timing spans and a metrics log for every pipeline run
+
+Wrap a stage in a span to record its wall time, CPU time, rows processed
+and bytes written:
+
+    with span('compare_inventory.write_csv') as s:
+        save_to_csv(products, output_file, old_date, new_date)
+        s.rows = len(products)
+        s.add_file(output_file)
+
+Each run appends one JSON line per span to <data folder>/metrics/run_<time>.jsonl.
+Scripts started by stock_update.py join its run (through the environment),
+so one file holds the whole pipeline. Spans outside any run are not
+recorded. Set CODPARTNER_PROM_TEXTFILE to also export the run's totals for
+the node_exporter textfile collector.
+"""
+
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+from . import profiling
+from .config import Config
+
+
+RUN_FILE_ENV = 'CODPARTNER_METRICS_FILE'  # Set by the process that started the run
+
+_run = {'file': None, 'owner': False}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def start_run(directory: Path = None):
+    """
+    Start a metrics run, or join the one a parent process started
+
+    Returns: path of the run's JSONL file
+    """
+    if _run['file'] is not None:
+        return _run['file']
+
+    inherited = os.environ.get(RUN_FILE_ENV)
+    if inherited:
+        _run['file'] = Path(inherited)
+        return _run['file']
+
+    metrics_dir = Path(directory or Config.DOWNLOAD_DIR) / Config.METRICS_DIR_NAME
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    _prune_runs(metrics_dir)
+
+    run_file = metrics_dir / f"run_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}.jsonl"
+    _run['file'] = run_file
+    _run['owner'] = True
+    os.environ[RUN_FILE_ENV] = str(run_file)
+    return run_file
+
+
+def finish_run():
+    """
+    End the run this process started: export it and print where it went
+
+    Does nothing in a process that only joined someone else's run.
+    """
+    run_file, owner = _run['file'], _run['owner']
+    _run['file'], _run['owner'] = None, False
+    if run_file is None or not owner:
+        return
+    os.environ.pop(RUN_FILE_ENV, None)
+    if not run_file.exists():
+        return
+
+    print(f"⏱️  Timings saved to: {run_file}")
+    if Config.PROMETHEUS_TEXTFILE:
+        try:
+            export_prometheus(load_run(run_file), Config.PROMETHEUS_TEXTFILE)
+        except OSError as e:
+            print(f"⚠️  Could not write Prometheus textfile: {e}")
+
+
+def _prune_runs(metrics_dir):
+    runs = sorted(metrics_dir.glob('run_*.jsonl'))
+    for old in runs[:max(0, len(runs) - Config.METRICS_KEEP_RUNS + 1)]:
+        old.unlink()
+
+
+class Span:
+    """One timed stage; set rows / add bytes while it runs"""
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+        self.rows = None
+        self.bytes = None
+
+    def add_bytes(self, count):
+        self.bytes = (self.bytes or 0) + count
+
+    def add_file(self, path):
+        """Count a written file's size"""
+        path = Path(path)
+        if path.exists():
+            self.add_bytes(path.stat().st_size)
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        # --profile: outermost spans are profiled as stages (nothing to do when off)
+        self._profile = profiling.stage_profile(self.name) if profiling.active_dir and not stack else None
+        stack.append(self)
+        self.started_at = datetime.now()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        _stack().pop()
+        if self._profile:
+            self._profile.stop()
+
+        record = {
+            'span': self.name,
+            'parent': self.parent,
+            'started_at': self.started_at.isoformat(timespec='milliseconds'),
+            'wall_s': round(wall, 4),
+            'cpu_s': round(cpu, 4),  # Whole process, so concurrent spans overlap
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'status': 'ok' if exc_type is None else 'error',
+            'pid': os.getpid(),
+        }
+        if exc_type is not None:
+            record['error'] = f"{exc_type.__name__}: {exc_val}"[:200]
+        record.update(self.labels)
+        _write(record)
+        return False
+
+
+def span(name, **labels):
+    """Time a block: `with span('stage') as s: ...`"""
+    return Span(name, **labels)
+
+
+def timed(name):
+    """Decorator form of span()"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def _write(record):
+    run_file = _run['file']
+    if run_file is None:
+        # No run started here: join the parent's, if any, and never start one
+        # that nobody would finish (and export)
+        inherited = os.environ.get(RUN_FILE_ENV)
+        if not inherited:
+            return
+        run_file = _run['file'] = Path(inherited)
+    record = {'run': run_file.stem, **record}
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with _lock:
+        with open(run_file, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def load_run(run_file):
+    """All span records of a run"""
+    with open(run_file, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def export_prometheus(records, path):
+    """
+    Write a run's per-stage totals in the Prometheus text format
+
+    The file is replaced atomically, as the node_exporter textfile collector expects.
+    """
+    totals = {}
+    for record in records:
+        total = totals.setdefault(record['span'], {'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0, 'bytes': 0, 'errors': 0})
+        total['wall_s'] += record['wall_s']
+        total['cpu_s'] += record['cpu_s']
+        total['rows'] += record.get('rows') or 0
+        total['bytes'] += record.get('bytes') or 0
+        total['errors'] += record['status'] != 'ok'
+
+    metrics = [
+        ('codpartner_stage_duration_seconds', 'wall_s', 'Wall time of the stage in the last run'),
+        ('codpartner_stage_cpu_seconds', 'cpu_s', 'Process CPU time during the stage in the last run'),
+        ('codpartner_stage_rows', 'rows', 'Rows processed by the stage in the last run'),
+        ('codpartner_stage_bytes_written', 'bytes', 'Bytes written by the stage in the last run'),
+        ('codpartner_stage_errors', 'errors', 'Failed spans of the stage in the last run'),
+    ]
+    lines = []
+    for metric, field, help_text in metrics:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} gauge')
+        for stage, total in sorted(totals.items()):
+            lines.append(f'{metric}{{stage="{_escape(stage)}"}} {round(total[field], 4)}')
+
+    lines.append('# HELP codpartner_last_run_timestamp_seconds When the last run finished')
+    lines.append('# TYPE codpartner_last_run_timestamp_seconds gauge')
+    lines.append(f'codpartner_last_run_timestamp_seconds {time.time():.0f}')
+
+    path = Path(path)
+    tmp = path.with_name(f'.{path.name}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    tmp.replace(path)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
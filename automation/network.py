@@ -0,0 +1,226 @@
+"""
+Network waterfall for downloads
+
+Hooks the page's request / requestfinished / requestfailed events while a
+download runs and records, for every request, its resource type, timing
+phases (from the Resource Timing data Playwright exposes) and size. The
+report shows the slowest XHRs, bytes per resource type and how much of the
+download was spent waiting on the network, which tells server-side table
+queries apart from front-end assets.
+
+Turned on with CODPARTNER_NETWORK_WATERFALL=1 (Config.NETWORK_WATERFALL);
+waterfalls are saved as JSON in <data folder>/network/.
+"""
+
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from urllib.parse import urlparse
+import json
+import time
+
+from .config import Config
+
+
+# Types the page could cache or block without losing table data
+STATIC_TYPES = {'script', 'stylesheet', 'image', 'font', 'media', 'manifest'}
+
+
+def waterfall(label):
+    """Decorator for CODPartnerAutomation download methods: record the page's requests"""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(bot, *args, **kwargs):
+            if not bot.config.NETWORK_WATERFALL:
+                return method(bot, *args, **kwargs)
+            recorder = NetworkRecorder(bot.page, label).start()
+            try:
+                return method(bot, *args, **kwargs)
+            finally:
+                report = recorder.stop()
+                report.print_summary()
+                report.save(Path(bot.config.DOWNLOAD_DIR) / Config.NETWORK_DIR_NAME)
+        return wrapper
+    return decorator
+
+
+class NetworkRecorder:
+    """Collects the requests a page makes between start() and stop()"""
+
+    def __init__(self, page, label):
+        self.page = page
+        self.label = label
+        self._requests = []
+        self._seen = {}
+        self._failures = {}
+
+    def start(self):
+        self.started_at = time.time()
+        self.page.on('request', self._on_request)
+        self.page.on('requestfinished', self._on_finished)
+        self.page.on('requestfailed', self._on_failed)
+        return self
+
+    def _on_request(self, request):
+        self._seen[id(request)] = {'sent': time.time(), 'done': None}
+        self._requests.append(request)
+
+    def _on_finished(self, request):
+        if id(request) in self._seen:
+            self._seen[id(request)]['done'] = time.time()
+
+    def _on_failed(self, request):
+        if id(request) in self._seen:
+            self._seen[id(request)]['done'] = time.time()
+            self._failures[id(request)] = request.failure or 'failed'
+
+    def stop(self):
+        """Detach and build the report (sizes are looked up here, not while downloading)"""
+        self.page.remove_listener('request', self._on_request)
+        self.page.remove_listener('requestfinished', self._on_finished)
+        self.page.remove_listener('requestfailed', self._on_failed)
+        finished_at = time.time()
+
+        entries = []
+        for request in self._requests:
+            seen = self._seen[id(request)]
+            entries.append(self._entry(request, seen, finished_at))
+        return NetworkReport(self.label, self.started_at, finished_at, entries)
+
+    def _entry(self, request, seen, finished_at):
+        timing = request.timing
+        # Resource Timing values are ms relative to startTime (-1 when unknown)
+        start = timing['startTime'] / 1000 if timing.get('startTime', -1) > 0 else seen['sent']
+        end = start + timing['responseEnd'] / 1000 if timing.get('responseEnd', -1) >= 0 else (seen['done'] or finished_at)
+
+        def phase(a, b):
+            if timing.get(a, -1) < 0 or timing.get(b, -1) < 0:
+                return None
+            return round((timing[b] - timing[a]) / 1000, 4)
+
+        entry = {
+            'url': request.url,
+            'method': request.method,
+            'type': request.resource_type,
+            'start': round(start - self.started_at, 4),
+            'duration': round(end - start, 4),
+            'dns': phase('domainLookupStart', 'domainLookupEnd'),
+            'connect': phase('connectStart', 'connectEnd'),
+            'wait': phase('requestStart', 'responseStart'),  # Time to first byte: server time
+            'download': phase('responseStart', 'responseEnd'),
+            'status': None,
+            'bytes': 0,
+            'failure': self._failures.get(id(request)),
+        }
+        if entry['failure'] is None and seen['done'] is not None:
+            try:
+                response = request.response()
+                entry['status'] = response.status if response else None
+                sizes = request.sizes()
+                entry['bytes'] = sizes['responseBodySize'] + sizes['responseHeadersSize']
+            except Exception:
+                pass
+        return entry
+
+
+class NetworkReport:
+    """Waterfall of one download, with a summary of where the time went"""
+
+    def __init__(self, label, started_at, finished_at, entries):
+        self.label = label
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.entries = entries
+
+    @property
+    def wall(self):
+        return self.finished_at - self.started_at
+
+    def busy_time(self, types=None):
+        """Time with at least one request (of these types) in flight"""
+        spans = sorted(
+            (e['start'], e['start'] + e['duration'])
+            for e in self.entries if types is None or e['type'] in types
+        )
+        busy, current_start, current_end = 0.0, None, None
+        for start, end in spans:
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    busy += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            busy += current_end - current_start
+        return busy
+
+    def by_type(self):
+        """{resource type: {'requests', 'bytes', 'seconds'}}"""
+        totals = {}
+        for e in self.entries:
+            total = totals.setdefault(e['type'], {'requests': 0, 'bytes': 0, 'seconds': 0.0})
+            total['requests'] += 1
+            total['bytes'] += e['bytes']
+            total['seconds'] += e['duration']
+        return totals
+
+    def slowest(self, types=('xhr', 'fetch', 'document'), limit=None):
+        limit = limit or Config.NETWORK_SLOWEST
+        matching = [e for e in self.entries if e['type'] in types]
+        return sorted(matching, key=lambda e: e['duration'], reverse=True)[:limit]
+
+    def summary(self):
+        static = [e for e in self.entries if e['type'] in STATIC_TYPES]
+        return {
+            'label': self.label,
+            'requests': len(self.entries),
+            'bytes': sum(e['bytes'] for e in self.entries),
+            'wall_s': round(self.wall, 3),
+            'network_busy_s': round(self.busy_time(), 3),
+            'xhr_busy_s': round(self.busy_time({'xhr', 'fetch'}), 3),
+            'static_requests': len(static),
+            'static_bytes': sum(e['bytes'] for e in static),
+            'static_busy_s': round(self.busy_time(STATIC_TYPES), 3),
+            'failed': sum(1 for e in self.entries if e['failure']),
+            'by_type': self.by_type(),
+        }
+
+    def print_summary(self):
+        s = self.summary()
+        print(f"\n🌐 Network waterfall - {self.label}: {s['requests']} requests, "
+              f"{s['bytes'] / (1024 * 1024):.1f} MB in {s['wall_s']:.1f}s")
+        print(f"   Waiting on the network: {s['network_busy_s']:.1f}s "
+              f"(table/XHR queries {s['xhr_busy_s']:.1f}s, static assets {s['static_busy_s']:.1f}s); "
+              f"the rest is sleeps and browser work")
+        for resource_type, total in sorted(s['by_type'].items(), key=lambda item: -item[1]['seconds']):
+            print(f"   {resource_type:<11} {total['requests']:>4} req {total['bytes'] / 1024:>9.0f} KB "
+                  f"{total['seconds']:>7.2f}s")
+        slowest = self.slowest()
+        if slowest:
+            print("   Slowest requests:")
+            for e in slowest:
+                wait = f"server {e['wait']:.2f}s" if e['wait'] is not None else "server ?"
+                print(f"     {e['duration']:>6.2f}s  {wait:<14} {e['bytes'] / 1024:>7.0f} KB  "
+                      f"{e['method']} {_short_url(e['url'])}")
+        if s['static_requests']:
+            print(f"   💡 Static assets: {s['static_requests']} requests, "
+                  f"{s['static_bytes'] / 1024:.0f} KB - what caching or blocking could save")
+        if s['failed']:
+            print(f"   ⚠️  {s['failed']} request(s) failed")
+
+    def save(self, directory):
+        """Write the waterfall and summary as JSON; returns the file path"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        started = datetime.fromtimestamp(self.started_at)
+        path = directory / f"{self.label}_{started:%Y%m%d_%H%M%S}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': self.summary(), 'requests': self.entries}, f, indent=2)
+        print(f"   💾 Waterfall saved to: {path}")
+        return path
+
+
+def _short_url(url, width=80):
+    parsed = urlparse(url)
+    text = parsed.path + (f"?{parsed.query}" if parsed.query else '')
+    return text if len(text) <= width else text[:width - 3] + '...'
@@ -0,0 +1,157 @@
+"""
+Order detail enrichment for flagged orders
+
+The orders table only has the reference, dates and statuses; the product,
+customer city and notes are on each order's detail page. fetch_order_details
+reads those pages concurrently over the browser's logged-in session: the
+context's cookies are sent with plain HTTP requests from a small thread
+pool (Config.ORDER_DETAILS_WORKERS), each with its own timeout, so no extra
+pages or logins are needed. Results are kept in the orders store by
+reference and never fetched twice.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+import re
+
+from bs4 import BeautifulSoup
+
+from .config import Config
+
+
+# Detail fields and the labels they appear under on the detail page
+DETAIL_LABELS = {
+    'product': ('product', 'item', 'article'),
+    'city': ('city', 'town'),
+    'notes': ('note', 'comment', 'remark'),
+    'shipping_status': ('shipping status', 'delivery status'),
+}
+LABEL_VALUE = re.compile(r'^\s*([A-Za-z][A-Za-z /]{1,30}?)\s*:\s*(\S.*)$')
+
+
+class SessionExpired(Exception):
+    """The dashboard sent a detail request back to the login page"""
+
+
+def order_number(reference):
+    """#COD5829541 -> 5829541"""
+    return reference.replace('#COD', '')
+
+
+def _field(label):
+    label = label.strip().lower()
+    for field, words in DETAIL_LABELS.items():
+        if any(word in label for word in words):
+            return field
+    return None
+
+
+def parse_order_detail(html):
+    """
+    Product(s), customer city, notes and shipping status from an order detail page
+
+    Reads label/value pairs wherever the page has them: definition lists,
+    two-cell table rows, "Label: value" lines and tables with a Product
+    column (several products are joined with ', ').
+
+    Returns: dict with product, city, notes and shipping_status ('' when not found)
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    found = {field: [] for field in DETAIL_LABELS}
+
+    def add(label, value):
+        field = _field(label)
+        value = ' '.join(value.split())
+        if field and value and value not in found[field]:
+            found[field].append(value)
+
+    for dt in soup.find_all('dt'):
+        dd = dt.find_next_sibling('dd')
+        if dd:
+            add(dt.get_text(' ', strip=True), dd.get_text(' ', strip=True))
+
+    for table in soup.find_all('table'):
+        headers = [th.get_text(' ', strip=True) for th in table.find_all('th')]
+        columns = [i for i, header in enumerate(headers) if _field(header) == 'product']
+        for tr in table.find_all('tr'):
+            cells = tr.find_all(['th', 'td'])
+            if len(cells) == 2 and cells[0].name == 'th' and cells[1].name == 'td':
+                add(cells[0].get_text(' ', strip=True), cells[1].get_text(' ', strip=True))
+                continue
+            tds = tr.find_all('td')
+            if columns and len(tds) == len(headers):
+                for i in columns:
+                    add(headers[i], tds[i].get_text(' ', strip=True))
+
+    for line in soup.get_text('\n').splitlines():
+        match = LABEL_VALUE.match(line)
+        if match:
+            add(match.group(1), match.group(2))
+
+    return {field: ', '.join(values) for field, values in found.items()}
+
+
+def _cookie_header(cookies, url):
+    host = urlparse(url).hostname or ''
+    return '; '.join(
+        f"{c['name']}={c['value']}" for c in cookies
+        if host == c['domain'].lstrip('.') or host.endswith('.' + c['domain'].lstrip('.'))
+    )
+
+
+def _fetch(url, headers, timeout):
+    request = Request(url, headers=headers)
+    with urlopen(request, timeout=timeout) as response:
+        if urlparse(response.geturl()).path.rstrip('/').endswith('/login'):
+            raise SessionExpired(f"Redirected to the login page for {url}")
+        charset = response.headers.get_content_charset() or 'utf-8'
+        return response.read().decode(charset, errors='replace')
+
+
+def fetch_order_details(references, cookies, base_url=None, user_agent=None, workers=None, timeout=None):
+    """
+    Fetch and parse the detail pages of some orders, several at a time
+
+    Args:
+        references: Order references ('#COD5829541')
+        cookies: The logged-in browser context's cookies (context.cookies())
+        base_url: Dashboard URL (default: Config.BASE_URL)
+        user_agent: User-Agent sent with the requests (the browser's, ideally)
+        workers: Requests in flight at once (default: Config.ORDER_DETAILS_WORKERS)
+        timeout: Seconds each request may take (default: Config.ORDER_DETAILS_TIMEOUT)
+
+    Returns: (details, errors) - reference -> parsed fields, reference -> error message
+    """
+    base_url = (base_url or Config.BASE_URL).rstrip('/')
+    workers = workers or Config.ORDER_DETAILS_WORKERS
+    timeout = timeout or Config.ORDER_DETAILS_TIMEOUT
+    headers = {'Cookie': _cookie_header(cookies, base_url), 'Accept': 'text/html'}
+    if user_agent:
+        headers['User-Agent'] = user_agent
+
+    def enrich(reference):
+        url = f'{base_url}/orders/{order_number(reference)}'
+        try:
+            return reference, parse_order_detail(_fetch(url, headers, timeout)), None
+        except Exception as e:
+            # Truncated responses, unknown charsets and parser errors only lose this order
+            return reference, None, e
+
+    details, errors = {}, {}
+    expired = False
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='order-details') as pool:
+        for reference, fields, error in pool.map(enrich, references):
+            if error is None:
+                details[reference] = fields
+            elif isinstance(error, HTTPError):
+                errors[reference] = f"HTTP {error.code}"
+            elif isinstance(error, (SessionExpired, URLError, OSError)):
+                errors[reference] = str(getattr(error, 'reason', error))
+                expired = expired or isinstance(error, SessionExpired)
+            else:
+                errors[reference] = f"{type(error).__name__}: {error}"
+    if expired:
+        print("⚠️  The session expired while fetching order details; the rest will be retried next run")
+    return details, errors
@@ -0,0 +1,363 @@
+import re
+from datetime import datetime
+from pathlib import Path
+
+from .config import Config
+from .database import connect, ensure_columns
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    reference TEXT PRIMARY KEY,     -- '#COD5829541'
+    order_number INTEGER NOT NULL,  -- 5829541; grows with every new order
+    order_date TEXT,                -- as shown on the dashboard ('2025-10-14 20:47:48')
+    status TEXT,
+    shipping_status TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+
+-- Newest order an ingestion run got to (single row)
+CREATE TABLE IF NOT EXISTS orders_watermark (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    order_number INTEGER NOT NULL,
+    order_date TEXT,
+    updated_at TEXT NOT NULL
+);
+
+-- One row per orders update (incremental ingestion or snapshot processing)
+CREATE TABLE IF NOT EXISTS orders_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_at TEXT NOT NULL,
+    source TEXT NOT NULL            -- 'ingest' or 'snapshot'
+);
+
+-- Shipping status transitions, recorded by the run that saw them
+CREATE TABLE IF NOT EXISTS order_status_changes (
+    run_id INTEGER NOT NULL,
+    reference TEXT NOT NULL,
+    old_shipping_status TEXT,
+    new_shipping_status TEXT,
+    changed_at TEXT NOT NULL
+);
+
+-- Fields read from each order's detail page (enrichment), fetched once per order
+CREATE TABLE IF NOT EXISTS order_details (
+    reference TEXT PRIMARY KEY,
+    product TEXT,
+    city TEXT,                      -- customer city
+    notes TEXT,
+    fetched_at TEXT NOT NULL
+);
+"""
+
+# Added after the orders table was first created
+ORDER_COLUMNS = {
+    'not_available': 'INTEGER NOT NULL DEFAULT 0',  # shipping status is 'Not Available'
+    'not_available_since': 'TEXT',                  # start of the current Not Available stretch
+    'resolved_at': 'TEXT',                          # when it last left Not Available
+    'last_run_id': 'INTEGER',                       # latest orders run that saw it
+}
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_orders_number ON orders (order_number);
+CREATE INDEX IF NOT EXISTS idx_orders_shipping_status ON orders (shipping_status);
+CREATE INDEX IF NOT EXISTS idx_orders_first_seen ON orders (first_seen);
+CREATE INDEX IF NOT EXISTS idx_orders_not_available ON orders (not_available, not_available_since);
+CREATE INDEX IF NOT EXISTS idx_order_status_changes_run ON order_status_changes (run_id);
+CREATE INDEX IF NOT EXISTS idx_order_status_changes_reference ON order_status_changes (reference);
+"""
+
+REFERENCE_PATTERN = re.compile(r'#COD(\d+)')
+
+
+def is_not_available(shipping_status):
+    return 'not available' in (shipping_status or '').lower()
+
+
+# Orders-table header labels (lowercase, exact) of the fields read from each row
+ORDER_COLUMN_LABELS = {
+    'reference': ('reference', 'ref', 'order'),
+    'order_date': ('date', 'order date', 'created at'),
+    'product': ('product', 'products'),
+    'status': ('status', 'order status'),
+    'shipping_status': ('shipping', 'shipping status', 'delivery status'),
+}
+# Cell positions for tables without a header row
+DEFAULT_ORDER_COLUMNS = {'reference': 0, 'order_date': 2, 'product': 3, 'status': 6, 'shipping_status': 7}
+
+
+def order_columns(headers):
+    """
+    Cell index of each order field, mapped from the orders table's header labels
+
+    A table without header labels keeps the usual positions
+    (DEFAULT_ORDER_COLUMNS). Fields without a matching header are left out
+    (read as ''); the reference and shipping columns must be there.
+    """
+    labels = [' '.join(header.split()).lower() for header in headers or []]
+    if not any(labels):
+        return dict(DEFAULT_ORDER_COLUMNS)
+
+    columns = {}
+    for field, names in ORDER_COLUMN_LABELS.items():
+        index = next((i for i, label in enumerate(labels) if label in names), None)
+        if index is not None:
+            columns[field] = index
+
+    missing = [field for field in ('reference', 'shipping_status') if field not in columns]
+    if missing:
+        raise ValueError(f"Orders table has no {' or '.join(missing)} column (headers: {headers})")
+    return columns
+
+
+def order_from_cells(cells, columns=None):
+    """
+    Order dict from the text of one orders-table row, or None for other rows
+
+    Args:
+        cells: Cell texts of the row
+        columns: Field -> cell index, from order_columns() (usual positions if omitted)
+    """
+    columns = columns or DEFAULT_ORDER_COLUMNS
+    if len(cells) <= max(columns.values()):
+        return None
+    match = REFERENCE_PATTERN.match(cells[columns['reference']].strip())
+    if not match:
+        return None
+
+    def cell(field):
+        return cells[columns[field]].strip() if field in columns else ''
+
+    return {
+        'reference': match.group(0),
+        'order_number': int(match.group(1)),
+        'order_date': cell('order_date'),
+        'product': cell('product'),
+        'status': cell('status'),
+        'shipping_status': cell('shipping_status'),
+    }
+
+
+class OrdersStore:
+    """
+    Local copy of the dashboard's orders, keyed by reference
+
+    Filled incrementally: each ingestion run reads the orders table newest
+    first and stops once it reaches orders it already has (the watermark)
+    and the oldest recent order (refresh_floor), so a run's cost follows the
+    number of new and recent orders, not the whole history. Older Not
+    Available orders are re-checked one by one (not_available_before).
+
+    Shipping status transitions are recorded per run, so how long an order
+    has been Not Available, and which orders left that state since the last
+    run, are indexed queries rather than diffs of old CSVs.
+    """
+
+    def __init__(self, directory: Path = None):
+        self.directory = Path(directory or Config.DOWNLOAD_DIR)
+        self.conn = connect(self.directory)
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.executescript(INDEXES)
+
+    def _migrate(self):
+        existing = {row['name'] for row in self.conn.execute('PRAGMA table_info(orders)')}
+        ensure_columns(self.conn, 'orders', ORDER_COLUMNS)
+        if 'not_available' not in existing:
+            # Orders stored before aging was tracked: count from when they were first seen
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE orders SET not_available = 1, not_available_since = first_seen "
+                    "WHERE LOWER(shipping_status) LIKE '%not available%'"
+                )
+
+    def watermark(self):
+        """Order number of the newest order ingested so far (None before the first run)"""
+        row = self.conn.execute('SELECT order_number FROM orders_watermark WHERE id = 1').fetchone()
+        return row['order_number'] if row else None
+
+    def advance_watermark(self, order_number, order_date=None):
+        """Move the watermark forward (never back)"""
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO orders_watermark (id, order_number, order_date, updated_at) VALUES (1, ?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET order_number = excluded.order_number, '
+                'order_date = excluded.order_date, updated_at = excluded.updated_at '
+                'WHERE excluded.order_number > orders_watermark.order_number',
+                (order_number, order_date, datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def refresh_floor(self, since):
+        """
+        Order number of the oldest order placed since `since` (a datetime), or None
+
+        Recent orders can still change shipping status, so incremental runs
+        read the table back to this one.
+        """
+        return self.conn.execute(
+            'SELECT MIN(order_number) FROM orders WHERE order_date >= ?',
+            (since.strftime('%Y-%m-%d %H:%M:%S'),)
+        ).fetchone()[0]
+
+    def not_available_before(self, since, run_id):
+        """References of Not Available orders placed before `since` that run run_id has not seen"""
+        return [row['reference'] for row in self.conn.execute(
+            'SELECT reference FROM orders WHERE not_available = 1 AND order_date < ? '
+            'AND COALESCE(last_run_id, 0) != ? ORDER BY order_number',
+            (since.strftime('%Y-%m-%d %H:%M:%S'), run_id)
+        )]
+
+    def orders(self, references):
+        """Stored orders by reference (as upsert() takes them)"""
+        found = []
+        references = list(references)
+        for start in range(0, len(references), 500):
+            chunk = references[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            found += [dict(row) for row in self.conn.execute(
+                'SELECT reference, order_number, order_date, status, shipping_status '
+                f'FROM orders WHERE reference IN ({placeholders})', chunk
+            )]
+        return found
+
+    def new_run(self, source):
+        """Start an orders update; pass the returned id to upsert()"""
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO orders_runs (run_at, source) VALUES (?, ?)',
+                (datetime.now().isoformat(timespec='seconds'), source)
+            )
+        return cursor.lastrowid
+
+    def upsert(self, orders, seen_at=None, run_id=None):
+        """
+        Insert new orders and refresh the status of known ones
+
+        Shipping status changes of known orders are logged under run_id
+        (a run is started if none is given).
+
+        Returns: (new orders, orders whose status changed)
+        """
+        if not orders:
+            return 0, 0
+        seen_at = (seen_at or datetime.now()).isoformat(timespec='seconds')
+        run_id = run_id or self.new_run('upsert')
+        references = [o['reference'] for o in orders]
+        known = {}
+        for start in range(0, len(references), 500):
+            chunk = references[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for row in self.conn.execute(
+                f'SELECT reference, status, shipping_status FROM orders WHERE reference IN ({placeholders})', chunk
+            ):
+                known[row['reference']] = (row['status'], row['shipping_status'])
+
+        new = sum(1 for o in orders if o['reference'] not in known)
+        changed = sum(
+            1 for o in orders
+            if o['reference'] in known and known[o['reference']] != (o['status'], o['shipping_status'])
+        )
+        transitions = [
+            (run_id, o['reference'], known[o['reference']][1], o['shipping_status'], seen_at)
+            for o in orders
+            if o['reference'] in known and known[o['reference']][1] != o['shipping_status']
+        ]
+        rows = [
+            {**o, 'seen_at': seen_at, 'not_available': int(is_not_available(o['shipping_status'])),
+             'since': seen_at if is_not_available(o['shipping_status']) else None, 'run_id': run_id}
+            for o in orders
+        ]
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO orders (reference, order_number, order_date, status, shipping_status, '
+                'first_seen, last_seen, not_available, not_available_since, last_run_id) '
+                'VALUES (:reference, :order_number, :order_date, :status, :shipping_status, '
+                ':seen_at, :seen_at, :not_available, :since, :run_id) '
+                'ON CONFLICT (reference) DO UPDATE SET order_date = excluded.order_date, status = excluded.status, '
+                'shipping_status = excluded.shipping_status, last_seen = excluded.last_seen, '
+                'last_run_id = excluded.last_run_id, '
+                'resolved_at = CASE WHEN orders.not_available = 1 AND excluded.not_available = 0 '
+                'THEN excluded.last_seen WHEN excluded.not_available = 1 THEN NULL ELSE orders.resolved_at END, '
+                'not_available_since = CASE WHEN excluded.not_available = 1 '
+                'THEN COALESCE(orders.not_available_since, excluded.not_available_since) ELSE NULL END, '
+                'not_available = excluded.not_available',
+                rows
+            )
+            self.conn.executemany(
+                'INSERT INTO order_status_changes (run_id, reference, old_shipping_status, new_shipping_status, changed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                transitions
+            )
+        return new, changed
+
+    def not_available(self, now=None, fresh_only=False):
+        """
+        Orders currently 'Not Available', longest-stuck first
+
+        Each dict has the order's columns plus age_days (whole days since it
+        became Not Available) and stale: 1 when the latest orders run did not
+        see the order, so its status is only known as of last_seen.
+
+        Args:
+            fresh_only: Leave out stale orders
+        """
+        now = (now or datetime.now()).isoformat(timespec='seconds')
+        rows = [dict(row) for row in self.conn.execute(
+            'SELECT *, CAST(julianday(?) - julianday(not_available_since) AS INTEGER) AS age_days, '
+            'COALESCE(last_run_id < (SELECT MAX(id) FROM orders_runs), 1) AS stale '
+            'FROM orders WHERE not_available = 1 ORDER BY not_available_since, order_number',
+            (now,)
+        )]
+        return [row for row in rows if not row['stale']] if fresh_only else rows
+
+    def resolved_since_last_run(self):
+        """Orders that left 'Not Available' in the latest run (with their new shipping status)"""
+        return [dict(row) for row in self.conn.execute(
+            'SELECT c.reference, c.old_shipping_status, c.new_shipping_status, c.changed_at, o.order_date '
+            'FROM order_status_changes c JOIN orders o ON o.reference = c.reference '
+            "WHERE c.run_id = (SELECT MAX(id) FROM orders_runs) AND LOWER(c.old_shipping_status) LIKE '%not available%' "
+            "AND LOWER(COALESCE(c.new_shipping_status, '')) NOT LIKE '%not available%' "
+            'ORDER BY o.order_number DESC'
+        )]
+
+    def details(self, references):
+        """Enriched fields of the given orders that have them: reference -> dict"""
+        found = {}
+        references = list(references)
+        for start in range(0, len(references), 500):
+            chunk = references[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for row in self.conn.execute(
+                f'SELECT reference, product, city, notes FROM order_details WHERE reference IN ({placeholders})', chunk
+            ):
+                found[row['reference']] = dict(row)
+        return found
+
+    def save_details(self, details, fetched_at=None):
+        """Store enriched fields (reference -> dict with product, city, notes)"""
+        fetched_at = (fetched_at or datetime.now()).isoformat(timespec='seconds')
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO order_details (reference, product, city, notes, fetched_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (reference) DO UPDATE SET product = excluded.product, city = excluded.city, '
+                'notes = excluded.notes, fetched_at = excluded.fetched_at',
+                [(reference, fields.get('product', ''), fields.get('city', ''), fields.get('notes', ''), fetched_at)
+                 for reference, fields in details.items()]
+            )
+
+    def details_updated(self):
+        """When order details were last stored (None before any enrichment)"""
+        return self.conn.execute('SELECT MAX(fetched_at) FROM order_details').fetchone()[0]
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
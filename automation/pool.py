@@ -0,0 +1,438 @@
+"""
+Page pool and job queue for running many scrape jobs at once
+
+One Chromium process is launched and exposed over CDP. Each pool worker is a
+thread with its own Playwright connection (the sync API is not thread-safe),
+its own isolated browser context and one leased page. Download jobs are pulled
+from a shared queue, so throughput grows with the pool size while the
+dashboard only ever sees one browser.
+
+Usage:
+    with PagePool(size=3) as pool:
+        pool.submit(DownloadJob('inventory', 'download_inventory'))
+        pool.submit(DownloadJob('orders', 'download_orders'))
+        results = pool.join()
+        pool.stats.print_summary()
+"""
+
+from playwright.sync_api import sync_playwright
+import queue
+import threading
+import time
+
+from .config import Config
+from .codpartner import CODPartnerAutomation
+
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class DownloadJob:
+    """A unit of work that runs against a leased page"""
+
+    def __init__(self, name, action, retries=1, **kwargs):
+        """
+        Args:
+            name: Label used in stats and logs
+            action: CODPartnerAutomation method name (e.g. 'download_inventory')
+                    or a callable taking the bound bot
+            retries: Extra attempts (on a fresh page) when the job fails
+            **kwargs: Passed through to the action
+        """
+        self.name = name
+        self.action = action
+        self.retries = retries
+        self.kwargs = kwargs
+
+    def run(self, bot):
+        """Execute the job with a bot bound to a leased page"""
+        if callable(self.action):
+            return self.action(bot, **self.kwargs)
+        return getattr(bot, self.action)(**self.kwargs)
+
+
+class JobResult:
+    """Outcome and timing of one job"""
+
+    def __init__(self, job, worker):
+        self.name = job.name
+        self.worker = worker
+        self.ok = False
+        self.value = None
+        self.error = None
+        self.attempts = 0
+        self.queued_at = time.time()
+        self.started_at = None
+        self.duration = 0.0
+
+    @property
+    def wait_time(self):
+        """Seconds spent in the queue before the first attempt"""
+        if self.started_at is None:
+            return 0.0
+        return self.started_at - self.queued_at
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f'failed: {self.error}'
+        return f"<JobResult {self.name} {status} {self.duration:.1f}s>"
+
+
+class PoolStats:
+    """Thread-safe per-job timing and failure stats"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.results = []
+        self.recycled_pages = 0
+        self.crashed_pages = 0
+
+    def record(self, result):
+        with self._lock:
+            self.results.append(result)
+
+    def page_recycled(self, crashed=False):
+        with self._lock:
+            self.recycled_pages += 1
+            if crashed:
+                self.crashed_pages += 1
+
+    def summary(self):
+        """Aggregate stats as a dict (overall and per job name)"""
+        with self._lock:
+            results = list(self.results)
+
+        def aggregate(items):
+            durations = sorted(r.duration for r in items)
+            if not durations:
+                return {'jobs': 0, 'failed': 0}
+            return {
+                'jobs': len(items),
+                'failed': sum(1 for r in items if not r.ok),
+                'retried': sum(1 for r in items if r.attempts > 1),
+                'mean_s': round(sum(durations) / len(durations), 3),
+                'p95_s': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+                'max_s': round(durations[-1], 3),
+                'mean_wait_s': round(sum(r.wait_time for r in items) / len(items), 3),
+            }
+
+        by_name = {}
+        for result in results:
+            by_name.setdefault(result.name, []).append(result)
+
+        return {
+            'total': aggregate(results),
+            'jobs': {name: aggregate(items) for name, items in by_name.items()},
+            'recycled_pages': self.recycled_pages,
+            'crashed_pages': self.crashed_pages,
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        total = summary['total']
+        print("📈 Pool stats:")
+        print(f"   Jobs: {total['jobs']} | Failed: {total['failed']} | "
+              f"Pages recycled: {summary['recycled_pages']} (crashed: {summary['crashed_pages']})")
+        for name, stats in summary['jobs'].items():
+            print(f"   - {name}: {stats['jobs']} run(s), {stats['failed']} failed, "
+                  f"mean {stats['mean_s']}s, p95 {stats['p95_s']}s, max {stats['max_s']}s")
+
+
+class SharedBrowser:
+    """One Chromium process that several threads drive over CDP"""
+
+    def __init__(self, config: Config = None, port: int = None):
+        self.config = config or Config()
+        self.port = port or self.config.POOL_CDP_PORT
+        self.endpoint = f'http://127.0.0.1:{self.port}'
+        self.playwright = None
+        self.browser = None
+
+    def start(self):
+        print(f"🚀 Starting shared browser (CDP port {self.port})...")
+        self.playwright = sync_playwright().start()
+        self.browser = self.playwright.chromium.launch(
+            headless=not self.config.SHOW_BROWSER,
+            args=[
+                '--disable-blink-features=AutomationControlled',
+                f'--remote-debugging-port={self.port}',
+            ]
+        )
+        print("✅ Shared browser started")
+        return self
+
+    def stop(self):
+        try:
+            if self.browser:
+                self.browser.close()
+            if self.playwright:
+                self.playwright.stop()
+        except Exception as e:
+            print(f"⚠️  Error closing shared browser: {e}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class _Lease:
+    """A worker's current context/page and its health"""
+
+    def __init__(self, context, page, bot):
+        self.context = context
+        self.page = page
+        self.bot = bot
+        self.jobs_run = 0
+        self.crashed = False
+        page.on('crash', lambda _: setattr(self, 'crashed', True))
+
+    def is_healthy(self, max_heap_mb):
+        if self.crashed or self.page.is_closed():
+            return False
+        if not max_heap_mb:
+            return True
+        try:
+            heap = self.page.evaluate(
+                '() => performance.memory ? performance.memory.usedJSHeapSize : 0'
+            )
+        except Exception:
+            return False
+        return heap < max_heap_mb * 1024 * 1024
+
+    def close(self):
+        try:
+            self.context.close()
+        except Exception:
+            pass
+        self.bot.release()
+
+
+class PagePool:
+    """Fixed-size pool of pages consuming a queue of DownloadJobs"""
+
+    _STOP = object()
+
+    def __init__(self, size: int = None, config: Config = None,
+                 browser: SharedBrowser = None, login: bool = True):
+        """
+        Args:
+            size: Number of concurrent pages (defaults to Config.POOL_SIZE)
+            config: Config used for the bots, login and rate limits
+            browser: SharedBrowser to attach to; one is launched if omitted
+            login: Log in once and share the session with every page
+        """
+        self.config = config or Config()
+        self.size = size or self.config.POOL_SIZE
+        self.login = login
+        self.stats = PoolStats()
+
+        self._browser = browser
+        self._owns_browser = browser is None
+        self._queue = queue.Queue()
+        self._results = []
+        self._results_lock = threading.Lock()
+        self._workers = []
+        self._alive = 0
+        self._alive_lock = threading.Lock()
+
+        # Login once, then hand the cookies to every new context
+        self._login_lock = threading.Lock()
+        self._storage_state = None
+
+        # Spacing between job starts across the whole pool
+        self._throttle_lock = threading.Lock()
+        self._next_start = 0.0
+
+    def start(self):
+        if self._browser is None:
+            self._browser = SharedBrowser(self.config).start()
+
+        print(f"🧵 Starting page pool with {self.size} worker(s)")
+        self._alive = self.size
+        for index in range(self.size):
+            worker = threading.Thread(
+                target=self._work, args=(index,),
+                name=f'page-pool-{index}', daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    def submit(self, job: DownloadJob):
+        """Queue a job; returns its JobResult (filled in when the job finishes)"""
+        result = JobResult(job, worker=None)
+        with self._results_lock:
+            self._results.append(result)
+        self._queue.put((job, result))
+        return result
+
+    def join(self):
+        """Wait for all queued jobs and return their results in submit order"""
+        self._queue.join()
+        with self._results_lock:
+            results, self._results = self._results, []
+        return results
+
+    def run(self, jobs):
+        """Submit jobs and wait for them"""
+        for job in jobs:
+            self.submit(job)
+        return self.join()
+
+    def stop(self):
+        for _ in self._workers:
+            self._queue.put(self._STOP)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+        if self._owns_browser and self._browser:
+            self._browser.stop()
+            self._browser = None
+        print("👋 Page pool stopped")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # Worker side
+
+    def _work(self, index):
+        try:
+            playwright = sync_playwright().start()
+            browser = playwright.chromium.connect_over_cdp(self._browser.endpoint)
+        except Exception as e:
+            print(f"❌ Worker {index} could not connect to the shared browser: {e}")
+            self._worker_lost(index, f"{type(e).__name__}: {e}")
+            return
+
+        lease = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is self._STOP:
+                    self._queue.task_done()
+                    break
+
+                job, result = item
+                result.worker = index
+                try:
+                    lease = self._run_job(browser, lease, job, result)
+                except Exception as e:
+                    # Never let one job take the worker (and the queue) down
+                    result.ok = False
+                    result.error = f"{type(e).__name__}: {e}"
+                    print(f"⚠️  Job {job.name} failed: {e}")
+                finally:
+                    self.stats.record(result)
+                    self._queue.task_done()
+        finally:
+            if lease:
+                lease.close()
+            try:
+                browser.close()
+                playwright.stop()
+            except Exception:
+                pass
+
+    def _worker_lost(self, index, error):
+        """
+        A worker that never got a browser leaves its jobs to the others;
+        the last one left fails every queued job so join() returns
+        """
+        with self._alive_lock:
+            self._alive -= 1
+            if self._alive > 0:
+                return
+
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                self._queue.task_done()
+                break
+            job, result = item
+            result.worker = index
+            result.error = f"No browser connection: {error}"
+            print(f"❌ Job {job.name} failed: no worker could connect to the browser")
+            self.stats.record(result)
+            self._queue.task_done()
+
+    def _run_job(self, browser, lease, job, result):
+        """Run a job (with retries), recycling the page whenever it goes bad"""
+        while result.attempts <= job.retries:
+            result.attempts += 1
+            if result.started_at is None:
+                result.started_at = time.time()
+
+            if lease is None:
+                try:
+                    lease = self._open_lease(browser)
+                except Exception as e:
+                    # Context creation or the shared login failed; retry on a new one
+                    result.error = f"{type(e).__name__}: {e}"
+                    print(f"⚠️  Job {job.name} could not get a page (attempt {result.attempts}): {e}")
+                    continue
+
+            self._throttle()
+            attempt_start = time.perf_counter()
+            try:
+                result.value = job.run(lease.bot)
+                result.ok = True
+                result.error = None
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+                print(f"⚠️  Job {job.name} failed (attempt {result.attempts}): {e}")
+            finally:
+                result.duration += time.perf_counter() - attempt_start
+                lease.jobs_run += 1
+
+            # A failed job may have left the page in an unknown state
+            if (not result.ok
+                    or lease.jobs_run >= self.config.POOL_RECYCLE_AFTER
+                    or not lease.is_healthy(self.config.POOL_MAX_HEAP_MB)):
+                self.stats.page_recycled(crashed=lease.crashed)
+                lease.close()
+                lease = None
+
+            if result.ok:
+                break
+
+        return lease
+
+    def _open_lease(self, browser):
+        """Create a fresh isolated context and page for this worker"""
+        with self._login_lock:
+            context = browser.new_context(
+                user_agent=USER_AGENT,
+                storage_state=self._storage_state
+            )
+            bot = None
+            try:
+                page = context.new_page()
+                bot = CODPartnerAutomation(self.config).attach(context, page)
+
+                if self.login and self._storage_state is None:
+                    bot.login()
+                    self._storage_state = context.storage_state()
+            except Exception:
+                context.close()
+                if bot:
+                    bot.release()
+                raise
+
+        return _Lease(context, page, bot)
+
+    def _throttle(self):
+        """Space out job starts so the dashboard's rate limit is respected"""
+        interval = self.config.POOL_MIN_JOB_INTERVAL
+        if not interval:
+            return
+        with self._throttle_lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + interval
+        if start_at > now:
+            time.sleep(start_at - now)
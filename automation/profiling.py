@@ -0,0 +1,168 @@
+"""
+Opt-in profiling of pipeline stages (--profile)
+
+When enabled, every outermost timing span (see metrics.py) is also run
+under cProfile, tracemalloc and a stack sampler. Each stage then leaves
+these files in <data folder>/profiles/<run>/:
+
+    <stage>_<pid>.pstats      cProfile data (pstats / snakeviz)
+    <stage>_<pid>.txt         functions sorted by cumulative and own time
+    <stage>_<pid>.alloc.txt   peak memory and top allocations by line
+    <stage>_<pid>.collapsed   sampled stacks for flamegraph.pl / speedscope
+
+Scripts started by a profiled stock_update.py profile into the same run
+folder (through the environment). When profiling is off, spans only check
+one module variable.
+"""
+
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import tracemalloc
+
+from .config import Config
+
+
+PROFILE_DIR_ENV = 'CODPARTNER_PROFILE_DIR'
+
+# Run folder while profiling is on (inherited by child scripts), else None
+active_dir = os.environ.get(PROFILE_DIR_ENV)
+
+# Stages being profiled (several threads can run one each); tracemalloc is
+# only on while there are any, so unprofiled code doesn't pay for it
+_tracing = {'stages': 0, 'started': False}
+_tracing_lock = threading.Lock()
+
+
+def enable(directory: Path = None):
+    """Turn profiling on for this process and the scripts it starts"""
+    global active_dir
+    if active_dir is None:
+        run_dir = Path(directory or Config.DOWNLOAD_DIR) / Config.PROFILE_DIR_NAME / f"{datetime.now():%Y%m%d_%H%M%S}"
+        run_dir.mkdir(parents=True, exist_ok=True)
+        active_dir = str(run_dir)
+        os.environ[PROFILE_DIR_ENV] = active_dir
+        print(f"🔬 Profiling on - reports go to {run_dir}")
+    return Path(active_dir)
+
+
+def stage_profile(stage):
+    """A started StageProfile, or None when profiling is off"""
+    if active_dir is None:
+        return None
+    return StageProfile(stage, Path(active_dir)).start()
+
+
+class StageProfile:
+    """cProfile + tracemalloc + stack sampling for one stage"""
+
+    def __init__(self, stage, run_dir):
+        self.stage = stage
+        self.run_dir = run_dir
+        self.profiler = cProfile.Profile()
+        self.sampler = _StackSampler(threading.get_ident(), Config.PROFILE_SAMPLE_INTERVAL)
+        self._start_snapshot = None
+        self._profiling = False
+
+    def start(self):
+        with _tracing_lock:
+            if _tracing['stages'] == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(Config.PROFILE_TRACE_FRAMES)
+                _tracing['started'] = True
+            _tracing['stages'] += 1
+        tracemalloc.reset_peak()
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self.sampler.start()
+        try:
+            self.profiler.enable()
+            self._profiling = True
+        except ValueError:
+            # Another profiler is already running in this thread
+            pass
+        return self
+
+    def stop(self):
+        """Stop profiling and write the stage's reports"""
+        if self._profiling:
+            self.profiler.disable()
+        self.sampler.stop()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        with _tracing_lock:
+            _tracing['stages'] -= 1
+            # Tracing someone else turned on is left alone
+            if _tracing['stages'] == 0 and _tracing['started']:
+                tracemalloc.stop()
+                _tracing['started'] = False
+
+        base = self._base_path()
+        if self._profiling:
+            self.profiler.dump_stats(f"{base}.pstats")
+            self._write_stats(f"{base}.txt")
+        self._write_allocations(f"{base}.alloc.txt", snapshot, peak)
+        self._write_collapsed(f"{base}.collapsed")
+
+    def _base_path(self):
+        name = f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', self.stage)}_{os.getpid()}"
+        base, n = self.run_dir / name, 1
+        while Path(f"{base}.alloc.txt").exists():
+            n += 1
+            base = self.run_dir / f"{name}_{n}"
+        return base
+
+    def _write_stats(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for sort in ('cumulative', 'tottime'):
+                f.write(f"===== {self.stage}: sorted by {sort} =====\n")
+                stream = io.StringIO()
+                pstats.Stats(self.profiler, stream=stream).strip_dirs().sort_stats(sort).print_stats(Config.PROFILE_TOP)
+                f.write(stream.getvalue())
+
+    def _write_allocations(self, path, snapshot, peak):
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        snapshot = snapshot.filter_traces(ignore)
+        start = self._start_snapshot.filter_traces(ignore)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"===== {self.stage}: memory =====\n")
+            f.write(f"Peak traced memory during the stage: {peak / (1024 * 1024):.1f} MB\n\n")
+            f.write(f"Top {Config.PROFILE_TOP} allocations still held at the end (by line):\n")
+            for stat in snapshot.compare_to(start, 'lineno')[:Config.PROFILE_TOP]:
+                f.write(f"{stat}\n")
+
+    def _write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval (collapsed-stack format)"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
@@ -0,0 +1,146 @@
+from datetime import datetime
+from pathlib import Path
+
+from .config import Config
+from .database import connect
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS selector_choices (
+    page TEXT NOT NULL,
+    control TEXT NOT NULL,
+    selector TEXT NOT NULL,         -- candidate that matched last time
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (page, control)
+);
+
+CREATE TABLE IF NOT EXISTS selector_changes (
+    page TEXT NOT NULL,
+    control TEXT NOT NULL,
+    old_selector TEXT,              -- NULL the first time a control is resolved
+    new_selector TEXT,              -- NULL when no candidate matched
+    changed_at TEXT NOT NULL
+);
+"""
+
+
+class SelectorCache:
+    """
+    Remembers which candidate selector worked for each page control
+
+    Controls such as the login button or the entries dropdown have several
+    candidate selectors. Instead of probing them one by one (a round-trip,
+    or a timeout, per miss), all candidates are waited for at once and the
+    one that worked last time is checked first. A miss - the remembered
+    selector no longer matching - is logged in selector_changes, which
+    shows when the dashboard's markup changed.
+    """
+
+    def __init__(self, directory: Path = None):
+        self.conn = connect(directory)
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, page, page_name, control, candidates, timeout=None, state='attached'):
+        """
+        Find which candidate selector matches on the page
+
+        Args:
+            page: Playwright page
+            page_name, control: Where the selector is used (e.g. 'login', 'login_button')
+            candidates: Selectors to try, in order of preference
+            timeout: Milliseconds to wait for any candidate (default: Config.SELECTOR_TIMEOUT)
+            state: 'attached' or 'visible'
+
+        Returns: the matching selector, or None if none matched in time
+        """
+        timeout = Config.SELECTOR_TIMEOUT if timeout is None else timeout
+        remembered = self._remembered(page_name, control)
+        ordered = list(candidates)
+        if remembered in ordered:
+            ordered.remove(remembered)
+            ordered.insert(0, remembered)
+
+        # One wait for all candidates instead of a timeout per candidate
+        any_candidate = page.locator(ordered[0])
+        for selector in ordered[1:]:
+            any_candidate = any_candidate.or_(page.locator(selector))
+        try:
+            any_candidate.first.wait_for(state=state, timeout=timeout)
+        except Exception:
+            found = None
+        else:
+            found = next((s for s in ordered if _matches(page, s, state)), None)
+
+        self._record(page_name, control, remembered, found)
+        return found
+
+    def _remembered(self, page_name, control):
+        row = self.conn.execute(
+            'SELECT selector FROM selector_choices WHERE page = ? AND control = ?',
+            (page_name, control)
+        ).fetchone()
+        return row['selector'] if row else None
+
+    def _record(self, page_name, control, remembered, found):
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            if remembered is not None and found == remembered:
+                self.hits += 1
+                self.conn.execute(
+                    'UPDATE selector_choices SET hits = hits + 1, updated_at = ? WHERE page = ? AND control = ?',
+                    (now, page_name, control)
+                )
+                return
+
+            self.misses += 1
+            self.conn.execute(
+                'INSERT INTO selector_changes (page, control, old_selector, new_selector, changed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (page_name, control, remembered, found, now)
+            )
+            if found is None:
+                self.conn.execute(
+                    'UPDATE selector_choices SET misses = misses + 1, updated_at = ? WHERE page = ? AND control = ?',
+                    (now, page_name, control)
+                )
+            else:
+                self.conn.execute(
+                    'INSERT INTO selector_choices (page, control, selector, misses, updated_at) VALUES (?, ?, ?, 1, ?) '
+                    'ON CONFLICT (page, control) DO UPDATE SET selector = excluded.selector, '
+                    'misses = misses + 1, updated_at = excluded.updated_at',
+                    (page_name, control, found, now)
+                )
+
+        if remembered is not None:
+            new = f"'{found}'" if found else "nothing"
+            print(f"🔎 Selector miss for {page_name}/{control}: '{remembered}' no longer matches, found {new}")
+
+    def stats(self):
+        """Lifetime hits/misses per control"""
+        return [dict(row) for row in self.conn.execute(
+            'SELECT page, control, selector, hits, misses, updated_at FROM selector_choices ORDER BY page, control'
+        )]
+
+    def changes(self, limit=20):
+        """Most recent selector changes (newest first)"""
+        return [dict(row) for row in self.conn.execute(
+            'SELECT * FROM selector_changes ORDER BY changed_at DESC, rowid DESC LIMIT ?', (limit,)
+        )]
+
+    def print_summary(self):
+        if self.hits or self.misses:
+            print(f"🎯 Selector cache: {self.hits} hit(s), {self.misses} miss(es)")
+
+    def close(self):
+        self.conn.close()
+
+
+def _matches(page, selector, state):
+    locator = page.locator(selector)
+    if state == 'visible':
+        return locator.first.is_visible()
+    return locator.count() > 0
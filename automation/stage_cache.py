@@ -0,0 +1,88 @@
+import hashlib
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from .config import Config
+from .database import connect
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stage_outputs (
+    stage TEXT NOT NULL,
+    input_key TEXT NOT NULL,        -- hash of the stage's input snapshots/labels
+    output_path TEXT,               -- NULL when the stage produced no file
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (stage, input_key)
+);
+"""
+
+
+class StageCache:
+    """
+    Remembers what a processing stage produced for a given set of inputs
+
+    Inputs are identified by snapshot content hashes (plus anything else
+    that ends up in the output, such as date labels), so a re-run on
+    unchanged snapshots can reuse the previous output instead of
+    re-parsing and rewriting it.
+    """
+
+    def __init__(self, directory: Path = None):
+        self.directory = Path(directory or Config.DOWNLOAD_DIR)
+        self.conn = connect(self.directory)
+        self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def key(*parts):
+        """Build an input key from snapshot hashes, labels, etc."""
+        return hashlib.sha256('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+    def reuse(self, stage, input_key, output_file):
+        """
+        Reuse a cached result for these inputs
+
+        Copies the cached output to output_file if it was written under
+        another name. Returns True if the stage can be skipped.
+        """
+        row = self.conn.execute(
+            'SELECT output_path FROM stage_outputs WHERE stage = ? AND input_key = ?',
+            (stage, input_key)
+        ).fetchone()
+        if row is None:
+            return False
+
+        # The stage ran and had nothing to write
+        if row['output_path'] is None:
+            return True
+
+        cached = self.directory / row['output_path']
+        if not cached.exists():
+            return False
+
+        output_file = Path(output_file)
+        if cached.resolve() != output_file.resolve():
+            shutil.copyfile(cached, output_file)
+        return True
+
+    def store(self, stage, input_key, output_file=None):
+        """Remember the output of a stage run (None if nothing was written)"""
+        output_path = None
+        if output_file is not None and Path(output_file).exists():
+            output_path = Path(output_file).resolve().relative_to(self.directory.resolve()).as_posix()
+
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO stage_outputs (stage, input_key, output_path, created_at) '
+                'VALUES (?, ?, ?, ?)',
+                (stage, input_key, output_path, datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
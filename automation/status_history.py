@@ -0,0 +1,222 @@
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+import re
+
+from .config import Config
+from .database import connect
+
+
+SCHEMA = """
+-- Orders captures already counted
+CREATE TABLE IF NOT EXISTS status_captures (
+    snapshot_id INTEGER PRIMARY KEY,    -- manifest snapshot
+    captured_at TEXT NOT NULL,
+    orders INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS status_products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS status_names (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE           -- shipping status as shown ('Delivered', 'Returned', ...)
+);
+
+-- Which capture a day's counts come from
+CREATE TABLE IF NOT EXISTS status_days (
+    day TEXT PRIMARY KEY,               -- order date, 'YYYY-MM-DD'
+    orders INTEGER NOT NULL,
+    complete INTEGER NOT NULL,          -- 0: the capture ended inside this day
+    captured_at TEXT NOT NULL
+);
+
+-- Orders per (order day, product, shipping status)
+CREATE TABLE IF NOT EXISTS status_counts (
+    day TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    status_id INTEGER NOT NULL,
+    orders INTEGER NOT NULL,
+    PRIMARY KEY (day, product_id, status_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_status_counts_product ON status_counts (product_id, day);
+"""
+
+DAY_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def _timestamp(when):
+    if isinstance(when, datetime):
+        return when.isoformat(timespec='seconds')
+    return when
+
+
+class ShippingStatusHistory:
+    """
+    Daily shipping-status counts per product, built from orders captures
+
+    Every capture holds the newest orders with their current shipping
+    status. Instead of keeping only the Not Available ones, all of them are
+    counted per order day, product and status, giving delivered / returned /
+    pending trends from captures that are taken anyway.
+
+    A day's counts are replaced by a later capture that covers it fully
+    (statuses keep moving: Pending becomes Delivered or Returned). The
+    oldest day of a capture is usually cut off by the page length, so it
+    only replaces a partial day with more orders.
+    """
+
+    def __init__(self, directory: Path = None):
+        self.directory = Path(directory or Config.DOWNLOAD_DIR)
+        self.conn = connect(self.directory)
+        self.conn.executescript(SCHEMA)
+        self._ids = {
+            table: {row['name']: row['id'] for row in self.conn.execute(f'SELECT id, {column} AS name FROM {table}')}
+            for table, column in (('status_products', 'product_name'), ('status_names', 'name'))
+        }
+
+    # Writing
+
+    def catch_up(self, snapshots, parse):
+        """
+        Count manifest snapshots not counted yet (oldest first)
+
+        Args:
+            snapshots: Snapshot objects (any order)
+            parse: Function turning a snapshot file into order dicts
+
+        Returns: number of snapshots counted
+        """
+        counted = 0
+        for snapshot in sorted(snapshots, key=lambda s: (s.captured_at, s.id)):
+            if not self.has(snapshot.id):
+                self.record(snapshot, parse(snapshot.path))
+                counted += 1
+        return counted
+
+    def record(self, snapshot, orders):
+        """
+        Count one capture's orders (dicts with order_date, product, shipping_status)
+
+        Returns: days whose counts were replaced
+        """
+        captured_at = _timestamp(snapshot.captured_at)
+        fallback_day = captured_at[:10]
+        counts = Counter()
+        for order in orders:
+            match = DAY_PATTERN.match(order['order_date'] or '')
+            day = match.group(0) if match else fallback_day
+            counts[day, order.get('product') or '', order['shipping_status'] or ''] += 1
+
+        totals = Counter()
+        for (day, _, _), n in counts.items():
+            totals[day] += n
+        oldest = min(totals, default=None)
+        stored = {
+            row['day']: row for row in self.conn.execute('SELECT * FROM status_days')
+        }
+
+        replaced = []
+        with self.conn:
+            for day, total in totals.items():
+                complete = int(day != oldest)
+                if day in stored and _rank(complete, total, captured_at) < _rank(*_stored_rank(stored[day])):
+                    continue
+                self.conn.execute('DELETE FROM status_counts WHERE day = ?', (day,))
+                self.conn.executemany(
+                    'INSERT INTO status_counts (day, product_id, status_id, orders) VALUES (?, ?, ?, ?)',
+                    [(d, self._id('status_products', product), self._id('status_names', status), n)
+                     for (d, product, status), n in counts.items() if d == day]
+                )
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO status_days (day, orders, complete, captured_at) VALUES (?, ?, ?, ?)',
+                    (day, total, complete, captured_at)
+                )
+                replaced.append(day)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO status_captures (snapshot_id, captured_at, orders) VALUES (?, ?, ?)',
+                (snapshot.id, captured_at, len(orders))
+            )
+        return sorted(replaced)
+
+    def _id(self, table, name):
+        ids = self._ids[table]
+        if name not in ids:
+            column = 'product_name' if table == 'status_products' else 'name'
+            ids[name] = self.conn.execute(f'INSERT INTO {table} ({column}) VALUES (?)', (name,)).lastrowid
+        return ids[name]
+
+    # Reading
+
+    def has(self, snapshot_id):
+        return self.conn.execute(
+            'SELECT 1 FROM status_captures WHERE snapshot_id = ?', (snapshot_id,)
+        ).fetchone() is not None
+
+    def statuses(self):
+        """Shipping statuses seen so far, most frequent first"""
+        return [row['name'] for row in self.conn.execute(
+            'SELECT n.name FROM status_names n JOIN status_counts c ON c.status_id = n.id '
+            'GROUP BY n.id ORDER BY SUM(c.orders) DESC'
+        )]
+
+    def series(self, product=None, since=None):
+        """
+        Orders per day and shipping status, for one product or all of them
+
+        Returns: {day: {status: orders}}, oldest day first
+        """
+        query = ('SELECT c.day, n.name AS status, SUM(c.orders) AS orders FROM status_counts c '
+                 'JOIN status_names n ON n.id = c.status_id')
+        where, params = [], []
+        if product is not None:
+            query += ' JOIN status_products p ON p.id = c.product_id'
+            where.append('p.product_name = ?')
+            params.append(product)
+        if since is not None:
+            where.append('c.day >= ?')
+            params.append(str(since))
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += ' GROUP BY c.day, n.name ORDER BY c.day'
+
+        series = {}
+        for row in self.conn.execute(query, params):
+            series.setdefault(row['day'], {})[row['status']] = row['orders']
+        return series
+
+    def products(self, since=None):
+        """Orders per product and shipping status: {product: {status: orders}}"""
+        result = {}
+        for row in self.conn.execute(
+            'SELECT p.product_name, n.name AS status, SUM(c.orders) AS orders FROM status_counts c '
+            'JOIN status_products p ON p.id = c.product_id JOIN status_names n ON n.id = c.status_id '
+            'WHERE c.day >= ? GROUP BY p.id, n.id ORDER BY p.product_name',
+            (str(since or ''),)
+        ):
+            result.setdefault(row['product_name'], {})[row['status']] = row['orders']
+        return result
+
+    def days(self):
+        """Days with counts and where they come from (oldest first)"""
+        return [dict(row) for row in self.conn.execute('SELECT * FROM status_days ORDER BY day')]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _rank(complete, orders, captured_at):
+    # Complete days: the latest capture wins; partial days: the one with more orders
+    return (complete, captured_at if complete else orders, captured_at)
+
+
+def _stored_rank(row):
+    return row['complete'], row['orders'], row['captured_at']
@@ -0,0 +1,184 @@
+"""
+Headless analysis of Playwright trace zips
+
+Reads the action events (trace.trace) and network events (trace.network)
+of a trace recorded with context.tracing, without the GUI viewer:
+
+    trace = Trace('traces/analytics_session.zip')
+    for action in trace.actions:
+        print(action['api'], action['duration'], action['idle_before'])
+
+Gaps between one action ending and the next starting are time the script
+spent outside Playwright - in these scripts, almost always time.sleep().
+"""
+
+from difflib import SequenceMatcher
+from pathlib import Path
+import json
+import zipfile
+
+
+# Actions whose whole duration is waiting
+WAIT_METHODS = {'waitForSelector', 'waitForLoadState', 'waitForTimeout', 'waitForURL',
+                'waitForFunction', 'waitForEventInfo', 'waitFor', 'expect'}
+
+
+class Trace:
+    """Actions, idle gaps and requests of one trace zip"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.actions = []
+        self.requests = []
+        self._load()
+
+    def _load(self):
+        with zipfile.ZipFile(self.path) as archive:
+            names = archive.namelist()
+            events = []
+            for name in sorted(n for n in names if n.endswith('.trace')):
+                events.extend(_read_jsonl(archive, name))
+            network = []
+            for name in sorted(n for n in names if n.endswith('.network')):
+                network.extend(_read_jsonl(archive, name))
+
+        self.actions = _actions(events)
+        self.requests = _requests(network)
+
+        # Times relative to the first action (seconds)
+        origin = min([a['start'] for a in self.actions] + [r['start'] for r in self.requests], default=0)
+        for item in self.actions + self.requests:
+            item['start'] = round(item['start'] - origin, 4)
+
+        previous_end = None
+        for action in self.actions:
+            gap = 0.0 if previous_end is None else max(0.0, action['start'] - previous_end)
+            action['idle_before'] = round(gap, 4)
+            end = action['start'] + action['duration']
+            previous_end = end if previous_end is None else max(previous_end, end)
+
+    def totals(self):
+        """Whole-trace figures, in seconds (and bytes)"""
+        if not self.actions:
+            return {'wall': 0.0, 'actions': 0, 'action_time': 0.0, 'wait_time': 0.0,
+                    'idle_time': 0.0, 'requests': len(self.requests), 'bytes': 0, 'errors': 0}
+        wall = max(a['start'] + a['duration'] for a in self.actions) - self.actions[0]['start']
+        return {
+            'wall': round(wall, 3),
+            'actions': len(self.actions),
+            'action_time': round(sum(a['duration'] for a in self.actions if not a['is_wait']), 3),
+            'wait_time': round(sum(a['duration'] for a in self.actions if a['is_wait']), 3),
+            'idle_time': round(sum(a['idle_before'] for a in self.actions), 3),
+            'requests': len(self.requests),
+            'bytes': sum(r['bytes'] for r in self.requests),
+            'errors': sum(1 for a in self.actions if a['error']),
+        }
+
+    def slowest_requests(self, limit=10):
+        return sorted(self.requests, key=lambda r: r['duration'], reverse=True)[:limit]
+
+
+def _read_jsonl(archive, name):
+    events = []
+    with archive.open(name) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return events
+
+
+def _actions(events):
+    """Top-level API calls with start/duration in seconds"""
+    calls = {}
+    order = []
+    for event in events:
+        kind = event.get('type')
+        if kind == 'before':
+            if event.get('parentId'):
+                continue  # Nested step (e.g. inside expect), counted in its parent
+            calls[event['callId']] = {'before': event, 'after': None}
+            order.append(event['callId'])
+        elif kind == 'after' and event.get('callId') in calls:
+            calls[event['callId']]['after'] = event
+        elif kind == 'action':
+            # Older trace format: one event per call
+            metadata = event.get('metadata', {})
+            call_id = metadata.get('id', f"action@{len(order)}")
+            calls[call_id] = {'before': {**metadata, 'startTime': metadata.get('startTime')},
+                              'after': {'endTime': metadata.get('endTime'), 'error': metadata.get('error')}}
+            order.append(call_id)
+
+    actions = []
+    for call_id in order:
+        before, after = calls[call_id]['before'], calls[call_id]['after']
+        if before.get('startTime') is None:
+            continue
+        method = before.get('method', '')
+        api = before.get('apiName') or before.get('title') or f"{before.get('class', '').lower()}.{method}"
+        params = before.get('params') or {}
+        start = before['startTime'] / 1000
+        end = after.get('endTime') if after else None
+        duration = (end / 1000 - start) if end else 0.0
+        error = (after or {}).get('error')
+        actions.append({
+            'call_id': call_id,
+            'api': api,
+            'target': str(params.get('selector') or params.get('url') or params.get('state') or '')[:120],
+            'start': start,
+            'duration': round(duration, 4),
+            'is_wait': method in WAIT_METHODS or api.split('.')[-1] in WAIT_METHODS,
+            'error': (error.get('message') if isinstance(error, dict) else error) or None,
+            'unfinished': after is None,
+        })
+    return sorted(actions, key=lambda a: a['start'])
+
+
+def _requests(events):
+    requests = []
+    for event in events:
+        if event.get('type') != 'resource-snapshot':
+            continue
+        snapshot = event.get('snapshot', {})
+        request = snapshot.get('request', {})
+        response = snapshot.get('response', {})
+        content = response.get('content', {})
+        start = snapshot.get('_monotonicTime')
+        if start is None:
+            continue
+        transfer = response.get('_transferSize', -1)
+        requests.append({
+            'url': request.get('url', ''),
+            'method': request.get('method', ''),
+            'status': response.get('status'),
+            'mime': (content.get('mimeType') or '').split(';')[0],
+            'start': start / 1000,
+            'duration': round(max(snapshot.get('time', 0), 0) / 1000, 4),
+            'bytes': transfer if transfer and transfer > 0 else max(content.get('size', 0), 0),
+        })
+    return requests
+
+
+def action_key(action):
+    return f"{action['api']} {action['target']}"
+
+
+def compare_traces(old, new):
+    """
+    Line up the actions of two traces (same flow, possibly with steps added or removed)
+
+    Returns: list of (old_action or None, new_action or None)
+    """
+    old_keys = [action_key(a) for a in old.actions]
+    new_keys = [action_key(a) for a in new.actions]
+    pairs = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_keys, new_keys, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            pairs.extend(zip(old.actions[i1:i2], new.actions[j1:j2]))
+        else:
+            pairs.extend((a, None) for a in old.actions[i1:i2])
+            pairs.extend((None, b) for b in new.actions[j1:j2])
+    return pairs
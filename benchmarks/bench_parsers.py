@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Parser & Algorithm Benchmarks
+Times each processing stage on synthetic pages of 1k / 10k / 100k rows
+
+Run from the project folder:
+    python3 -m benchmarks.bench_parsers                  # compare with baseline
+    python3 -m benchmarks.bench_parsers --save           # record a new baseline
+    python3 -m benchmarks.bench_parsers --sizes 1000 10000
+"""
+
+from contextlib import redirect_stdout
+from pathlib import Path
+import argparse
+import io
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import fixtures
+import compare_analytics
+import compare_inventory
+import compare_orders
+import generate_history
+
+
+BASELINE_FILE = Path(__file__).parent / 'baselines' / 'parsers.json'
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def measure(func, *args, repeat=1):
+    """
+    Run func and return (best seconds, peak MB, result)
+    Peak memory is taken from a separate traced run so tracing doesn't skew timings
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak / (1024 * 1024), result
+
+
+def run_size(size, workdir, repeat):
+    """Benchmark every stage at one size; returns {stage: {'seconds', 'peak_mb', 'rows'}}"""
+    workdir = Path(workdir)
+    results = {}
+
+    # Fixtures (not timed)
+    history_files = fixtures.write_inventory_series(workdir, size, days=7)
+    orders_file = workdir / 'Orders - OCT14.html'
+    orders_file.write_text(fixtures.orders_html(size), encoding='utf-8')
+    analytics_file = workdir / 'Analytics_Products_Saudi_OCT14.html'
+    analytics_file.write_text(fixtures.analytics_html(size), encoding='utf-8')
+
+    stages = [
+        ('parse_inventory_html', compare_inventory.parse_inventory_html, (history_files[-1],)),
+        ('parse_orders_html', compare_orders.parse_orders_html, (orders_file,)),
+        ('parse_analytics_html', compare_analytics.parse_analytics_html, (analytics_file,)),
+        ('compare_inventories', compare_inventory.compare_inventories,
+         (history_files[-2], history_files[-1])),
+        ('generate_history', generate_history.generate_history, (history_files,)),
+    ]
+
+    for name, func, args in stages:
+        seconds, peak_mb, result = measure(func, *args, repeat=repeat)
+        if isinstance(result, tuple):
+            result = result[0]
+        results[name] = {
+            'seconds': round(seconds, 4),
+            'peak_mb': round(peak_mb, 2),
+            'rows': len(result),
+        }
+        print(f"   {name:<22} {seconds:>9.3f}s {peak_mb:>9.1f} MB  ({len(result)} rows out)")
+
+    return results
+
+
+def load_baseline():
+    if not BASELINE_FILE.exists():
+        return None
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_comparison(results, baseline):
+    print("\n" + "=" * 60)
+    print("📊 Compared with baseline")
+    print(f"   (recorded {baseline['recorded_at']} on {baseline['machine']})")
+    print("=" * 60)
+    for size, stages in results.items():
+        base_stages = baseline['results'].get(size)
+        if not base_stages:
+            continue
+        print(f"\n{int(size):,} rows:")
+        for name, current in stages.items():
+            base = base_stages.get(name)
+            if not base or not base['seconds']:
+                continue
+            time_delta = (current['seconds'] - base['seconds']) / base['seconds'] * 100
+            mem_delta = (current['peak_mb'] - base['peak_mb']) / max(base['peak_mb'], 0.01) * 100
+            flag = "🔴" if time_delta > 10 else "🟢" if time_delta < -10 else "⚪"
+            print(f"   {flag} {name:<22} time {time_delta:+6.1f}%   memory {mem_delta:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parsers and comparison stages")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Row counts to benchmark (default: 1000 10000 100000)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Timed runs per stage, best one is kept (default: 3)")
+    parser.add_argument('--save', action='store_true',
+                        help=f"Save results as the new baseline ({BASELINE_FILE.name})")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️  Parser & Algorithm Benchmarks")
+    print("=" * 60)
+
+    results = {}
+    for size in args.sizes:
+        print(f"\n📦 {size:,} rows")
+        with tempfile.TemporaryDirectory() as workdir:
+            # Large sizes take long enough that one timed run is plenty
+            repeat = args.repeat if size <= 10000 else 1
+            results[str(size)] = run_size(size, workdir, repeat)
+
+    if args.save:
+        BASELINE_FILE.parent.mkdir(exist_ok=True)
+        baseline = {
+            'recorded_at': time.strftime('%Y-%m-%d %H:%M'),
+            'machine': f"{platform.node()} / Python {platform.python_version()}",
+            'results': results,
+        }
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n💾 Baseline saved to: {BASELINE_FILE}")
+    else:
+        baseline = load_baseline()
+        if baseline:
+            print_comparison(results, baseline)
+        else:
+            print("\nℹ️  No baseline yet - run with --save to record one")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+End-to-End Pipeline Benchmark
+Times complete stock_update.py runs (login, downloads, processing) against the
+local mock CODPARTNER server, so wait-strategy and concurrency changes can be
+measured offline and reproducibly
+
+Run from the project folder (needs Playwright's Chromium):
+    python3 -m benchmarks.bench_pipeline                      # compare with baseline
+    python3 -m benchmarks.bench_pipeline --save               # record a new baseline
+    python3 -m benchmarks.bench_pipeline --rows 5000 --latency 2
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import fixtures
+from benchmarks.mock_server import MockCODPartner
+
+
+PROJECT_DIR = Path(__file__).parent.parent
+BASELINE_FILE = Path(__file__).parent / 'baselines' / 'pipeline.json'
+STEP_LINE = re.compile(r'STEP (\w+): (.+)')
+
+
+def seed_previous_day(site, directory):
+    """Yesterday's inventory capture, so the daily comparison has something to compare"""
+    yesterday = datetime.now() - timedelta(days=1)
+    path = Path(directory) / f"Inventory - {yesterday.strftime('%b%d').upper()}.html"
+    path.write_text(fixtures.inventory_html(site.previous_stock), encoding='utf-8')
+    os.utime(path, (yesterday.timestamp(), yesterday.timestamp()))
+    return path
+
+
+def run_once(site, directory, entries, show_output=False):
+    """
+    One stock_update.py run in a fresh data folder
+
+    Returns: (total seconds, {step: seconds}, return code, output)
+    """
+    seed_previous_day(site, directory)
+    env = dict(
+        os.environ,
+        CODPARTNER_BASE_URL=site.base_url,
+        CODPARTNER_USERNAME='benchmark@example.com',
+        CODPARTNER_PASSWORD='benchmark',
+        CODPARTNER_DATA_DIR=str(directory),
+        CODPARTNER_ENTRIES_TO_SHOW=str(entries),
+        PYTHONUNBUFFERED='1',
+    )
+
+    steps = {}
+    output = []
+    current, step_start = None, None
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(PROJECT_DIR / 'stock_update.py')],
+        cwd=PROJECT_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    # Step boundaries are taken from the "STEP n: ..." banners as they are printed
+    for line in process.stdout:
+        now = time.perf_counter()
+        output.append(line)
+        if show_output:
+            print(f"      | {line}", end='')
+        match = STEP_LINE.search(line)
+        if match:
+            if current:
+                steps[current] = now - step_start
+            current, step_start = f"{match.group(1)} {match.group(2).strip()}", now
+    process.wait()
+    end = time.perf_counter()
+    if current:
+        steps[current] = end - step_start
+
+    return end - start, steps, process.returncode, ''.join(output)
+
+
+def summarize(runs):
+    """Median and best time per step (and in total) over several runs"""
+    summary = {}
+    names = ['total'] + [name for name in runs[0]['steps']]
+    for name in names:
+        times = [run['total'] if name == 'total' else run['steps'].get(name) for run in runs]
+        times = [t for t in times if t is not None]
+        if times:
+            summary[name] = {
+                'median': round(statistics.median(times), 3),
+                'best': round(min(times), 3),
+            }
+    return summary
+
+
+def load_baseline():
+    if not BASELINE_FILE.exists():
+        return None
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_comparison(summary, baseline):
+    print("\n" + "=" * 60)
+    print("📊 Compared with baseline")
+    print(f"   (recorded {baseline['recorded_at']} on {baseline['machine']}, {baseline['settings']})")
+    print("=" * 60)
+    for name, current in summary.items():
+        base = baseline['summary'].get(name)
+        if not base or not base['median']:
+            continue
+        delta = (current['median'] - base['median']) / base['median'] * 100
+        flag = "🔴" if delta > 10 else "🟢" if delta < -10 else "⚪"
+        print(f"   {flag} {name:<40} {current['median']:>8.2f}s  ({delta:+6.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time full stock_update runs against a local mock site")
+    parser.add_argument('--rows', type=int, default=1000, help="Rows per table (default: 1000)")
+    parser.add_argument('--latency', type=float, default=0.5,
+                        help="Seconds the mock takes per table load (default: 0.5)")
+    parser.add_argument('--page-latency', type=float, default=0.05,
+                        help="Seconds the mock takes per page load (default: 0.05)")
+    parser.add_argument('--runs', type=int, default=3, help="Number of runs (default: 3)")
+    parser.add_argument('--show-output', action='store_true', help="Print stock_update output")
+    parser.add_argument('--save', action='store_true',
+                        help=f"Save results as the new baseline ({BASELINE_FILE.name})")
+    args = parser.parse_args()
+
+    settings = f"{args.rows} rows, {args.latency}s table latency, {args.page_latency}s page latency"
+    print("=" * 60)
+    print("⏱️  End-to-End Pipeline Benchmark")
+    print("=" * 60)
+    print(f"   {settings}")
+
+    runs = []
+    with MockCODPartner(rows=args.rows, latency=args.latency, page_latency=args.page_latency) as site:
+        print(f"🧪 Mock CODPARTNER at {site.base_url}")
+        for i in range(args.runs):
+            print(f"\n▶️  Run {i + 1}/{args.runs}")
+            with tempfile.TemporaryDirectory() as workdir:
+                total, steps, returncode, output = run_once(site, workdir, args.rows, args.show_output)
+            if returncode != 0:
+                print(f"❌ stock_update.py exited with {returncode}:")
+                print(output[-2000:])
+                sys.exit(1)
+            for name, seconds in steps.items():
+                print(f"   {name:<40} {seconds:>8.2f}s")
+            print(f"   {'total':<40} {total:>8.2f}s")
+            runs.append({'total': total, 'steps': steps})
+
+        requests = dict(site.requests)
+        bytes_sent = site.bytes_sent
+
+    summary = summarize(runs)
+    print("\n" + "=" * 60)
+    print(f"📋 Median over {len(runs)} run(s)")
+    print("=" * 60)
+    for name, times in summary.items():
+        print(f"   {name:<40} {times['median']:>8.2f}s  (best {times['best']:.2f}s)")
+    print(f"\n🌐 Mock requests: {requests} ({bytes_sent / (1024 * 1024):.1f} MB served)")
+
+    if args.save:
+        BASELINE_FILE.parent.mkdir(exist_ok=True)
+        baseline = {
+            'recorded_at': time.strftime('%Y-%m-%d %H:%M'),
+            'machine': f"{platform.node()} / Python {platform.python_version()}",
+            'settings': settings,
+            'summary': summary,
+        }
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n💾 Baseline saved to: {BASELINE_FILE}")
+    else:
+        baseline = load_baseline()
+        if baseline:
+            print_comparison(summary, baseline)
+        else:
+            print("\nℹ️  No baseline yet - run with --save to record one")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
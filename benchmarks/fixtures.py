@@ -0,0 +1,220 @@
+"""
+Synthetic CODPARTNER pages for benchmarks
+
+Generates inventory, orders and analytics pages shaped like the real
+dashboard (DataTables tables, tr[role=row], h6 product names, flag icons in
+the warehouse cell), at any size, deterministically from a seed.
+"""
+
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+WAREHOUSES = [
+    ('sa', 'Riyadh warehouse'),
+    ('sa', 'Jeddah warehouse'),
+    ('ae', 'Dubai warehouse'),
+    ('kw', 'Kuwait warehouse'),
+]
+
+SHIPPING_STATUSES = [
+    'Delivered', 'Delivered', 'Delivered', 'Shipped', 'In transit',
+    'Returned', 'Pending', 'Not Available',
+]
+
+WORDS = [
+    'Fourleaf', 'Bracelet', 'Necklace', 'Ring', 'Gold', 'Silver', 'Heart',
+    'Classic', 'Mini', 'Set', 'Watch', 'Earrings', 'Pearl', 'Charm', 'Rose',
+]
+
+INVENTORY_HEADERS = ['Product', 'Warehouse', 'Total', 'Reserved', 'Expected remaining', 'Status']
+ORDERS_HEADERS = ['Reference', 'Customer', 'Date', 'Product', 'Qty', 'Total', 'Status', 'Shipping', '']
+ANALYTICS_HEADERS = ['Product', 'Leads', 'Confirmed', 'Cancelled', 'No answer', 'Shipped',
+                     'Delivered', 'Returned', 'Pending', 'Deliv.Rate']
+
+PAGE_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>CODPARTNER</title>
+<link rel="stylesheet" href="/assets/css/app.css">
+<script src="/assets/js/jquery.dataTables.min.js"></script>
+</head>
+<body class="main-body app sidebar-mini">
+<div class="main-content"><div class="container-fluid">
+"""
+
+PAGE_FOOT = """</div></div>
+<script src="/assets/js/app.js"></script>
+</body>
+</html>
+"""
+
+
+def product_names(count, seed=0):
+    """Unique, realistic-looking product names"""
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        words = rng.sample(WORDS, 3)
+        names.append(f"{' '.join(words)} {i:05d}")
+    return names
+
+
+def datatable(table_id, headers, rows_html, entries, lengths=(10, 100)):
+    """DataTables markup: length selector, processing indicator, table and info line"""
+    head = ''.join(f'<th class="sorting" tabindex="0" aria-controls="{table_id}">{h}</th>' for h in headers)
+    options = ''.join(f'<option value="{n}">{n}</option>' for n in lengths)
+    return (
+        f'<div id="{table_id}_wrapper" class="dataTables_wrapper dt-bootstrap5">'
+        f'<div class="dataTables_length"><label>Show <select name="{table_id}_length">'
+        f'{options}</select> entries</label></div>'
+        f'<div id="{table_id}_processing" class="dataTables_processing" style="display: none;">Processing...</div>'
+        f'<table id="{table_id}" class="table table-bordered dataTable no-footer" style="width: 100%;">'
+        f'<thead><tr role="row">{head}</tr></thead>'
+        f'<tbody>{rows_html}</tbody></table>'
+        f'<div class="dataTables_info">Showing 1 to {entries} of {entries} entries</div></div>\n'
+    )
+
+
+def inventory_stock(count, seed=0):
+    """Initial {(product_name, warehouse): stock} for an inventory series"""
+    rng = random.Random(seed)
+    names = product_names(count, seed)
+    return {
+        (name, WAREHOUSES[i % len(WAREHOUSES)][1]): rng.randint(0, 500)
+        for i, name in enumerate(names)
+    }
+
+
+def next_day_stock(stock, seed=0, active_share=0.1):
+    """Simulate one day: a share of SKUs sell a few units, a few get restocked"""
+    rng = random.Random(seed)
+    new_stock = dict(stock)
+    for key in rng.sample(list(stock), int(len(stock) * active_share)):
+        if rng.random() < 0.1:
+            new_stock[key] += rng.randint(20, 100)
+        else:
+            new_stock[key] = max(0, new_stock[key] - rng.randint(1, 10))
+    return new_stock
+
+
+def inventory_html(stock):
+    """Inventory page for {(product_name, warehouse): stock}"""
+    return PAGE_HEAD + datatable('inventory', INVENTORY_HEADERS, inventory_rows(stock), len(stock)) + PAGE_FOOT
+
+
+def inventory_rows(stock):
+    """<tr> rows of the inventory table"""
+    flags = {name: flag for flag, name in WAREHOUSES}
+    rows = []
+    for i, ((name, warehouse), qty) in enumerate(stock.items()):
+        parity = 'odd' if i % 2 == 0 else 'even'
+        rows.append(
+            f'<tr role="row" class="{parity}">'
+            f'<td><div class="d-flex"><img src="/storage/products/{i}.jpg" class="avatar">'
+            f'<div><h6 class="mb-0">{name}</h6><small class="text-muted">SKU-{i:06d}</small></div></div></td>'
+            f'<td><i class="flag-icon flag-icon-{flags[warehouse]}"></i> {warehouse}</td>'
+            f'<td>{qty + 40}</td><td>{40}</td><td>{qty}</td>'
+            f'<td><span class="badge bg-success">Active</span></td></tr>'
+        )
+    return ''.join(rows)
+
+
+def orders_html(count, seed=0, day=None):
+    """Orders page with a realistic mix of shipping statuses"""
+    return PAGE_HEAD + datatable('orders', ORDERS_HEADERS, orders_rows(count, seed, day), count) + PAGE_FOOT
+
+
+def orders_rows(count, seed=0, day=None):
+    """<tr> rows of the orders table, newest order first"""
+    rng = random.Random(seed)
+    day = day or datetime(2025, 10, 14)
+    names = product_names(max(1, count // 20), seed)
+    rows = []
+    for i in range(count):
+        placed = day - timedelta(minutes=7 * i)
+        status = rng.choice(SHIPPING_STATUSES)
+        rows.append(
+            f'<tr role="row" class="{"odd" if i % 2 == 0 else "even"}">'
+            f'<td><a href="/orders/{5829541 - i}">#COD{5829541 - i}</a></td>'
+            f'<td>Customer {rng.randint(1, 99999)}<br><small>+9665{rng.randint(10000000, 99999999)}</small></td>'
+            f'<td>{placed:%Y-%m-%d %H:%M:%S}</td>'
+            f'<td>{rng.choice(names)}</td>'
+            f'<td>{rng.randint(1, 3)}</td>'
+            f'<td>{rng.randint(99, 499)} SAR</td>'
+            f'<td><span class="badge bg-info">Confirmed</span></td>'
+            f'<td><span class="badge bg-light">{status}</span></td>'
+            f'<td><a class="btn btn-sm" href="/orders/{5829541 - i}">View</a></td></tr>'
+        )
+    return ''.join(rows)
+
+
+CITIES = ['Riyadh', 'Jeddah', 'Dammam', 'Mecca', 'Medina', 'Dubai', 'Kuwait City']
+NOTES = ['', '', 'Call before delivery', 'Customer asked to deliver after 5pm', 'Wrong address, waiting for update']
+
+
+def order_detail_html(order_number, seed=0):
+    """Detail page of one order: customer card (with shipping status), products table and notes"""
+    rng = random.Random(seed * 1000003 + order_number)
+    names = product_names(50, seed)
+    products = ''.join(
+        f'<tr><td>{name}</td><td>{rng.randint(1, 3)}</td><td>{rng.randint(99, 499)} SAR</td></tr>'
+        for name in rng.sample(names, rng.choice([1, 1, 2]))
+    )
+    note = rng.choice(NOTES)
+    return PAGE_HEAD + (
+        f'<h2 class="main-content-title">Order #COD{order_number}</h2>'
+        '<div class="card"><div class="card-body"><h6>Customer</h6><dl>'
+        f'<dt>Name</dt><dd>Customer {rng.randint(1, 99999)}</dd>'
+        f'<dt>Phone</dt><dd>+9665{rng.randint(10000000, 99999999)}</dd>'
+        f'<dt>City</dt><dd>{rng.choice(CITIES)}</dd>'
+        f'<dt>Shipping status</dt><dd>{rng.choice(SHIPPING_STATUSES)}</dd></dl></div></div>'
+        '<div class="card"><div class="card-body"><table class="table">'
+        f'<thead><tr><th>Product</th><th>Qty</th><th>Price</th></tr></thead><tbody>{products}</tbody>'
+        '</table></div></div>'
+        + (f'<div class="card"><div class="card-body">Notes: {note}</div></div>' if note else '')
+    ) + PAGE_FOOT
+
+
+def analytics_html(count, seed=0):
+    """Product analytics page (leads, confirmations, delivery rate)"""
+    return PAGE_HEAD + datatable('products', ANALYTICS_HEADERS, analytics_rows(count, seed), count) + PAGE_FOOT
+
+
+def analytics_rows(count, seed=0):
+    """<tr> rows of the product analytics table"""
+    rng = random.Random(seed)
+    rows = []
+    for i, name in enumerate(product_names(count, seed)):
+        leads = rng.randint(0, 400)
+        confirmed = rng.randint(0, leads) if leads else 0
+        delivered = rng.randint(0, confirmed) if confirmed else 0
+        rate = f"{delivered / confirmed * 100:.2f}%" if confirmed else "0%"
+        rows.append(
+            f'<tr role="row" class="{"odd" if i % 2 == 0 else "even"}">'
+            f'<td><img src="/storage/products/{i}.jpg" class="avatar"> {name}</td>'
+            f'<td>{leads}</td><td>{confirmed}</td><td>{leads - confirmed}</td>'
+            f'<td>{rng.randint(0, 20)}</td><td>{confirmed}</td><td>{delivered}</td>'
+            f'<td>{confirmed - delivered}</td><td>{rng.randint(0, 10)}</td><td>{rate}</td></tr>'
+        )
+    return ''.join(rows)
+
+
+def write_inventory_series(directory, count, days=7, seed=0, start=None):
+    """
+    Write `days` consecutive inventory pages ('Inventory - OCT01.html', ...)
+
+    Returns: list of paths, oldest first
+    """
+    directory = Path(directory)
+    start = start or datetime(2025, 10, 1)
+    stock = inventory_stock(count, seed)
+    paths = []
+    for d in range(days):
+        if d:
+            stock = next_day_stock(stock, seed + d)
+        day = start + timedelta(days=d)
+        path = directory / f"Inventory - {day.strftime('%b%d').upper()}.html"
+        path.write_text(inventory_html(stock), encoding='utf-8')
+        paths.append(path)
+    return paths
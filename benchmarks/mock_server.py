@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the CODPARTNER dashboard
+
+Serves the pages the automation drives, built from the synthetic fixtures:
+login form, DataTables inventory / orders / product analytics pages (loaded
+over XHR with a "Processing..." indicator, like the real site), the
+analytics country buttons, the Filter dialog with its daterange picker and
+order detail pages.
+Table loads and page loads take a configurable time, so download-side
+changes (waits, concurrency) can be measured offline.
+
+Run it on its own:
+    python3 -m benchmarks.mock_server --rows 1000 --latency 0.5
+    CODPARTNER_BASE_URL=http://127.0.0.1:8765 python3 stock_update.py
+
+Or from code:
+    with MockCODPartner(rows=1000) as site:
+        config = Config.for_site(site.base_url)
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from urllib.parse import parse_qs, urlparse
+import argparse
+import calendar
+import json
+import secrets
+import threading
+import time
+import zlib
+
+from benchmarks import fixtures
+
+
+SESSION_COOKIE = 'codpartner_session'
+
+# 1x1 transparent GIF for product thumbnails
+PIXEL = bytes.fromhex('47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b')
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Login - CODPARTNER</title>
+<link rel="stylesheet" href="/assets/css/app.css"></head>
+<body class="login-page">
+<form method="post" action="/login" class="login-form">
+<h4>Welcome back!</h4>{error}
+<input type="email" name="email" placeholder="Email" required>
+<input type="password" name="password" placeholder="Password" required>
+<button type="submit" class="btn btn-main-primary btn-block">Log In</button>
+</form>
+</body>
+</html>
+"""
+
+DASHBOARD_BODY = """<h2 class="main-content-title">Dashboard</h2>
+<nav><a href="/inventory">Inventory</a> <a href="/orders">Orders</a>
+<a href="/reports/analytics/products">Analytics</a></nav>
+"""
+
+COUNTRIES = [('sa', 'Saudi arabia'), ('ae', 'United arab emirates'), ('kw', 'Kuwait')]
+
+# DataTables-like loading, country buttons and the daterange picker
+APP_JS = """(function () {
+  var filters = {};
+
+  function loadTable(id) {
+    var select = document.querySelector('select[name="' + id + '_length"]');
+    var processing = document.getElementById(id + '_processing');
+    var params = new URLSearchParams(filters);
+    params.set('length', select.value);
+    processing.style.display = 'block';
+    fetch('/api/' + id + '?' + params.toString(), {credentials: 'same-origin'})
+      .then(function (response) { return response.json(); })
+      .then(function (data) {
+        document.querySelector('#' + id + ' tbody').innerHTML = data.rows;
+        document.querySelector('#' + id + '_wrapper .dataTables_info').textContent =
+          'Showing 1 to ' + data.shown + ' of ' + data.total + ' entries';
+        processing.style.display = 'none';
+      });
+  }
+
+  document.querySelectorAll('table.dataTable').forEach(function (table) {
+    var select = document.querySelector('select[name="' + table.id + '_length"]');
+    select.addEventListener('change', function () { loadTable(table.id); });
+    loadTable(table.id);
+  });
+
+  document.querySelectorAll('[data-country]').forEach(function (button) {
+    button.addEventListener('click', function () {
+      filters.country = button.dataset.country;
+      loadTable('products');
+    });
+  });
+
+  var dialog = document.getElementById('filterDialog');
+  if (!dialog) return;
+  var input = document.getElementById('daterange');
+  var picker = dialog.querySelector('.daterangepicker');
+  var start = null, end = null;
+
+  document.getElementById('filterButton').addEventListener('click', function () {
+    dialog.style.display = 'block';
+  });
+  input.addEventListener('click', function () { picker.style.display = 'block'; });
+
+  picker.querySelectorAll('.ranges li').forEach(function (item) {
+    item.addEventListener('click', function () {
+      if (item.dataset.rangeKey === 'Custom Range') {
+        picker.querySelectorAll('.drp-calendar').forEach(function (c) { c.style.display = 'block'; });
+        return;
+      }
+      input.value = item.dataset.start + ' - ' + item.dataset.end;
+      picker.style.display = 'none';
+    });
+  });
+
+  picker.querySelectorAll('td.available').forEach(function (cell) {
+    cell.addEventListener('click', function () {
+      if (start === null || end !== null) {
+        start = cell.dataset.date;
+        end = null;
+      } else {
+        end = cell.dataset.date;
+        if (end < start) { var first = end; end = start; start = first; }
+      }
+      picker.querySelectorAll('td.active').forEach(function (c) { c.classList.remove('active'); });
+      cell.classList.add('active');
+    });
+  });
+
+  picker.querySelector('.applyBtn').addEventListener('click', function () {
+    if (start !== null) input.value = start + ' - ' + (end || start);
+    picker.style.display = 'none';
+  });
+
+  document.getElementById('filterForm').addEventListener('submit', function (event) {
+    event.preventDefault();
+    filters.daterange = input.value;
+    dialog.style.display = 'none';
+    loadTable('products');
+  });
+})();
+"""
+
+APP_CSS = """body { font-family: sans-serif; }
+.dataTables_processing { position: absolute; padding: 1em; background: #fff; }
+.daterangepicker td.active { background: #357ebd; color: #fff; }
+"""
+
+
+class MockCODPartner:
+    """Threaded HTTP server imitating the CODPARTNER dashboard"""
+
+    def __init__(self, rows: int = 1000, latency: float = 0.5, page_latency: float = 0.05,
+                 asset_kb: int = 200, seed: int = 0, port: int = 0):
+        """
+        Args:
+            rows: Products in the inventory and analytics tables, orders in the orders table
+            latency: Seconds each table (XHR) load takes
+            page_latency: Seconds each page load takes
+            asset_kb: Size of the DataTables script, to make static assets count
+            seed: Seed for the synthetic data
+            port: Port to listen on (0 = any free port)
+        """
+        self.rows = rows
+        self.latency = latency
+        self.page_latency = page_latency
+        self.seed = seed
+        self.port = port
+
+        # Yesterday's stock (what a previous run would have captured) and today's
+        self.previous_stock = fixtures.inventory_stock(rows, seed)
+        self.stock = fixtures.next_day_stock(self.previous_stock, seed + 1)
+        self.assets = {
+            '/assets/js/app.js': (APP_JS.encode('utf-8'), 'application/javascript'),
+            '/assets/css/app.css': (APP_CSS.encode('utf-8'), 'text/css'),
+            '/assets/js/jquery.dataTables.min.js': (
+                b'/* DataTables */\n' + (b'//' + b'x' * 78 + b'\n') * (asset_kb * 1024 // 81),
+                'application/javascript'
+            ),
+        }
+
+        self.sessions = set()
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), MockHandler)
+        self._server.daemon_threads = True
+        self._server.site = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # Content
+
+    def lengths(self):
+        """Page-length options, always including one that shows every row"""
+        return sorted({10, 25, 50, 100, self.rows})
+
+    def page(self, path):
+        """Full HTML for a dashboard page (tables start empty and load over XHR)"""
+        if path == '/inventory':
+            body = fixtures.datatable('inventory', fixtures.INVENTORY_HEADERS, '', 0, self.lengths())
+        elif path == '/orders':
+            body = fixtures.datatable('orders', fixtures.ORDERS_HEADERS, '', 0, self.lengths())
+        elif path == '/reports/analytics/products':
+            body = self._analytics_controls() + fixtures.datatable(
+                'products', fixtures.ANALYTICS_HEADERS, '', 0, self.lengths())
+        else:
+            body = DASHBOARD_BODY
+        return fixtures.PAGE_HEAD + body + fixtures.PAGE_FOOT
+
+    def table(self, table_id, length, country='', daterange=''):
+        """Rows for one XHR table load: (rows_html, rows shown)"""
+        shown = min(length, self.rows) if length > 0 else self.rows
+        if table_id == 'inventory':
+            shown = min(shown, len(self.stock))
+            return fixtures.inventory_rows(dict(islice(self.stock.items(), shown))), shown
+        if table_id == 'orders':
+            return fixtures.orders_rows(shown, self.seed, day=datetime.now().replace(microsecond=0)), shown
+        if table_id == 'products':
+            # Different filters give different (but repeatable) numbers
+            seed = zlib.crc32(f'{self.seed}|{country}|{daterange}'.encode('utf-8'))
+            return fixtures.analytics_rows(shown, seed), shown
+        return None, 0
+
+    def _analytics_controls(self):
+        today = datetime.now().date()
+        buttons = ''.join(
+            f'<button type="button" class="btn btn-outline-primary" data-country="{code}">{name}</button>'
+            for code, name in COUNTRIES
+        )
+        ranges = ''.join(
+            f'<li data-range-key="{label}" data-start="{today - timedelta(days=days)}" data-end="{today}">{label}</li>'
+            for label, days in [('Today', 0), ('Last 7 Days', 6), ('Last 30 Days', 29)]
+        )
+        previous_month = today.replace(day=1) - timedelta(days=1)
+        return (
+            f'<div class="country-buttons">{buttons}</div>'
+            '<button type="button" id="filterButton" class="btn btn-primary">Filter</button>'
+            '<div id="filterDialog" class="modal" style="display: none;">'
+            '<form id="filterForm" class="modal-content">'
+            '<label>Date <input type="text" id="daterange" name="daterange" autocomplete="off"></label>'
+            '<div class="daterangepicker" style="display: none;">'
+            f'<div class="ranges"><ul>{ranges}<li data-range-key="Custom Range">Custom Range</li></ul></div>'
+            f'{_calendar("left", previous_month)}{_calendar("right", today)}'
+            '<div class="drp-buttons">'
+            '<button type="button" class="cancelBtn btn btn-sm btn-default">Cancel</button>'
+            '<button type="button" class="applyBtn btn btn-sm btn-primary">Apply</button>'
+            '</div></div>'
+            '<button type="submit" class="btn btn-main-primary">Apply</button>'
+            '</form></div>'
+        )
+
+    def count(self, kind, size):
+        with self._lock:
+            self.requests[kind] += 1
+            self.bytes_sent += size
+
+
+def _calendar(side, day):
+    """One month of the daterange picker"""
+    weeks = []
+    for week in calendar.Calendar(firstweekday=6).monthdatescalendar(day.year, day.month):
+        cells = ''.join(
+            f'<td class="available" data-date="{d}">{d.day}</td>' if d.month == day.month
+            else f'<td class="off ends available" data-date="{d}">{d.day}</td>'
+            for d in week
+        )
+        weeks.append(f'<tr>{cells}</tr>')
+    return (
+        f'<div class="drp-calendar {side}" style="display: none;">'
+        f'<table class="table-condensed"><thead><tr><th colspan="7" class="month">'
+        f'{day:%b %Y}</th></tr></thead><tbody>{"".join(weeks)}</tbody></table></div>'
+    )
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Routes requests to the MockCODPartner attached to the server"""
+
+    protocol_version = 'HTTP/1.1'
+    pages = {'/', '/dashboard', '/inventory', '/orders', '/reports/analytics/products'}
+
+    @property
+    def site(self):
+        return self.server.site
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+
+        if path == '/login':
+            return self._send(LOGIN_PAGE.format(error=''), kind='login')
+        if path in self.site.assets:
+            body, content_type = self.site.assets[path]
+            return self._send(body, content_type, kind='asset', cache=True)
+        if path.startswith('/storage/'):
+            return self._send(PIXEL, 'image/gif', kind='image', cache=True)
+
+        if not self._logged_in():
+            return self._redirect('/login')
+
+        if path in self.pages:
+            time.sleep(self.site.page_latency)
+            return self._send(self.site.page(path), kind='page')
+        if path.startswith('/orders/') and path[len('/orders/'):].isdigit():
+            time.sleep(self.site.page_latency)
+            return self._send(fixtures.order_detail_html(int(path[len('/orders/'):]), self.site.seed), kind='detail')
+
+        if path.startswith('/api/'):
+            query = parse_qs(url.query)
+            try:
+                length = int(query.get('length', ['10'])[0])
+            except ValueError:
+                length = 10
+            rows, shown = self.site.table(
+                path[len('/api/'):], length,
+                country=query.get('country', [''])[0],
+                daterange=query.get('daterange', [''])[0],
+            )
+            if rows is None:
+                return self._send('Not found', status=404, kind='missing')
+            time.sleep(self.site.latency)
+            payload = json.dumps({'rows': rows, 'shown': shown, 'total': self.site.rows})
+            return self._send(payload, 'application/json', kind='xhr')
+
+        return self._send('Not found', status=404, kind='missing')
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/login':
+            return self._send('Not found', status=404, kind='missing')
+
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        if not form.get('email') or not form.get('password'):
+            error = '<div class="alert alert-danger">These credentials do not match our records.</div>'
+            return self._send(LOGIN_PAGE.format(error=error), status=422, kind='login')
+
+        token = secrets.token_hex(16)
+        self.site.sessions.add(token)
+        self._redirect('/dashboard', cookie=f'{SESSION_COOKIE}={token}; Path=/; HttpOnly')
+
+    def _logged_in(self):
+        for part in (self.headers.get('Cookie') or '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == SESSION_COOKIE and value in self.site.sessions:
+                return True
+        return False
+
+    def _redirect(self, location, cookie=None):
+        self.send_response(302)
+        self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        if cookie:
+            self.send_header('Set-Cookie', cookie)
+        self.end_headers()
+        self.site.count('redirect', 0)
+
+    def _send(self, body, content_type='text/html; charset=utf-8', status=200, kind='page', cache=False):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'public, max-age=86400' if cache else 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+        self.site.count(kind, len(body))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local mock of the CODPARTNER dashboard")
+    parser.add_argument('--port', type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument('--rows', type=int, default=1000, help="Rows per table (default: 1000)")
+    parser.add_argument('--latency', type=float, default=0.5,
+                        help="Seconds per table load (default: 0.5)")
+    parser.add_argument('--page-latency', type=float, default=0.05,
+                        help="Seconds per page load (default: 0.05)")
+    args = parser.parse_args()
+
+    site = MockCODPartner(rows=args.rows, latency=args.latency,
+                          page_latency=args.page_latency, port=args.port)
+    site.start()
+    print("=" * 60)
+    print(f"🧪 Mock CODPARTNER running at {site.base_url}")
+    print("=" * 60)
+    print("Point the automation at it with:")
+    print(f"   CODPARTNER_BASE_URL={site.base_url}")
+    print("Any email/password logs in. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\n📊 Requests: {dict(site.requests)}")
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
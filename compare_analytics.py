@@ -5,72 +5,121 @@ Extract Saudi Arabia product analytics into CSV
 """
 
 from bs4 import BeautifulSoup
+import argparse
 import csv
 from pathlib import Path
 from datetime import datetime
 
+from automation.analytics import AnalyticsRange, analytics_row_from_cells, analytics_window
+from automation.analytics_cache import AnalyticsCache
+from automation.analytics_store import AnalyticsStore
+from automation.archive import RAW_PATTERNS, open_snapshot
+from automation.manifest import SnapshotManifest
+from automation import profiling
+from automation.metrics import finish_run, span, start_run
+
+
+COUNTRY = "Saudi arabia"  # Country button the analytics are downloaded for
+
+
+def parse_analytics_table(html_file):
+    """
+    Parse analytics HTML file into typed rows
+    Returns: list of dicts with product, counts (ints) and rates (floats, percent)
+    """
+    with open_snapshot(html_file) as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+    
+    # Find all table rows with data
+    # Columns 0: product (image and text), 1-8: leads .. pending, 9: Deliv.Rate
+    rows = soup.find_all('tr', role='row')
+    cells = ([td.get_text(strip=True) for td in row.find_all('td')] for row in rows)
+    return [row for row in map(analytics_row_from_cells, cells) if row]
+
 
 def parse_analytics_html(html_file):
     """
     Parse analytics HTML file and extract product data
     Returns: list of dicts with product analytics
     """
-    with open(html_file, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
+    return csv_rows(parse_analytics_table(html_file))
+
+
+def csv_rows(rows):
+    """CSV rows (as in Analytics_Products_*.csv) for typed analytics rows"""
+    return [
+        {
+            'Country': 'Saudi Arabia',
+            'Product Name': row['product'],
+            'Leads': row['leads'],
+            'Confirmed': row['confirmed'],
+            'Conf.Rate': _percent(row['confirmation_rate']),
+            'Delivery Rate': _percent(row['delivery_rate']),
+        }
+        for row in rows
+    ]
+
+
+def _percent(rate):
+    return f"{rate:.2f}%" if rate else "0%"
+
+
+def snapshot_window(snapshot):
+    """The (country, start, end) window an analytics snapshot was downloaded for"""
+    return (COUNTRY, *analytics_window(snapshot.captured_at))
+
+
+def snapshot_result(snapshot):
+    """AnalyticsRange parsed from an analytics snapshot"""
+    country, start, end = snapshot_window(snapshot)
+    return AnalyticsRange(country, start, end, rows=parse_analytics_table(snapshot.path),
+                          fetched_at=snapshot.captured_at)
+
+
+def cached_result(directory, country=COUNTRY):
+    """
+    The analytics window summed from the analytics cache
+    Returns: AnalyticsRange, or None if days are missing
+    """
+    start, end = analytics_window()
+    with AnalyticsCache(directory) as cache:
+        return cache.get_range(country, start, end) or cache.assemble(country, start, end)
+
+
+def trend_rows(trends):
+    """CSV rows for Analytics_Trends_*.csv"""
+    def rate(value):
+        return f"{value:.2f}%" if value is not None else ''
     
-    products = []
+    def change(value, unit=' pts'):
+        return f"{value:+.2f}{unit}" if value is not None else ''
     
-    # Find all table rows with data
-    rows = soup.find_all('tr', role='row')
+    return [
+        {
+            'Product Name': t['product'],
+            'Leads': t['leads'],
+            'Leads (avg)': f"{t['leads_avg']:.1f}",
+            'Leads WoW': f"{t['leads_wow']:+d}" if t['leads_wow'] is not None else '',
+            'Conf.Rate': rate(t['confirmation_rate']),
+            'Conf.Rate (avg)': rate(t['confirmation_rate_avg']),
+            'Conf.Rate WoW': change(t['confirmation_rate_wow']),
+            'Delivery Rate': rate(t['delivery_rate']),
+            'Delivery Rate (avg)': rate(t['delivery_rate_avg']),
+            'Delivery Rate WoW': change(t['delivery_rate_wow']),
+        }
+        for t in trends
+    ]
+
+
+def save_trends_to_csv(trends, output_file):
+    """Save per-product trends to CSV file"""
+    rows = trend_rows(trends)
+    with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
     
-    for row in rows:
-        tds = row.find_all('td')
-        if len(tds) < 10:  # Need at least 10 columns based on structure
-            continue
-        
-        try:
-            # Column 0: Product name (has image and text)
-            product_td = tds[0]
-            product_name = product_td.get_text(strip=True)
-            if not product_name or len(product_name) < 2:  # Skip empty/header rows
-                continue
-            
-            # Column 1: Leads
-            leads_text = tds[1].get_text(strip=True)
-            
-            # Column 2: Confirmed
-            confirmed_text = tds[2].get_text(strip=True)
-            
-            # Column 9: Deliv.Rate (Delivery Rate)
-            deliv_rate = tds[9].get_text(strip=True)
-            
-            # Only add if we have valid data
-            if leads_text and confirmed_text:
-                # Calculate confirmation rate: (Confirmed / Leads) * 100
-                try:
-                    leads = int(leads_text)
-                    confirmed = int(confirmed_text)
-                    if leads > 0:
-                        conf_rate = f"{(confirmed / leads * 100):.2f}%"
-                    else:
-                        conf_rate = "0%"
-                except (ValueError, ZeroDivisionError):
-                    conf_rate = "N/A"
-                
-                products.append({
-                    'Country': 'Saudi Arabia',
-                    'Product Name': product_name,
-                    'Leads': leads_text,
-                    'Confirmed': confirmed_text,
-                    'Conf.Rate': conf_rate,
-                    'Delivery Rate': deliv_rate
-                })
-            
-        except (ValueError, AttributeError, IndexError) as e:
-            # Skip rows that don't have proper data
-            continue
-    
-    return products
+    print(f"💾 Saved trends to: {output_file}")
 
 
 def save_to_csv(products, output_file):
@@ -109,17 +158,22 @@ def extract_date_from_filename(filepath):
     return today
 
 
-def find_latest_analytics_html(directory):
-    """Find the most recent analytics HTML file"""
-    html_files = list(Path(directory).glob("Analytics_Products*.html"))
+def find_latest_analytics_snapshot(directory):
+    """Find the most recent analytics snapshot from the manifest"""
+    with SnapshotManifest(directory) as manifest:
+        manifest.sync('analytics', RAW_PATTERNS['analytics'])
+        snapshots = manifest.latest('analytics', 1)
     
-    if len(html_files) == 0:
+    if len(snapshots) == 0:
         return None
     
-    # Sort by modification time (newest first)
-    html_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-    
-    return html_files[0]
+    return snapshots[0]
+
+
+def find_latest_analytics_html(directory):
+    """Find the most recent analytics HTML file"""
+    snapshot = find_latest_analytics_snapshot(directory)
+    return snapshot.path if snapshot else None
 
 
 def main():
@@ -127,32 +181,79 @@ def main():
     print("📊 Product Analytics Processing - Saudi Arabia")
     print("=" * 60)
     
-    # Get script directory
-    script_dir = Path(__file__).parent
-    
-    # Find latest analytics HTML file
-    analytics_file = find_latest_analytics_html(script_dir)
-    
-    if not analytics_file:
-        print("❌ Error: No Analytics HTML file found")
-        print(f"   Looking in: {script_dir}")
-        print("   Please run download_analytics.py first")
-        return
+    parser = argparse.ArgumentParser(description="Extract product analytics into CSV")
+    parser.add_argument('--dir', type=Path, default=Path(__file__).parent,
+                        help="Folder with the analytics HTML files (default: this folder)")
+    parser.add_argument('--from-cache', action='store_true',
+                        help="Build the window from the analytics cache (cached analytics mode) instead of a snapshot")
+    parser.add_argument('--profile', action='store_true',
+                        help="Write cProfile, tracemalloc and flamegraph reports to profiles/")
+    args = parser.parse_args()
     
-    print(f"\n📁 Processing file: {analytics_file.name}")
-    print()
+    # Folder holding the snapshots (and where reports are written)
+    script_dir = args.dir
+    start_run(script_dir)
+    if args.profile:
+        profiling.enable(script_dir)
     
-    # Parse analytics
-    products = parse_analytics_html(analytics_file)
+    if args.from_cache:
+        with span('compare_analytics.query_cache') as s:
+            result = cached_result(script_dir)
+            s.rows = len(result.rows) if result else 0
+        if result is None:
+            print("❌ Error: The analytics window is not fully cached")
+            print("   Please run download_analytics.py (cached analytics mode) first")
+            return
+        date = datetime.now().strftime('%b%d').upper()
+        source, snapshot_id = 'cache', None
+    else:
+        # Find latest analytics snapshot
+        snapshot = find_latest_analytics_snapshot(script_dir)
+        
+        if not snapshot:
+            print("❌ Error: No Analytics HTML file found")
+            print(f"   Looking in: {script_dir}")
+            print("   Please run download_analytics.py first")
+            return
+        
+        analytics_file = snapshot.path
+        print(f"\n📁 Processing file: {analytics_file.name} ({snapshot.label})")
+        print()
+        
+        # Parse analytics
+        with span('compare_analytics.parse') as s:
+            result = snapshot_result(snapshot)
+            s.rows = len(result.rows)
+        date = snapshot.label
+        source, snapshot_id = 'snapshot', snapshot.id
     
+    products = csv_rows(result.rows)
     print(f"✅ Found {len(products)} products")
     
-    # Generate output filename
-    date = extract_date_from_filename(analytics_file)
+    # Generate output filename (an unchanged capture reuses an older archive file)
     output_file = script_dir / f"Analytics_Products_Saudi_{date}.csv"
     
     # Save to CSV
-    save_to_csv(products, output_file)
+    with span('compare_analytics.write_csv') as s:
+        save_to_csv(products, output_file)
+        s.rows = len(products)
+        s.add_file(output_file)
+    
+    # Keep the typed results, then compare with earlier windows
+    with span('compare_analytics.trends') as s, AnalyticsStore(script_dir) as store:
+        if not args.from_cache:
+            with SnapshotManifest(script_dir) as manifest:
+                earlier = [old for old in manifest.all('analytics') if old.id != snapshot.id]
+            backfilled = store.catch_up(earlier, snapshot_result, snapshot_window)
+            if backfilled:
+                print(f"📥 Stored {backfilled} earlier analytics snapshot(s)")
+        store.ingest(result, source, snapshot_id=snapshot_id)
+        trends = store.trends(result.country, result.end, days=result.days)
+        s.rows = len(trends)
+    
+    if trends:
+        trends_file = script_dir / f"Analytics_Trends_Saudi_{date}.csv"
+        save_trends_to_csv(trends, trends_file)
     
     # Print summary
     if products:
@@ -166,10 +267,20 @@ def main():
             print(f"     Leads: {product['Leads']} | Confirmed: {product['Confirmed']} | Conf.Rate: {product['Conf.Rate']}")
         print()
     
+    movers = [t for t in trends if t['confirmation_rate_wow'] is not None]
+    if movers:
+        print("📉 Biggest confirmation-rate changes vs a week earlier:")
+        for t in sorted(movers, key=lambda t: abs(t['confirmation_rate_wow']), reverse=True)[:5]:
+            print(f"  {t['product'][:50]}: {t['confirmation_rate']:.2f}% ({t['confirmation_rate_wow']:+.2f} pts)")
+        print()
+    
     print("✨ Done! Open the CSV file to view all results.")
     print("=" * 60)
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        finish_run()
 
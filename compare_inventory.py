@@ -5,17 +5,25 @@ Automatically compares the 2 newest HTML inventory files
 """
 
 from bs4 import BeautifulSoup
+import argparse
 import csv
 import sys
 from pathlib import Path
 
+from automation.archive import RAW_PATTERNS, open_snapshot
+from automation.ledger import InventoryLedger
+from automation.manifest import SnapshotManifest
+from automation import profiling
+from automation.metrics import finish_run, span, start_run
+from automation.stage_cache import StageCache
+
 
 def parse_inventory_html(html_file):
     """
     Parse inventory HTML file and extract product data
     Returns: dict with key=(product_name, warehouse) and value=expected_stock
     """
-    with open(html_file, 'r', encoding='utf-8') as f:
+    with open_snapshot(html_file) as f:
         soup = BeautifulSoup(f.read(), 'html.parser')
     
     inventory = {}
@@ -89,27 +97,27 @@ def extract_date_from_filename(filepath):
     return Path(filepath).stem.replace(' ', '-')
 
 
-def find_html_files(directory):
-    """Find all inventory HTML files and sort by modification time (oldest first)"""
-    # Only match inventory files, not orders or analytics
-    html_files = list(Path(directory).glob("Inventory*.html"))
-    
-    if len(html_files) == 0:
-        return []
-    
-    # Sort by modification time (oldest to newest)
-    html_files.sort(key=lambda x: x.stat().st_mtime)
-    
-    return html_files
+def find_snapshots(directory, limit=None):
+    """Find the latest inventory snapshots from the manifest (oldest first)"""
+    with SnapshotManifest(directory) as manifest:
+        # Register inventory files the manifest hasn't seen yet (e.g. copied in by hand)
+        manifest.sync('inventory', RAW_PATTERNS['inventory'])
+        return manifest.latest('inventory', limit)
 
 
-def compare_inventories(old_file, new_file):
+def find_html_files(directory, limit=None):
+    """Find the latest inventory snapshot files (oldest first)"""
+    return [snapshot.path for snapshot in find_snapshots(directory, limit)]
+
+
+def compare_inventories(old_file, new_file, old_date=None, new_date=None):
     """
     Compare two inventory files and return active products (simple daily comparison)
+    Dates default to the ones in the filenames
     Returns: (active_products, old_date, new_date)
     """
-    old_date = extract_date_from_filename(old_file)
-    new_date = extract_date_from_filename(new_file)
+    old_date = old_date or extract_date_from_filename(old_file)
+    new_date = new_date or extract_date_from_filename(new_file)
     
     print(f"📂 Reading old inventory: {old_file.name}")
     old_inventory = parse_inventory_html(old_file)
@@ -148,6 +156,36 @@ def compare_inventories(old_file, new_file):
     return active_products, old_date, new_date
 
 
+def compare_from_ledger(ledger, old_entry, new_entry, old_date, new_date):
+    """
+    Same comparison as compare_inventories, read from the ledger's change
+    records instead of parsing both snapshots
+    Returns: (active_products, old_date, new_date)
+    """
+    print(f"📒 Reading stock changes {old_date} -> {new_date} from the ledger")
+    changes = ledger.changes_between(old_entry['id'], new_entry['id'])
+    
+    active_products = []
+    for (product_name, warehouse), (old_stock, new_stock) in changes.items():
+        # Only products listed in both snapshots
+        if old_stock is None or new_stock is None:
+            continue
+        active_products.append({
+            'Product Name': product_name,
+            'Warehouse': warehouse,
+            old_date: old_stock,
+            new_date: new_stock,
+            'Sold Products': old_stock - new_stock
+        })
+    
+    # Sort by Sold Products (highest first)
+    active_products.sort(key=lambda x: x['Sold Products'], reverse=True)
+    
+    print(f"✅ Found {len(active_products)} active products (with stock changes)")
+    
+    return active_products, old_date, new_date
+
+
 def save_to_csv(products, output_file, old_date, new_date):
     """Save products to CSV file"""
     if not products:
@@ -170,42 +208,85 @@ def main():
     print("📊 Stock Management - Inventory Comparison")
     print("=" * 60)
     
-    # Get script directory
-    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Compare the 2 newest inventory snapshots")
+    parser.add_argument('--dir', type=Path, default=Path(__file__).parent,
+                        help="Folder with the inventory HTML files (default: this folder)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Write cProfile, tracemalloc and flamegraph reports to profiles/")
+    args = parser.parse_args()
+    
+    # Folder holding the snapshots (and where reports are written)
+    script_dir = args.dir
+    start_run(script_dir)
+    if args.profile:
+        profiling.enable(script_dir)
     
-    # Find all HTML files
-    html_files = find_html_files(script_dir)
+    # Find the latest snapshots
+    snapshots = find_snapshots(script_dir, limit=2)
     
-    if len(html_files) == 0:
+    if len(snapshots) == 0:
         print("❌ Error: No HTML files found in this directory")
         print(f"   Looking in: {script_dir}")
         print("   Please add your inventory HTML files to this folder")
         return
     
-    if len(html_files) == 1:
+    if len(snapshots) == 1:
         print("❌ Error: Only 1 HTML file found. Need at least 2 files to compare.")
-        print(f"   Found: {html_files[0].name}")
+        print(f"   Found: {snapshots[0].path.name}")
         print("   Please add another inventory HTML file to compare")
         return
     
-    # Use the 2 newest files (last 2 in the sorted list)
-    old_file = html_files[-2]  # Second newest (older)
-    new_file = html_files[-1]  # Newest
+    # Use the 2 newest snapshots (last 2 in the sorted list)
+    old_snapshot = snapshots[-2]  # Second newest (older)
+    new_snapshot = snapshots[-1]  # Newest
+    old_file, new_file = old_snapshot.path, new_snapshot.path
     
     print(f"\n📁 Auto-detected files:")
-    print(f"   OLD: {old_file.name}")
-    print(f"   NEW: {new_file.name}")
+    print(f"   OLD: {old_file.name} ({old_snapshot.label})")
+    print(f"   NEW: {new_file.name} ({new_snapshot.label})")
     print()
     
-    # Generate output filename using the newest file's date
-    new_date = extract_date_from_filename(new_file)
+    # Generate output filename using the newest snapshot's date
+    old_date, new_date = old_snapshot.label, new_snapshot.label
     output_file = script_dir / f"Stock_{new_date}.csv"
     
-    # Compare inventories
-    active_products, old_date, new_date = compare_inventories(old_file, new_file)
-    
-    # Save to CSV
-    save_to_csv(active_products, output_file, old_date, new_date)
+    # Same inputs as an earlier run: reuse its output
+    with StageCache(script_dir) as cache:
+        cache_key = cache.key(old_snapshot.sha256, new_snapshot.sha256, old_date, new_date)
+        if cache.reuse('compare_inventory', cache_key, output_file):
+            print("♻️  Snapshots unchanged since the last run - reusing previous results")
+            print("=" * 60)
+            return
+        
+        if old_snapshot.sha256 == new_snapshot.sha256:
+            # Identical tables: nothing can have changed, skip parsing
+            print("♻️  Inventory unchanged between the two snapshots")
+            active_products = []
+        else:
+            # Compare inventories via the ledger (parses only snapshots it hasn't seen)
+            with InventoryLedger(script_dir) as ledger:
+                with span('compare_inventory.ledger') as s:
+                    s.rows = ledger.catch_up(snapshots, parse_inventory_html)
+                old_entry = ledger.entry_for(old_snapshot.id)
+                new_entry = ledger.entry_for(new_snapshot.id)
+                
+                with span('compare_inventory.compare') as s:
+                    if old_entry and new_entry:
+                        active_products, old_date, new_date = compare_from_ledger(
+                            ledger, old_entry, new_entry, old_date, new_date
+                        )
+                    else:
+                        active_products, old_date, new_date = compare_inventories(
+                            old_file, new_file, old_date, new_date
+                        )
+                    s.rows = len(active_products)
+        
+        # Save to CSV
+        with span('compare_inventory.write_csv') as s:
+            save_to_csv(active_products, output_file, old_date, new_date)
+            s.rows = len(active_products)
+            s.add_file(output_file)
+        cache.store('compare_inventory', cache_key, output_file if active_products else None)
     
     # Print summary
     print("\n" + "=" * 60)
@@ -224,4 +305,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        finish_run()
@@ -5,67 +5,93 @@ Extract orders with 'Not Available' shipping status from CODPARTNER
 """
 
 from bs4 import BeautifulSoup
+import argparse
 import csv
 from pathlib import Path
 from datetime import datetime
 
+from automation.archive import RAW_PATTERNS, open_snapshot
+from automation.manifest import SnapshotManifest
+from automation import profiling
+from automation.metrics import finish_run, span, start_run
+from automation.orders_store import OrdersStore, is_not_available, order_columns, order_from_cells
+from automation.stage_cache import StageCache
+from automation.status_history import ShippingStatusHistory
 
-def parse_orders_html(html_file):
+
+def parse_orders_table(html_file):
     """
-    Parse orders HTML file and extract orders with 'Not Available' shipping status
-    Returns: list of dicts with date, reference, link
+    Parse every order of an orders HTML file (any shipping status)
+    Returns: list of order dicts as stored in the orders store
     """
-    with open(html_file, 'r', encoding='utf-8') as f:
+    with open_snapshot(html_file) as f:
         soup = BeautifulSoup(f.read(), 'html.parser')
     
     orders = []
     
+    # Reference, date, product, status and shipping columns, found by their header labels
+    table = soup.find('table', id='orders') or soup
+    columns = order_columns([th.get_text(strip=True) for th in table.select('thead th')])
+    
     # Find all table rows with data
-    rows = soup.find_all('tr', role='row')
+    rows = table.find_all('tr', role='row')
     
     for row in rows:
-        tds = row.find_all('td')
-        if len(tds) < 8:  # Need at least 8 columns for status
-            continue
-        
-        try:
-            # Column 0: Order reference (#COD5829541)
-            reference_text = tds[0].get_text(strip=True)
-            if not reference_text.startswith('#COD'):
-                continue
-            
-            reference = reference_text
-            
-            # Column 2: Order date (2025-10-14 20:47:48)
-            date_text = tds[2].get_text(strip=True)
-            
-            # Column 7: Shipping status
-            shipping_status = tds[7].get_text(strip=True)
-            
-            # Only include orders with "Not Available" or "not available" status
-            if "not available" in shipping_status.lower():
-                # Generate link from reference
-                # #COD5829541 -> https://app.codpartner.com/orders/5829541
-                order_id = reference.replace('#COD', '')
-                link = f"https://app.codpartner.com/orders/{order_id}"
-                
-                orders.append({
-                    'Date': date_text,
-                    'Reference': reference,
-                    'Link': link
-                })
-            
-        except (ValueError, AttributeError, IndexError):
-            # Skip rows that don't have proper data
-            continue
+        order = order_from_cells([td.get_text(strip=True) for td in row.find_all('td')], columns)
+        if order:
+            orders.append(order)
     
     return orders
 
 
+def parse_orders_html(html_file):
+    """
+    Parse orders HTML file and extract orders with 'Not Available' shipping status
+    Returns: list of dicts with date, reference, link
+    """
+    return [
+        {'Date': order['order_date'], 'Reference': order['reference'], 'Link': order_link(order['reference'])}
+        for order in parse_orders_table(html_file)
+        if is_not_available(order['shipping_status'])
+    ]
+
+
+def order_link(reference):
+    """#COD5829541 -> https://app.codpartner.com/orders/5829541"""
+    order_id = reference.replace('#COD', '')
+    return f"https://app.codpartner.com/orders/{order_id}"
+
+
+def not_available_rows(store, fresh_only=False):
+    """
+    CSV rows for the orders store's current 'Not Available' orders, longest-stuck first
+
+    Orders the latest run did not see are marked Stale: their status is only
+    known as of Last Seen.
+    """
+    return add_details([
+        {'Date': order['order_date'], 'Reference': order['reference'],
+         'Days Not Available': order['age_days'], 'Last Seen': order['last_seen'][:10],
+         'Stale': 'yes' if order['stale'] else '', 'Link': order_link(order['reference'])}
+        for order in store.not_available(fresh_only=fresh_only)
+    ], store)
+
+
+def add_details(orders, store):
+    """Fill in Product, City and Notes from the enriched order details (blank until fetched)"""
+    details = store.details(order['Reference'] for order in orders)
+    for order in orders:
+        fields = details.get(order['Reference'], {})
+        order['Product'] = fields.get('product') or ''
+        order['City'] = fields.get('city') or ''
+        order['Notes'] = fields.get('notes') or ''
+    return orders
+
+
 def save_orders_to_csv(orders, output_file):
     """Save orders to CSV file"""
     with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
-        fieldnames = ['Date', 'Reference', 'Link']
+        fieldnames = ['Date', 'Reference', 'Days Not Available', 'Last Seen', 'Stale', 'Product', 'City', 'Notes', 'Link']
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         
         writer.writeheader()
@@ -75,6 +101,12 @@ def save_orders_to_csv(orders, output_file):
             writer.writerow({
                 'Date': '',
                 'Reference': 'Rest easy, all orders have shipping status available',
+                'Days Not Available': '',
+                'Last Seen': '',
+                'Stale': '',
+                'Product': '',
+                'City': '',
+                'Notes': '',
                 'Link': ''
             })
             print("✅ No orders with 'Not Available' status - All good!")
@@ -108,17 +140,22 @@ def extract_date_from_filename(filepath):
     return today
 
 
-def find_latest_orders_html(directory):
-    """Find the most recent orders HTML file"""
-    html_files = list(Path(directory).glob("Orders*.html"))
+def find_latest_orders_snapshot(directory):
+    """Find the most recent orders snapshot from the manifest"""
+    with SnapshotManifest(directory) as manifest:
+        manifest.sync('orders', RAW_PATTERNS['orders'])
+        snapshots = manifest.latest('orders', 1)
     
-    if len(html_files) == 0:
+    if len(snapshots) == 0:
         return None
     
-    # Sort by modification time (newest first)
-    html_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-    
-    return html_files[0]
+    return snapshots[0]
+
+
+def find_latest_orders_html(directory):
+    """Find the most recent orders HTML file"""
+    snapshot = find_latest_orders_snapshot(directory)
+    return snapshot.path if snapshot else None
 
 
 def main():
@@ -126,34 +163,106 @@ def main():
     print("📦 Orders Processing - Not Available Shipping Status")
     print("=" * 60)
     
-    # Get script directory
-    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Extract orders with 'Not Available' shipping status")
+    parser.add_argument('--dir', type=Path, default=Path(__file__).parent,
+                        help="Folder with the orders HTML files (default: this folder)")
+    parser.add_argument('--from-store', action='store_true',
+                        help="Read orders from the orders store (incremental orders mode) instead of a snapshot")
+    parser.add_argument('--fresh-only', action='store_true',
+                        help="With --from-store, leave out orders the latest orders run did not see")
+    parser.add_argument('--profile', action='store_true',
+                        help="Write cProfile, tracemalloc and flamegraph reports to profiles/")
+    args = parser.parse_args()
+    
+    # Folder holding the snapshots (and where reports are written)
+    script_dir = args.dir
+    start_run(script_dir)
+    if args.profile:
+        profiling.enable(script_dir)
+    
+    if args.from_store:
+        with span('compare_orders.query_store') as s, OrdersStore(script_dir) as store:
+            orders = not_available_rows(store, fresh_only=args.fresh_only)
+            resolved = store.resolved_since_last_run()
+            s.rows = len(orders)
+        print(f"\n✅ Found {len(orders)} orders with 'Not Available' shipping status in the orders store")
+        
+        today = datetime.now().strftime('%b%d').upper()
+        output_file = script_dir / f"Orders_Not_Available_{today}.csv"
+        with span('compare_orders.write_csv') as s:
+            save_orders_to_csv(orders, output_file)
+            s.rows = len(orders)
+            s.add_file(output_file)
+        print_summary(orders, resolved)
+        return
     
-    # Find latest orders HTML file
-    orders_file = find_latest_orders_html(script_dir)
+    # Find latest orders snapshot
+    snapshot = find_latest_orders_snapshot(script_dir)
     
-    if not orders_file:
+    if not snapshot:
         print("❌ Error: No Orders HTML file found")
         print(f"   Looking in: {script_dir}")
         print("   Please run download first")
         return
     
-    print(f"\n📁 Processing file: {orders_file.name}")
+    orders_file = snapshot.path
+    print(f"\n📁 Processing file: {orders_file.name} ({snapshot.label})")
     print()
     
-    # Parse orders
-    orders = parse_orders_html(orders_file)
-    
-    print(f"✅ Found {len(orders)} orders with 'Not Available' shipping status")
-    
     # Generate output filename
-    date = extract_date_from_filename(orders_file)
+    date = snapshot.label
     output_file = script_dir / f"Orders_Not_Available_{date}.csv"
     
-    # Save to CSV
-    save_orders_to_csv(orders, output_file)
+    with StageCache(script_dir) as cache:
+        # Orders table unchanged since an earlier run today: reuse its CSV
+        # (ages change daily, detail columns whenever more orders are enriched)
+        with OrdersStore(script_dir) as store:
+            details_updated = store.details_updated()
+        cache_key = cache.key(snapshot.sha256, datetime.now().date(), details_updated)
+        if cache.reuse('compare_orders', cache_key, output_file):
+            print("♻️  Orders unchanged since the last run - reusing previous results")
+            print(f"💾 Results in: {output_file}")
+            print("=" * 60)
+            return
+        
+        # Parse orders
+        with span('compare_orders.parse') as s:
+            all_orders = parse_orders_table(orders_file)
+            s.rows = len(all_orders)
+        
+        # Record status transitions, then read back how long each order has been stuck
+        with span('compare_orders.update_store') as s, OrdersStore(script_dir) as store:
+            run_id = store.new_run('snapshot')
+            store.upsert(all_orders, seen_at=snapshot.captured_at, run_id=run_id)
+            ages = {order['reference']: order['age_days'] for order in store.not_available()}
+            resolved = store.resolved_since_last_run()
+            orders = add_details([
+                {'Date': order['order_date'], 'Reference': order['reference'],
+                 'Days Not Available': ages.get(order['reference'], 0),
+                 'Last Seen': snapshot.captured_at.strftime('%Y-%m-%d'), 'Stale': '',
+                 'Link': order_link(order['reference'])}
+                for order in all_orders if is_not_available(order['shipping_status'])
+            ], store)
+            s.rows = len(all_orders)
+        
+        # The same parse feeds the shipping-status trends (every status, not just Not Available)
+        with span('compare_orders.status_history') as s, ShippingStatusHistory(script_dir) as history:
+            history.record(snapshot, all_orders)
+            s.rows = len(all_orders)
+        
+        print(f"✅ Found {len(orders)} orders with 'Not Available' shipping status")
+        
+        # Save to CSV
+        with span('compare_orders.write_csv') as s:
+            save_orders_to_csv(orders, output_file)
+            s.rows = len(orders)
+            s.add_file(output_file)
+        cache.store('compare_orders', cache_key, output_file)
     
-    # Print summary
+    print_summary(orders, resolved)
+
+
+def print_summary(orders, resolved=()):
     if orders:
         print("\n" + "=" * 60)
         print("📈 SUMMARY")
@@ -161,7 +270,22 @@ def main():
         print(f"Total orders needing attention: {len(orders)}")
         print(f"\nFirst 5 orders:")
         for i, order in enumerate(orders[:5], 1):
-            print(f"  {i}. {order['Reference']} - {order['Date']}")
+            print(f"  {i}. {order['Reference']} - {order['Date']} "
+                  f"(Not Available for {order['Days Not Available']} day(s))")
+        current = [order for order in orders if not order['Stale']]
+        if current:
+            stuck = max(current, key=lambda order: order['Days Not Available'])
+            print(f"\nLongest stuck: {stuck['Reference']} - {stuck['Days Not Available']} day(s)")
+        stale = len(orders) - len(current)
+        if stale:
+            print(f"\n⚠️  {stale} order(s) were not seen in the latest orders run (Stale column); "
+                  f"their status is as of their Last Seen date")
+        print()
+    
+    if resolved:
+        print(f"🎉 {len(resolved)} order(s) resolved since the last run:")
+        for order in resolved[:10]:
+            print(f"  - {order['reference']}: {order['old_shipping_status']} -> {order['new_shipping_status']}")
         print()
     
     print("✨ Done! Open the CSV file to view all results.")
@@ -169,5 +293,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        finish_run()
 
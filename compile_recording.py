@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Recording Compiler
+Turn a Playwright codegen script into a declarative flow (flows/<name>.json)
+that run_flow.py replays without sleeps
+
+Usage:
+    python3 compile_recording.py run_my_recording.py
+    python3 compile_recording.py my_codegen.py --name analytics_filter
+"""
+
+from pathlib import Path
+import argparse
+import sys
+
+from automation.flows import compile_codegen, describe
+
+
+FLOWS_DIR = Path(__file__).parent / "flows"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a codegen recording into a flow")
+    parser.add_argument('script', type=Path, help="Codegen (or hand-edited) Python script")
+    parser.add_argument('--name', help="Flow name (default: script name)")
+    parser.add_argument('-o', '--output', type=Path, help="Flow file (default: flows/<name>.json)")
+    args = parser.parse_args()
+
+    if not args.script.exists():
+        print(f"❌ Script not found: {args.script}")
+        sys.exit(1)
+
+    name = args.name or args.script.stem
+    output = args.output or FLOWS_DIR / f"{name}.json"
+
+    print("=" * 60)
+    print("🛠️  Compiling recording into a flow")
+    print("=" * 60)
+    print(f"📄 Source: {args.script}")
+
+    try:
+        flow = compile_codegen(args.script.read_text(encoding='utf-8'), name=name, source_path=args.script)
+    except SyntaxError as e:
+        print(f"❌ Could not parse the script: {e}")
+        sys.exit(1)
+
+    if not flow.steps:
+        print("❌ No browser actions found in the script")
+        sys.exit(1)
+
+    print(f"\n📋 {len(flow)} steps:")
+    for number, step in enumerate(flow.steps, 1):
+        print(f"   {number:>2}. {describe(step)[:90]}")
+
+    if flow.warnings:
+        print(f"\n⚠️  {len(flow.warnings)} statement(s) skipped or flattened:")
+        for warning in flow.warnings:
+            print(f"   - {warning}")
+
+    flow.save(output)
+    print(f"\n💾 Saved to: {output}")
+    print(f"▶️  Run it with: python3 run_flow.py {output}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
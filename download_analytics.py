@@ -4,7 +4,11 @@ Download Product Analytics from CODPARTNER
 Run this to get Saudi Arabia product analytics data
 """
 
+from automation.archive import prune_archive
 from automation.codpartner import CODPartnerAutomation
+from automation.config import Config
+from automation.metrics import finish_run, start_run
+from automation.utils import clean_old_files
 from pathlib import Path
 
 
@@ -12,6 +16,7 @@ def main():
     print("=" * 60)
     print("📊 CODPARTNER Analytics Downloader (Saudi Arabia)")
     print("=" * 60)
+    start_run(Config.DOWNLOAD_DIR)
     
     try:
         # Use context manager for automatic cleanup
@@ -19,13 +24,26 @@ def main():
             # Login
             bot.login()
             
-            # Download analytics
-            filepath = bot.download_analytics(country="Saudi arabia")
+            if Config.ANALYTICS_MODE == 'cached':
+                # Only days missing from the analytics cache are fetched
+                bot.analytics_window(country="Saudi arabia")
+                next_step = "compare_analytics.py --from-cache"
+            else:
+                # Download analytics
+                filepath = bot.download_analytics(country="Saudi arabia")
+                # Older captures live on (compressed) in the archive
+                prune_archive(Config.DOWNLOAD_DIR)
+                clean_old_files(
+                    directory=Config.DOWNLOAD_DIR,
+                    pattern="Analytics_Products*.html",
+                    keep_recent=7
+                )
+                next_step = "compare_analytics.py"
         
         print("\n" + "=" * 60)
         print("✅ SUCCESS! Analytics downloaded")
         print("=" * 60)
-        print("\nNext step: Run compare_analytics.py to process the data")
+        print(f"\nNext step: Run {next_step} to process the data")
         
     except Exception as e:
         print(f"\n❌ ERROR: {e}")
@@ -33,5 +51,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        finish_run()
 
@@ -5,14 +5,17 @@ Run this daily to get fresh inventory data
 """
 
 from automation.codpartner import CODPartnerAutomation
+from automation.config import Config
+from automation.metrics import finish_run, start_run
+from automation.archive import prune_archive
 from automation.utils import clean_old_files
-from pathlib import Path
 
 
 def main():
     print("=" * 60)
     print("📊 CODPARTNER Inventory Downloader")
     print("=" * 60)
+    start_run(Config.DOWNLOAD_DIR)
     
     try:
         # Use context manager for automatic cleanup
@@ -23,9 +26,12 @@ def main():
             # Download inventory
             filepath = bot.download_inventory()
             
+            # Archive anything new and thin out the archive (daily -> weekly -> monthly)
+            prune_archive(Config.DOWNLOAD_DIR)
+            
             # Optional: Clean up old files (keep last 7)
             clean_old_files(
-                directory=Path(__file__).parent,
+                directory=Config.DOWNLOAD_DIR,
                 pattern="Inventory*.html",
                 keep_recent=7
             )
@@ -40,4 +46,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        finish_run()
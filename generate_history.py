@@ -6,17 +6,26 @@ Shows products with ANY stock changes in the last 7 days
 """
 
 from bs4 import BeautifulSoup
+import argparse
 import csv
 from pathlib import Path
 from datetime import datetime
 
+from automation.archive import RAW_PATTERNS, open_snapshot
+from automation.cube import StockCube
+from automation.ledger import InventoryLedger
+from automation.manifest import SnapshotManifest
+from automation import profiling
+from automation.metrics import finish_run, span, start_run
+from automation.stage_cache import StageCache
+
 
 def parse_inventory_html(html_file):
     """
     Parse inventory HTML file and extract product data
     Returns: dict with key=(product_name, warehouse) and value=expected_stock
     """
-    with open(html_file, 'r', encoding='utf-8') as f:
+    with open_snapshot(html_file) as f:
         soup = BeautifulSoup(f.read(), 'html.parser')
     
     inventory = {}
@@ -76,37 +85,50 @@ def extract_date_from_filename(filepath):
     return Path(filepath).stem.replace(' ', '-')
 
 
-def find_html_files(directory):
-    """Find all inventory HTML files and sort by modification time (oldest first)"""
-    # Only match inventory files, not orders or analytics
-    html_files = list(Path(directory).glob("Inventory*.html"))
-    
-    if len(html_files) == 0:
-        return []
-    
-    # Sort by modification time (oldest to newest)
-    html_files.sort(key=lambda x: x.stat().st_mtime)
-    
-    return html_files
+def find_snapshots(directory, limit=None):
+    """Find the latest inventory snapshots from the manifest (oldest first)"""
+    with SnapshotManifest(directory) as manifest:
+        # Register inventory files the manifest hasn't seen yet (e.g. copied in by hand)
+        manifest.sync('inventory', RAW_PATTERNS['inventory'])
+        return manifest.latest('inventory', limit)
+
+
+def find_html_files(directory, limit=None):
+    """Find the latest inventory snapshot files (oldest first)"""
+    return [snapshot.path for snapshot in find_snapshots(directory, limit)]
 
 
-def generate_history(files):
+def generate_history(files, dates=None):
     """
     Generate 7-day history for all products with stock changes
+    Dates default to the ones in the filenames
     Returns: (active_products, date_columns)
     """
     # Parse all files and store inventories
     inventories = []
-    date_columns = []
+    parsed = {}
     
-    for file in files:
-        print(f"📂 Reading inventory: {file.name}")
-        inventory = parse_inventory_html(file)
-        print(f"   Found {len(inventory)} products")
+    for i, file in enumerate(files):
+        # Unchanged snapshots share one archived file, parse it only once
+        if file not in parsed:
+            print(f"📂 Reading inventory: {file.name}")
+            parsed[file] = parse_inventory_html(file)
+            print(f"   Found {len(parsed[file])} products")
+        inventory = parsed[file]
         
-        date = extract_date_from_filename(file)
+        date = dates[i] if dates else extract_date_from_filename(file)
         inventories.append({'date': date, 'data': inventory})
-        date_columns.append(date)
+    
+    return build_history(inventories)
+
+
+def build_history(inventories):
+    """
+    Build the history rows from parsed inventories
+    inventories: list of {'date': label, 'data': {(product_name, warehouse): stock}}, oldest first
+    Returns: (active_products, date_columns)
+    """
+    date_columns = [inv['date'] for inv in inventories]
     
     # Get today's and yesterday's inventory for sold calculation
     today_inventory = inventories[-1]['data']
@@ -198,35 +220,90 @@ def main():
     print("📊 Stock History Generator - 7-Day View")
     print("=" * 60)
     
-    # Get script directory
-    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Generate the 7-day stock history")
+    parser.add_argument('--dir', type=Path, default=Path(__file__).parent,
+                        help="Folder with the inventory HTML files (default: this folder)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Write cProfile, tracemalloc and flamegraph reports to profiles/")
+    args = parser.parse_args()
+    
+    # Folder holding the snapshots (and where reports are written)
+    script_dir = args.dir
+    start_run(script_dir)
+    if args.profile:
+        profiling.enable(script_dir)
     
-    # Find all HTML files
-    html_files = find_html_files(script_dir)
+    # Find the latest snapshots
+    snapshots = find_snapshots(script_dir, limit=7)
     
-    if len(html_files) == 0:
+    if len(snapshots) == 0:
         print("❌ Error: No Inventory HTML files found")
         print(f"   Looking in: {script_dir}")
         return
     
-    if len(html_files) == 1:
+    if len(snapshots) == 1:
         print("❌ Error: Only 1 HTML file found. Need at least 2 files.")
         return
     
-    # Use up to the last 7 files (or all if less than 7)
-    files_to_use = html_files[-7:] if len(html_files) >= 7 else html_files
+    # Use up to the last 7 snapshots (or all if less than 7)
+    snapshots = snapshots[-7:]
+    files_to_use = [snapshot.path for snapshot in snapshots]
+    dates = [snapshot.label for snapshot in snapshots]
     
     print(f"\n📁 Using {len(files_to_use)} file(s) for history:")
-    for file in files_to_use:
-        print(f"   - {file.name}")
+    for snapshot in snapshots:
+        print(f"   - {snapshot.path.name} ({snapshot.label})")
     print()
     
-    # Generate history
-    active_products, date_columns = generate_history(files_to_use)
-    
-    # Save to Stock_History.csv (gets replaced daily)
     output_file = script_dir / "Stock_History.csv"
-    save_to_csv(active_products, output_file, date_columns)
+    
+    with StageCache(script_dir) as cache:
+        # Same snapshots and dates as an earlier run: the history is already there
+        cache_key = cache.key(*(f"{s.sha256}:{s.label}" for s in snapshots))
+        if cache.reuse('generate_history', cache_key, output_file):
+            print("♻️  Snapshots unchanged since the last run - Stock_History.csv is up to date")
+            print("=" * 60)
+            return
+        
+        # Generate history from the stock cube (only the newest snapshot needs parsing)
+        with InventoryLedger(script_dir) as ledger:
+            with span('generate_history.ledger') as s:
+                s.rows = ledger.catch_up(snapshots, parse_inventory_html)
+            
+            # Keep the products x days cube in step with the ledger
+            with span('generate_history.cube') as s:
+                cube = StockCube(script_dir)
+                days = s.rows = cube.update(ledger)
+            if days:
+                print(f"🧊 Stock cube updated ({days} day(s))")
+            
+            with span('generate_history.build') as s:
+                # The cube holds one end-of-day row per day: it stands in for
+                # the snapshots when each is the only one of its day
+                snapshot_days = [snapshot.captured_at.date() for snapshot in snapshots]
+                entries = [ledger.entry_for(snapshot.id) for snapshot in snapshots]
+                if len(set(snapshot_days)) == len(snapshot_days) and all(map(cube.has_day, snapshot_days)):
+                    states, source = cube.states(snapshot_days), 'cube'
+                elif all(entries):
+                    states, source = ledger.states([entry['id'] for entry in entries]), 'ledger'
+                else:
+                    states = None
+                
+                if states is not None:
+                    inventories = [{'date': date, 'data': state} for date, state in zip(dates, states)]
+                    for inv in inventories:
+                        print(f"📒 {inv['date']}: {len(inv['data'])} products (from {source})")
+                    active_products, date_columns = build_history(inventories)
+                else:
+                    active_products, date_columns = generate_history(files_to_use, dates)
+                s.rows = len(active_products)
+        
+        # Save to Stock_History.csv (gets replaced daily)
+        with span('generate_history.write_csv') as s:
+            save_to_csv(active_products, output_file, date_columns)
+            s.rows = len(active_products)
+            s.add_file(output_file)
+        cache.store('generate_history', cache_key, output_file if active_products else None)
     
     # Print summary
     print("\n" + "=" * 60)
@@ -247,5 +324,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        finish_run()
 
@@ -43,6 +43,10 @@ def main():
         print("   3. Add trace recording wrapper (see template)")
         print("   4. Run: python3 replay_recorded_session.py")
         print()
+        print("⚡ Or save the code to a file and compile it into a fast, sleep-free flow:")
+        print("   python3 compile_recording.py my_recording.py")
+        print("   python3 run_flow.py flows/my_recording.json")
+        print()
         
     except subprocess.CalledProcessError as e:
         print(f"\n❌ Error: {e}")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Multi-Account Stock Update
+Runs the daily pipeline for every seller account in accounts.json
+
+Accounts are processed concurrently (up to Config.MAX_CONCURRENT_ACCOUNTS)
+inside one shared browser, each in its own isolated context. Snapshots and
+reports for an account go to accounts/<name>/.
+"""
+
+from automation.accounts import load_accounts
+from automation.config import Config
+from automation.metrics import finish_run, start_run
+from automation.pool import PagePool, SharedBrowser, DownloadJob
+from automation.archive import prune_archive
+from automation.orders_store import is_not_available
+from automation.utils import clean_old_files
+from compare_orders import parse_orders_table
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import time
+import sys
+
+import stock_update
+
+
+def flagged_orders(orders_value):
+    """
+    Orders to enrich after the orders job: the Not Available ones of a
+    downloaded snapshot, or None (the orders store's) after an ingestion
+    """
+    if isinstance(orders_value, dict):
+        return None
+    return [o['reference'] for o in parse_orders_table(orders_value) if is_not_available(o['shipping_status'])]
+
+
+def run_account(config, browser):
+    """Download and process one account; returns (name, ok, seconds)"""
+    name = config.ACCOUNT
+    account_dir = config.DOWNLOAD_DIR
+    start = time.perf_counter()
+
+    today = datetime.now().strftime('%b%d').upper()
+    today_csv = account_dir / f"Stock_{today}.csv"
+    today_html = account_dir / f"Inventory - {today}.html"
+    if today_csv.exists() and today_html.exists():
+        print(f"✅ [{name}] Today's report already exists, skipping")
+        return name, True, 0.0
+
+    # Same orders step as stock_update.py: a snapshot, or new orders into the store
+    orders_action = 'ingest_orders' if config.ORDERS_MODE == 'incremental' else 'download_orders'
+    print(f"🏪 [{name}] Downloading inventory and orders...")
+    with PagePool(size=2, config=config, browser=browser) as pool:
+        inventory, orders = pool.run([
+            DownloadJob('inventory', 'download_inventory'),
+            DownloadJob('orders', orders_action),
+        ])
+        # Product, city and notes of the flagged orders (non-critical)
+        if orders.ok and config.ORDER_DETAILS:
+            details, = pool.run([
+                DownloadJob('order_details', 'enrich_orders', references=flagged_orders(orders.value))
+            ])
+            if not details.ok:
+                print(f"⚠️  [{name}] Order details not fetched: {details.error}")
+
+    prune_archive(account_dir)
+    clean_old_files(directory=account_dir, pattern="Inventory*.html", keep_recent=7)
+    clean_old_files(directory=account_dir, pattern="Orders*.html", keep_recent=7)
+
+    if not inventory.ok:
+        print(f"❌ [{name}] Inventory download failed: {inventory.error}")
+        return name, False, time.perf_counter() - start
+
+    ok = stock_update.compare_inventory(account_dir)
+    stock_update.generate_history(account_dir)
+
+    if orders.ok:
+        stock_update.process_orders(account_dir)
+    else:
+        print(f"⚠️  [{name}] Orders download failed: {orders.error}")
+
+    return name, ok, time.perf_counter() - start
+
+
+def main():
+    accounts = load_accounts()
+
+    if not accounts:
+        print(f"❌ Error: No accounts found in {Config.ACCOUNTS_FILE.name}")
+        print("   Copy accounts.example.json to accounts.json and add your accounts")
+        sys.exit(1)
+
+    workers = min(len(accounts), Config.MAX_CONCURRENT_ACCOUNTS)
+
+    print("\n" + "=" * 60)
+    print(f"🚀 STOCK UPDATE - {len(accounts)} account(s), {workers} at a time")
+    print("=" * 60)
+    print()
+
+    # One metrics run for all accounts (and the scripts they start)
+    start_run(Config.DOWNLOAD_DIR)
+    start = time.perf_counter()
+    with SharedBrowser() as browser:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_account, config, browser) for config in accounts]
+            results = []
+            for config, future in zip(accounts, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"❌ [{config.ACCOUNT}] Failed: {e}")
+                    results.append((config.ACCOUNT, False, 0.0))
+
+    print("\n" + "=" * 60)
+    print("📈 SUMMARY")
+    print("=" * 60)
+    for name, ok, seconds in results:
+        status = "✅" if ok else "❌"
+        print(f"  {status} {name} ({seconds:.0f}s) -> {Config.ACCOUNTS_DIR / name}")
+    print(f"\n⏱️  Total: {time.perf_counter() - start:.0f}s")
+    print("=" * 60)
+
+    if not all(ok for _, ok, _ in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        finish_run()
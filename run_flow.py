@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Flow Runner
+Replay a compiled flow (see compile_recording.py) with auto-waiting instead of sleeps
+
+Usage:
+    python3 run_flow.py flows/run_my_recording.json
+    python3 run_flow.py flows/analytics_filter.json --login     # log in first (flow recorded after login)
+    python3 run_flow.py flows/analytics_filter.json --show --save page.html
+"""
+
+from pathlib import Path
+import argparse
+import sys
+import time
+
+from automation.codpartner import CODPartnerAutomation
+from automation.config import Config
+from automation.flows import Flow
+from automation.metrics import finish_run, start_run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a compiled flow")
+    parser.add_argument('flow', type=Path, help="Flow JSON file")
+    parser.add_argument('--login', action='store_true', help="Log in before running the flow")
+    parser.add_argument('--show', action='store_true', help="Show the browser window")
+    parser.add_argument('--save', type=Path, metavar='HTML', help="Save the final page HTML")
+    args = parser.parse_args()
+
+    if not args.flow.exists():
+        print(f"❌ Flow not found: {args.flow}")
+        print("💡 Compile one with: python3 compile_recording.py <script>")
+        sys.exit(1)
+
+    flow = Flow.load(args.flow)
+    config = Config()
+    config.SHOW_BROWSER = args.show
+    start_run(config.DOWNLOAD_DIR)
+
+    started = time.perf_counter()
+    try:
+        with CODPartnerAutomation(config) as bot:
+            if args.login:
+                bot.login()
+            bot.run_flow(flow)
+            if args.save:
+                args.save.write_text(bot.page.content(), encoding='utf-8')
+                print(f"💾 Saved to: {args.save}")
+    except Exception as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    finally:
+        finish_run()
+
+    print(f"\n⏱️  Total time: {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
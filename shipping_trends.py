@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Shipping Status Trends
+Daily delivered / returned / pending counts from the orders captures
+Writes Shipping_Trends.csv (one row per day, one column per shipping status)
+"""
+
+import argparse
+import csv
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from automation.archive import RAW_PATTERNS
+from automation.manifest import SnapshotManifest
+from automation.metrics import finish_run, span, start_run
+from automation.status_history import ShippingStatusHistory
+from compare_orders import parse_orders_table
+
+
+TREND_STATUSES = ['Delivered', 'Returned', 'Pending']
+
+
+def status_columns(statuses):
+    """Delivered, Returned and Pending first, then the others by frequency"""
+    return [s for s in TREND_STATUSES if s in statuses] + [s for s in statuses if s not in TREND_STATUSES]
+
+
+def save_trends_to_csv(series, statuses, output_file):
+    """Save one row per day with the orders in each shipping status"""
+    with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Date', 'Orders'] + statuses + ['Delivery Rate'])
+        for day, counts in series.items():
+            writer.writerow([day, sum(counts.values())] + [counts.get(s, 0) for s in statuses]
+                            + [f"{delivery_rate(counts):.0%}"])
+    print(f"💾 Saved results to: {output_file}")
+
+
+def delivery_rate(counts):
+    """Delivered share of the orders that are done (delivered or returned)"""
+    done = counts.get('Delivered', 0) + counts.get('Returned', 0)
+    return counts.get('Delivered', 0) / done if done else 0.0
+
+
+def main():
+    print("=" * 60)
+    print("🚚 Shipping Status Trends")
+    print("=" * 60)
+
+    parser = argparse.ArgumentParser(description="Daily shipping-status counts from the orders captures")
+    parser.add_argument('--dir', type=Path, default=Path(__file__).parent,
+                        help="Folder with the orders captures (default: this folder)")
+    parser.add_argument('--days', type=int, default=14, help="Days to show (default: 14)")
+    parser.add_argument('--product', help="Only orders of this product")
+    args = parser.parse_args()
+
+    script_dir = args.dir
+    start_run(script_dir)
+
+    with ShippingStatusHistory(script_dir) as history:
+        # Count archived captures that no orders run has counted yet
+        with span('shipping_trends.catch_up') as s:
+            with SnapshotManifest(script_dir) as manifest:
+                manifest.sync('orders', RAW_PATTERNS['orders'])
+                snapshots = manifest.all('orders')
+            s.rows = history.catch_up(snapshots, parse_orders_table)
+        if s.rows:
+            print(f"📥 Counted {s.rows} earlier orders capture(s)")
+
+        since = (datetime.now() - timedelta(days=args.days - 1)).date()
+        with span('shipping_trends.query') as s:
+            series = history.series(product=args.product, since=since)
+            statuses = status_columns(history.statuses())
+            s.rows = len(series)
+
+    if not series:
+        print("❌ No orders captures in this period")
+        print("   Please run download first")
+        return
+
+    output_file = script_dir / "Shipping_Trends.csv"
+    save_trends_to_csv(series, statuses, output_file)
+
+    print("\n" + "=" * 60)
+    print(f"📈 LAST {len(series)} DAY(S)" + (f" - {args.product}" if args.product else ""))
+    print("=" * 60)
+    shown = [s for s in TREND_STATUSES if s in statuses]
+    print("  Date        Orders  " + "  ".join(f"{s:>9}" for s in shown) + "  Deliv.Rate")
+    for day, counts in series.items():
+        print(f"  {day}  {sum(counts.values()):>6}  "
+              + "  ".join(f"{counts.get(s, 0):>9}" for s in shown)
+              + f"  {delivery_rate(counts):>10.0%}")
+    print()
+    print("✨ Done! Open Shipping_Trends.csv for every status.")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        finish_run()
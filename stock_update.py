@@ -4,14 +4,27 @@ Complete Stock Update - Download & Compare
 Run this daily to get your stock report
 """
 
+from automation import profiling
 from automation.codpartner import CODPartnerAutomation
+from automation.config import Config
+from automation.archive import prune_archive
+from automation.metrics import finish_run, span, start_run
 from automation.utils import clean_old_files
 from pathlib import Path
 from datetime import datetime
+import argparse
 import subprocess
 import sys
 
 
+def script_command(script_path, directory=None, *extra):
+    """Command line for a processing script, optionally pointed at another folder"""
+    command = [sys.executable, str(script_path)]
+    if directory:
+        command += ['--dir', str(directory)]
+    return command + list(extra)
+
+
 def download_inventory():
     """Download today's inventory"""
     print("=" * 60)
@@ -22,8 +35,10 @@ def download_inventory():
         with CODPartnerAutomation() as bot:
             bot.login()
             filepath = bot.download_inventory()
+            # Older captures live on (compressed) in the archive
+            prune_archive(Config.DOWNLOAD_DIR)
             clean_old_files(
-                directory=Path(__file__).parent,
+                directory=Config.DOWNLOAD_DIR,
                 pattern="Inventory*.html",
                 keep_recent=7
             )
@@ -36,7 +51,7 @@ def download_inventory():
         return False
 
 
-def compare_inventory():
+def compare_inventory(directory=None):
     """Run comparison script (daily snapshot)"""
     print("=" * 60)
     print("📊 STEP 2: Comparing Inventory (Daily)")
@@ -46,7 +61,7 @@ def compare_inventory():
         # Run compare_inventory.py
         script_path = Path(__file__).parent / "compare_inventory.py"
         result = subprocess.run(
-            [sys.executable, str(script_path)],
+            script_command(script_path, directory),
             capture_output=True,
             text=True
         )
@@ -65,7 +80,7 @@ def compare_inventory():
         return False
 
 
-def generate_history():
+def generate_history(directory=None):
     """Generate 7-day history file"""
     print("=" * 60)
     print("📊 STEP 2b: Generating Stock History (7-day view)")
@@ -75,7 +90,7 @@ def generate_history():
         # Run generate_history.py
         script_path = Path(__file__).parent / "generate_history.py"
         result = subprocess.run(
-            [sys.executable, str(script_path)],
+            script_command(script_path, directory),
             capture_output=True,
             text=True
         )
@@ -103,14 +118,24 @@ def download_orders():
     try:
         with CODPartnerAutomation() as bot:
             bot.login()
-            filepath = bot.download_orders()
-            clean_old_files(
-                directory=Path(__file__).parent,
-                pattern="Orders*.html",
-                keep_recent=7
-            )
+            if Config.ORDERS_MODE == 'incremental':
+                # Only new orders are read, into the orders store
+                bot.ingest_orders()
+            else:
+                filepath = bot.download_orders()
+                # Older captures live on (compressed) in the archive
+                prune_archive(Config.DOWNLOAD_DIR)
+                clean_old_files(
+                    directory=Config.DOWNLOAD_DIR,
+                    pattern="Orders*.html",
+                    keep_recent=7
+                )
+            enrich_orders(bot)
         
-        print("✅ Orders downloaded successfully\n")
+        if Config.ORDERS_MODE == 'incremental':
+            print("✅ Orders ingested successfully\n")
+        else:
+            print("✅ Orders downloaded successfully\n")
         return True
         
     except Exception as e:
@@ -119,7 +144,18 @@ def download_orders():
         return False
 
 
-def process_orders():
+def enrich_orders(bot):
+    """Add product, city and notes of the flagged orders (non-critical)"""
+    if not Config.ORDER_DETAILS:
+        return
+    try:
+        with span('update.enrich_orders'):
+            bot.enrich_orders()
+    except Exception as e:
+        print(f"⚠️  Order details not fetched: {e}")
+
+
+def process_orders(directory=None):
     """Run orders processing script"""
     print("=" * 60)
     print("📦 STEP 4: Processing Orders (Not Available Status)")
@@ -128,8 +164,9 @@ def process_orders():
     try:
         # Run compare_orders.py
         script_path = Path(__file__).parent / "compare_orders.py"
+        extra = ['--from-store'] if Config.ORDERS_MODE == 'incremental' else []
         result = subprocess.run(
-            [sys.executable, str(script_path)],
+            script_command(script_path, directory, *extra),
             capture_output=True,
             text=True
         )
@@ -149,14 +186,19 @@ def process_orders():
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Download today's inventory and orders and build the reports")
+    parser.add_argument('--profile', action='store_true',
+                        help="Write cProfile, tracemalloc and flamegraph reports for every step to profiles/")
+    args = parser.parse_args()
+    
     # Check if today's files already exist
     today = datetime.now().strftime('%b%d').upper()
     if today.startswith('OCT'):
         today = 'OCT' + today[3:]
     
-    project_dir = Path(__file__).parent
-    today_csv = project_dir / f"Stock_{today}.csv"
-    today_html = project_dir / f"Inventory - {today}.html"
+    data_dir = Config.DOWNLOAD_DIR
+    today_csv = data_dir / f"Stock_{today}.csv"
+    today_html = data_dir / f"Inventory - {today}.html"
     
     if today_csv.exists() and today_html.exists():
         print("\n" + "=" * 60)
@@ -174,25 +216,37 @@ def main():
     print("=" * 60)
     print()
     
+    # Every step (and the scripts it runs) logs its timings to metrics/
+    start_run(data_dir)
+    if args.profile:
+        profiling.enable(data_dir)
+    
     # Step 1: Download
-    if not download_inventory():
+    with span('update.download_inventory'):
+        downloaded = download_inventory()
+    if not downloaded:
         print("\n❌ FAILED at download step")
         sys.exit(1)
     
     # Step 2: Compare (daily snapshot)
-    if not compare_inventory():
+    with span('update.compare_inventory'):
+        compared = compare_inventory(data_dir)
+    if not compared:
         print("\n❌ FAILED at comparison step")
         sys.exit(1)
     
     # Step 2b: Generate history (7-day view, non-critical)
-    generate_history()
+    with span('update.generate_history'):
+        generate_history(data_dir)
     
     # Step 3: Download Orders (non-critical, continues on failure)
-    orders_downloaded = download_orders()
+    with span('update.download_orders'):
+        orders_downloaded = download_orders()
     
     # Step 4: Process Orders (only if download succeeded)
     if orders_downloaded:
-        process_orders()
+        with span('update.process_orders'):
+            process_orders(data_dir)
     
     # Success!
     print("\n" + "=" * 60)
@@ -207,5 +261,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        finish_run()
 